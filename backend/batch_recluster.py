@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Batch reclustering of every stored article in one pass
+- Loads all article embeddings into one matrix (embedding cache for any
+  that are missing)
+- Links every pair with cosine >= SIMILARITY_THRESHOLD (blocked matrix
+  products on a thread pool) and takes connected components
+- Splits chained components (members far from the centroid) around
+  densest-first seeds, then moves members to their closest centroid
+- Replaces all topics and assignments with bulk writes
+- --compare also replays the greedy path in memory and prints a quality
+  report of both
+Run in Render Shell: python3 batch_recluster.py [--compare]
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import time
+
+import numpy as np
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+import models
+import topic_stats
+import popularity
+import relevance
+import clustering
+import topic_index
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+BATCH_BLOCK_ROWS = int(os.getenv("BATCH_BLOCK_ROWS", "1024"))
+BATCH_BLOCK_COLS = 8192
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+REFINE_ROUNDS = 2
+
+
+# ============================================================
+# VECTORIZED CLUSTERING
+# ============================================================
+
+def _block_edges(X: np.ndarray, start: int, stop: int, threshold: float):
+    """Pairs (i, j), i in [start, stop), j > i, with X[i]·X[j] >= threshold.
+    Columns are tiled too, so a block never needs more than
+    BATCH_BLOCK_ROWS x BATCH_BLOCK_COLS similarities in memory."""
+    rows_out, cols_out = [], []
+    for col in range(start, len(X), BATCH_BLOCK_COLS):
+        sims = X[start:stop] @ X[col:col + BATCH_BLOCK_COLS].T
+        rows, cols = np.nonzero(sims >= threshold)
+        rows, cols = rows + start, cols + col
+        upper = cols > rows
+        rows_out.append(rows[upper])
+        cols_out.append(cols[upper])
+    return np.concatenate(rows_out), np.concatenate(cols_out)
+
+
+def threshold_edges(X: np.ndarray, threshold: float, block: int = BATCH_BLOCK_ROWS,
+                    workers: int = BATCH_WORKERS):
+    """All similar pairs, computed block by block on a thread pool
+    (NumPy releases the GIL inside the matrix product)."""
+    starts = range(0, len(X), block)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        parts = list(pool.map(lambda s: _block_edges(X, s, min(s + block, len(X)), threshold), starts))
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate([a for a, _ in parts]), np.concatenate([b for _, b in parts])
+
+
+def connected_components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Component label (smallest member index) per node: vectorized union-find
+    by hooking roots onto smaller roots, then pointer jumping."""
+    parent = np.arange(n)
+    while True:
+        # Pointer jumping until every node points at its root
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            return parent
+        lo, hi = np.minimum(ra[differ], rb[differ]), np.maximum(ra[differ], rb[differ])
+        # Several edges may hook the same root; np.minimum.at keeps the smallest
+        np.minimum.at(parent, hi, lo)
+
+
+def compact(labels: np.ndarray) -> np.ndarray:
+    """Labels → 0..k-1, numbered by first appearance."""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return order[inverse]
+
+
+def centroids_of(X: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Unit centroid per label; labels must be compact (0..k-1, all present)."""
+    order = np.argsort(labels, kind="stable")
+    ordered = labels[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    return topic_index.normalize_rows(np.add.reduceat(X[order], starts, axis=0))
+
+
+def split_component(X: np.ndarray, degree: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Local labels (0..k-1) for one chained component. Seeds are picked
+    densest-first, each at least `threshold` away from every earlier seed
+    (order-independent, unlike arrival order). Members then join their most
+    similar seed; a few rounds move them to the most similar centroid, and
+    members no centroid reaches become topics of their own.
+    """
+    order = np.argsort(-degree, kind="stable")
+    seeds = np.empty_like(X)
+    k = 0
+    for i in order:
+        if k == 0 or np.max(seeds[:k] @ X[i]) < threshold:
+            seeds[k] = X[i]
+            k += 1
+    cents = seeds[:k]
+
+    for _ in range(REFINE_ROUNDS + 1):
+        sims = X @ cents.T
+        labels = np.argmax(sims, axis=1)
+        loose = sims[np.arange(len(X)), labels] < threshold
+        labels[loose] = len(cents) + np.arange(int(loose.sum()))
+        labels = compact(labels)
+        cents = centroids_of(X, labels)
+    return labels
+
+
+def cluster_matrix(X: np.ndarray, threshold: float = None) -> np.ndarray:
+    """
+    Topic label (0..k-1, by first member) for every row of X (unit rows).
+
+    Components of the threshold graph whose members all sit within the
+    threshold of the component centroid become topics as they are.
+    Single-link chains (some member far from the centroid) are split with
+    split_component().
+    """
+    threshold = clustering.SIMILARITY_THRESHOLD if threshold is None else threshold
+    n = len(X)
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+
+    a, b = threshold_edges(X, threshold)
+    labels = compact(connected_components(n, a, b))
+    degree = np.bincount(a, minlength=n) + np.bincount(b, minlength=n)
+
+    own = np.einsum("ij,ij->i", X, centroids_of(X, labels)[labels])
+    chained = np.unique(labels[own < threshold])
+    if len(chained):
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(labels.max() + 2))
+        next_label = labels.max() + 1
+        for c in chained:
+            idx = order[bounds[c]:bounds[c + 1]]
+            local = split_component(X[idx], degree[idx], threshold)
+            # Part 0 keeps the component's label, the rest get fresh ones
+            labels[idx] = np.where(local == 0, c, next_label + local - 1)
+            next_label += local.max()
+    return compact(labels)
+
+
+def greedy_labels(X: np.ndarray, threshold: float = None) -> np.ndarray:
+    """The one-article-at-a-time run_clustering path, replayed in memory."""
+    threshold = clustering.SIMILARITY_THRESHOLD if threshold is None else threshold
+    index = topic_index.ExactTopicIndex(dims=X.shape[1])
+    centroids, counts = {}, {}
+    labels = np.empty(len(X), dtype=np.int64)
+    for i, vec in enumerate(X):
+        best, sim = index.search(vec) if len(index) else (None, 0.0)
+        if best is None or sim < threshold:
+            index.add(i, vec)
+            centroids[i], counts[i] = vec, 1
+            labels[i] = i
+        else:
+            centroids[best] = clustering.update_centroid(centroids[best], counts[best], vec)
+            counts[best] += 1
+            index.update(best, centroids[best])
+            labels[i] = best
+    return compact(labels)
+
+
+def quality_report(X: np.ndarray, labels: np.ndarray) -> dict:
+    sizes = np.bincount(labels)
+    cents = centroids_of(X, labels)
+    own = np.einsum("ij,ij->i", X, cents[labels])
+    multi = sizes[labels] > 1
+    return {
+        "topics": int(len(sizes)),
+        "singletons": int((sizes == 1).sum()),
+        "largest_topic": int(sizes.max()),
+        "avg_articles_per_topic": round(float(sizes.mean()), 2),
+        # Cohesion of multi-article topics: member → own centroid
+        "mean_sim_to_centroid": round(float(own[multi].mean()), 3) if multi.any() else None,
+        "members_below_threshold": int((own[multi] < clustering.SIMILARITY_THRESHOLD).sum()),
+    }
+
+
+def adjusted_rand(a: np.ndarray, b: np.ndarray) -> float:
+    table = np.zeros((a.max() + 1, b.max() + 1), dtype=np.int64)
+    np.add.at(table, (a, b), 1)
+
+    def pairs(x):
+        return (x * (x - 1) // 2).sum()
+
+    total = len(a) * (len(a) - 1) // 2
+    both, rows, cols = pairs(table), pairs(table.sum(axis=1)), pairs(table.sum(axis=0))
+    expected = rows * cols / total if total else 0
+    best = (rows + cols) / 2
+    return 1.0 if best == expected else round(float((both - expected) / (best - expected)), 3)
+
+
+# ============================================================
+# DATABASE
+# ============================================================
+
+def load_matrix(db: Session):
+    """(relevant articles in id order, unit-row embedding matrix)."""
+    if relevance.needs_reclassify(db):
+        relevance.reclassify(db)
+    articles = db.query(models.NewsItem).filter(
+        models.NewsItem.relevant == True
+    ).order_by(models.NewsItem.id).all()
+    vectors = [clustering.compress_embedding(clustering.deserialize_embedding(a.embedding)) for a in articles]
+
+    dims = clustering.EMBED_DIMENSIONS or next((len(v) for v in vectors if v is not None), None)
+    missing = [i for i, v in enumerate(vectors) if v is None or len(v) != dims]
+    if missing:
+        fresh = clustering.embed_texts([f"{articles[i].title}. {articles[i].summary}" for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            articles[i].embedding = clustering.serialize_embedding(vector)
+        dims = dims or next((len(v) for v in vectors if v is not None), None)
+
+    keep = [i for i, v in enumerate(vectors) if v is not None and len(v) == dims]
+    articles = [articles[i] for i in keep]
+    if not articles:
+        return [], np.zeros((0, dims or 0), dtype=np.float32)
+    return articles, topic_index.normalize_rows(np.stack([vectors[i] for i in keep]))
+
+
+def write_back(db: Session, articles: list, X: np.ndarray, labels: np.ndarray) -> list:
+    """Replace every topic and assignment in bulk. Returns the new topic ids."""
+    db.query(models.NewsItem).update({"topic_id": None})
+    topic_stats.clear(db)
+    db.query(models.Topic).delete()
+
+    cents = centroids_of(X, labels)
+    members = [[] for _ in range(len(cents))]
+    for article, label in zip(articles, labels):
+        members[label].append(article)
+
+    sources_of = [Counter(a.source_id for a in group if a.source_id is not None) for group in members]
+
+    now = datetime.utcnow()
+    rows = []
+    for label, group in enumerate(members):
+        founder = group[0]  # labels are numbered by first member, in id order
+        rows.append({
+            "title": clustering.generate_topic_title(founder.title, founder.summary),
+            "summary": founder.summary,
+            "embedding": clustering.serialize_embedding(cents[label]),
+            "centroid_count": len(group),
+            "centroid_updated_at": now,
+            "article_count": len(group),
+            "distinct_source_count": len(sources_of[label]),
+            "maintenance_pending": False,  # clustered as a whole just now
+            "created_at": now,
+        })
+
+    topic_ids = db.execute(
+        insert(models.Topic).returning(models.Topic.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    db.execute(update(models.NewsItem), [
+        {"id": article.id, "topic_id": topic_ids[label]}
+        for article, label in zip(articles, labels)
+    ])
+    topic_sources = [
+        {"topic_id": topic_ids[label], "source_id": source_id, "article_count": n}
+        for label, sources in enumerate(sources_of) for source_id, n in sources.items()
+    ]
+    if topic_sources:
+        db.execute(insert(models.TopicSource), topic_sources)
+    popularity.rebuild(db)
+    db.commit()
+    popularity.rescore(db)
+
+    # Topic ids were all replaced; rebuild the persisted search index to match
+    if clustering.TOPIC_INDEX_PATH:
+        index = topic_index.make_index(dims=X.shape[1])
+        index.add_many(list(topic_ids), cents)
+        index.synced_at = now
+        index.save(clustering.TOPIC_INDEX_PATH)
+    return topic_ids
+
+
+def batch_recluster(db: Session, compare: bool = False, progress=None) -> dict:
+    """Recluster every article from scratch. Returns timings and a quality report."""
+    progress = progress or (lambda **counters: None)
+    started = time.perf_counter()
+    progress(stage="loading embeddings")
+    articles, X = load_matrix(db)
+    loaded = time.perf_counter()
+
+    progress(stage="clustering", articles_embedded=len(articles))
+    labels = cluster_matrix(X)
+    clustered = time.perf_counter()
+    progress(stage="writing", topics_created=int(labels.max()) + 1 if len(labels) else 0)
+
+    if len(articles):
+        write_back(db, articles, X, labels)
+    written = time.perf_counter()
+
+    stats = {
+        "articles": len(articles),
+        "load_seconds": round(loaded - started, 2),
+        "cluster_seconds": round(clustered - loaded, 2),
+        "write_seconds": round(written - clustered, 2),
+        "batch": quality_report(X, labels) if len(articles) else {},
+    }
+    if compare and len(articles):
+        started = time.perf_counter()
+        greedy = greedy_labels(X)
+        stats["greedy_seconds"] = round(time.perf_counter() - started, 2)
+        stats["greedy"] = quality_report(X, greedy)
+        stats["adjusted_rand_vs_greedy"] = adjusted_rand(labels, greedy)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--compare", action="store_true", help="also replay the greedy path and compare")
+    args = parser.parse_args()
+
+    from database import SessionLocal, engine
+    import migrate
+
+    print("=" * 60)
+    print("🧮 BATCH RECLUSTER")
+    print("=" * 60)
+
+    # Same schema upgrade as app startup, for databases from before the new columns
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        stats = batch_recluster(db, compare=args.compare)
+    finally:
+        db.close()
+
+    print(f"\n   Articles:   {stats['articles']}")
+    print(f"   Load:       {stats['load_seconds']}s")
+    print(f"   Cluster:    {stats['cluster_seconds']}s")
+    print(f"   Write back: {stats['write_seconds']}s")
+    for name in ("batch", "greedy"):
+        if name in stats:
+            print(f"\n   {name}:")
+            for key, value in stats[name].items():
+                print(f"      {key:26} {value}")
+    if "greedy" in stats:
+        print(f"\n   Greedy replay: {stats['greedy_seconds']}s")
+        print(f"   Adjusted Rand index vs greedy: {stats['adjusted_rand_vs_greedy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Batch reclustering vs the greedy path on synthetic embeddings
+- Generates N article vectors around N/8 stories
+- Times batch_recluster.cluster_matrix and the in-memory greedy replay
+- Prints both quality reports and their agreement (adjusted Rand index)
+Run locally: python3 bench_batch_recluster.py --articles 20000 --dims 256
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import batch_recluster
+import topic_index
+
+
+def synthetic(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 8), dims))
+    picks = rng.integers(0, len(centres), n)
+    return topic_index.normalize_rows(centres[picks] + rng.standard_normal((n, dims)) * 0.6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--skip-greedy", action="store_true")
+    args = parser.parse_args()
+
+    X = synthetic(args.articles, args.dims)
+    print("=" * 60)
+    print(f"🧮 BATCH RECLUSTER: {args.articles} articles, {args.dims} dims, "
+          f"{batch_recluster.BATCH_WORKERS} workers")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    labels = batch_recluster.cluster_matrix(X)
+    print(f"\n   batch   {time.perf_counter() - started:7.2f}s  {batch_recluster.quality_report(X, labels)}")
+
+    if not args.skip_greedy:
+        started = time.perf_counter()
+        greedy = batch_recluster.greedy_labels(X)
+        print(f"   greedy  {time.perf_counter() - started:7.2f}s  {batch_recluster.quality_report(X, greedy)}")
+        print(f"\n   Adjusted Rand index (batch vs greedy): {batch_recluster.adjusted_rand(labels, greedy)}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Database round trips of run_clustering, per-article vs batched writes
+- Seeds N unclustered AI articles (plus a few existing topics) into a
+  throwaway SQLite DB; embeds them with the local hashing provider
+- Runs run_clustering in each CLUSTER_WRITE_MODE from the same starting
+  state and counts SQL statements, commits and time
+- Checks both modes produce the same topics (same article groups)
+Run locally: python3 bench_cluster_writes.py --articles 1000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Throwaway database, offline embeddings, no persisted index — BEFORE importing the app
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_writes.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["EMBED_PROVIDER"] = "hashing"
+os.environ["TOPIC_INDEX_PATH"] = ""
+
+from sqlalchemy import event
+
+from database import SessionLocal, engine
+import models
+import clustering
+
+
+SUBJECTS = ["OpenAI", "Anthropic", "Google DeepMind", "Meta", "Mistral", "Nvidia", "Cohere", "xAI"]
+EVENTS = ["releases new AI model", "raises funding for AI lab", "publishes AI safety research",
+          "launches AI agent API", "open-sources AI weights", "cuts AI inference pricing"]
+
+counters = {"statements": 0, "commits": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters["statements"] += 1
+
+
+@event.listens_for(engine, "commit")
+def _count_commit(conn):
+    counters["commits"] += 1
+
+
+def seed(n: int, existing_topics: int):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    rng = random.Random(5)
+    db = SessionLocal()
+    db.add(models.Source(name="Bench", url="http://bench", type="rss"))
+    db.commit()
+    for i in range(existing_topics):
+        db.add(models.Topic(title=f"{SUBJECTS[i % len(SUBJECTS)]} {EVENTS[i % len(EVENTS)]}",
+                            summary="Earlier coverage.", popularity_score=10.0))
+    products = [f"{rng.choice('BKLMNPRSTVZ')}{rng.choice('aeiou')}{rng.choice('dkmnrst')}{rng.choice('aeiou')}"
+                for _ in range(max(1, n // 5))]
+    for i in range(n):
+        subject, what, product = rng.choice(SUBJECTS), rng.choice(EVENTS), rng.choice(products)
+        db.add(models.NewsItem(
+            title=f"{subject} {what}: {product}",
+            summary=f"{product} from {subject} (report {rng.randint(1, 3)}).",
+            url=f"http://bench/{i}",
+            source_id=1,
+        ))
+    db.commit()
+    db.close()
+
+
+def snapshot() -> str:
+    engine.dispose()
+    path = _DB_FILE + ".start"
+    shutil.copyfile(_DB_FILE, path)
+    return path
+
+
+def restore(path: str):
+    engine.dispose()
+    shutil.copyfile(path, _DB_FILE)
+
+
+def groups(db) -> set:
+    """The partition of articles into topics, independent of topic ids."""
+    members = {}
+    for article_id, topic_id in db.query(models.NewsItem.id, models.NewsItem.topic_id):
+        members.setdefault(topic_id, []).append(article_id)
+    return {tuple(sorted(ids)) for ids in members.values()}
+
+
+def run(mode: str):
+    clustering.CLUSTER_WRITE_MODE = mode
+    db = SessionLocal()
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        before = dict(counters)
+        started = time.perf_counter()
+        topics = clustering.run_clustering(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    try:
+        return topics, elapsed, {k: counters[k] - before[k] for k in counters}, groups(db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--existing-topics", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.articles, args.existing_topics)
+    clustering.EMBED_CACHE_ENABLED = False  # cache writes would add their own statements
+    start_state = snapshot()
+
+    print("=" * 72)
+    print(f"💾 CLUSTER WRITES: {args.articles} articles, {args.existing_topics} existing topics, "
+          f"chunk {clustering.CLUSTER_FLUSH_CHUNK}")
+    print("=" * 72)
+    results = {}
+    for mode in ("per-article", "batched"):
+        restore(start_state)
+        topics, elapsed, counts, partition = run(mode)
+        results[mode] = partition
+        print(f"   {mode:12} {counts['statements']:6} statements  {counts['commits']:5} commits  "
+              f"{topics:4} topics  {elapsed:6.2f}s")
+
+    same = results["per-article"] == results["batched"]
+    print(f"\n   Same topics in both modes: {'✓' if same else '✗'}")
+
+
+if __name__ == "__main__":
+    main()
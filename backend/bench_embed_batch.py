@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Count embedding round trips for a full recluster
+- Starts the local fake embedding server and points the OpenAI client at it
+- Seeds N unclustered AI articles into a throwaway SQLite DB
+- Runs clustering.run_clustering and reports requests, inputs and time
+- Reclusters again to show a warm embedding cache sends nothing
+Run locally: python3 bench_embed_batch.py --articles 3000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import fake_embedding_server
+
+_server = fake_embedding_server.start()
+
+# Point the app at a throwaway database and the fake server BEFORE importing it
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_embed.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["TOPIC_INDEX_PATH"] = os.path.join(os.path.dirname(_DB_FILE), "topic_index.npz")
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{_server.server_address[1]}/v1"
+os.environ["OPENAI_API_KEY"] = "fake"
+os.environ["EMBED_PROVIDER"] = "openai"
+
+from database import SessionLocal, engine
+import models
+import clustering
+
+
+SUBJECTS = ["OpenAI", "Anthropic", "Google DeepMind", "Meta", "Mistral", "Nvidia"]
+EVENTS = ["releases new model", "raises funding", "publishes safety research",
+          "launches agent API", "open-sources weights", "cuts inference pricing"]
+
+
+def seed(n: int):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    rng = random.Random(3)
+    db = SessionLocal()
+    db.add(models.Source(name="Bench", url="http://bench", type="rss"))
+    db.commit()
+    for i in range(n):
+        title = f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)} #{i}"
+        db.add(models.NewsItem(
+            title=title,
+            summary=f"The AI model update covers {rng.choice(EVENTS)} and machine learning benchmarks.",
+            url=f"http://bench/{i}",
+            source_id=1,
+        ))
+    db.commit()
+    db.close()
+
+
+def recluster(db):
+    """Same reset as /reset-clustering, then cluster. Returns (topics, seconds)."""
+    db.query(models.NewsItem).update({"topic_id": None})
+    db.query(models.Topic).delete()
+    db.commit()
+
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        started = time.perf_counter()
+        topics = clustering.run_clustering(db)
+        return topics, time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=3000)
+    parser.add_argument("--reruns", type=int, default=1,
+                        help="full reclusters after the first (cache warm, LRU cleared)")
+    args = parser.parse_args()
+
+    seed(args.articles)
+    stats = fake_embedding_server.stats
+
+    print("=" * 60)
+    print(f"🧮 EMBEDDING BATCH BENCHMARK: {args.articles} articles")
+    print("=" * 60)
+
+    db = SessionLocal()
+    try:
+        for run in range(1 + args.reruns):
+            # A fresh process: only the database-backed cache survives
+            clustering.embedding_cache.cache._lru.clear()
+            before = dict(stats)
+            topics, elapsed = recluster(db)
+            print(f"   Run {run + 1}: {stats['requests'] - before['requests']:4} embedding requests, "
+                  f"{stats['inputs'] - before['inputs']:5} texts sent, "
+                  f"{topics} topics, {elapsed:.2f}s")
+    finally:
+        db.close()
+
+    print(f"\n   Cache: {clustering.embedding_cache.cache.stats()}")
+    _server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput and fault tolerance of the embedding dispatcher
+- Starts the local fake embedding server with injected faults: added
+  latency, random 429s (Retry-After) and 500s
+- Embeds N texts in small batches four ways: sequential without retries
+  (the old request loop), sequential with retries, concurrent, and
+  concurrent under a requests/min limit
+- Then runs clustering.run_clustering over N articles in a throwaway SQLite
+  DB under the same faults and checks every article got a topic
+Run locally: python3 bench_embed_dispatcher.py --texts 2000 --throttle-rate 0.1 --error-rate 0.05
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import fake_embedding_server
+
+_server = fake_embedding_server.start()
+
+# Point the app at a throwaway database and the fake server BEFORE importing it
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_dispatch.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["TOPIC_INDEX_PATH"] = ""
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{_server.server_address[1]}/v1"
+os.environ["OPENAI_API_KEY"] = "fake"
+os.environ["EMBED_PROVIDER"] = "openai"
+os.environ.setdefault("EMBED_BATCH_INPUTS", "32")  # many small requests
+os.environ.setdefault("EMBED_RETRY_BASE_SECONDS", "0.05")
+
+from database import SessionLocal, engine
+import models
+import clustering
+import embedding_dispatcher
+
+
+SUBJECTS = ["OpenAI", "Anthropic", "Google DeepMind", "Meta", "Mistral", "Nvidia"]
+EVENTS = ["releases new model", "raises funding", "publishes safety research",
+          "launches agent API", "open-sources weights", "cuts inference pricing"]
+
+
+def texts(n: int, salt: str) -> list:
+    rng = random.Random(5)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)} #{i} {salt}. AI model news." for i in range(n)]
+
+
+def run(label: str, dispatcher, inputs: list):
+    clustering.dispatcher = dispatcher
+    before = dict(fake_embedding_server.stats)
+    started = time.perf_counter()
+    try:
+        vectors = clustering.request_embeddings(inputs)
+        outcome = f"{sum(v is not None for v in vectors):5}/{len(inputs)} embedded"
+    except Exception as e:
+        outcome = f"aborted: {type(e).__name__}"
+    elapsed = time.perf_counter() - started
+
+    stats = dispatcher.stats()
+    sent = fake_embedding_server.stats["requests"] - before["requests"]
+    print(f"   {label:<24} {outcome:<26} {elapsed:6.2f}s  {sent:4} served  "
+          f"{stats['retries']:3} retries  p50 {stats['latency'].get('p50_ms', 0):6.1f}ms  "
+          f"p95 {stats['latency'].get('p95_ms', 0):6.1f}ms  limiter wait {stats['limiter_wait_seconds']:.2f}s")
+
+
+def seed(n: int):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(models.Source(name="Bench", url="http://bench", type="rss"))
+    db.commit()
+    for i, text in enumerate(texts(n, "article")):
+        title, summary = text.split(". ", 1)
+        db.add(models.NewsItem(title=title, summary=summary, url=f"http://bench/{i}", source_id=1))
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--in-flight", type=int, default=8)
+    parser.add_argument("--throttle-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    fake_embedding_server.faults.update(
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, latency_ms=args.latency_ms
+    )
+    embedder = clustering.embedder
+    batches = -(-args.texts // clustering.MAX_BATCH_INPUTS)
+
+    print("=" * 72)
+    print(f"🚦 EMBEDDING DISPATCHER: {args.texts} texts in {batches} requests, "
+          f"{args.throttle_rate:.0%} 429s, {args.error_rate:.0%} 500s, {args.latency_ms}ms latency")
+    print("=" * 72)
+
+    # Distinct texts per run so nothing is shared between them
+    run("sequential, no retry", embedding_dispatcher.EmbeddingDispatcher(
+        embedder, max_in_flight=1, max_retries=0), texts(args.texts, "a"))
+    run("sequential, retry", embedding_dispatcher.EmbeddingDispatcher(
+        embedder, max_in_flight=1), texts(args.texts, "b"))
+    run(f"{args.in_flight} in flight, retry", embedding_dispatcher.EmbeddingDispatcher(
+        embedder, max_in_flight=args.in_flight), texts(args.texts, "c"))
+    # A quota just under the request count: the burst runs out, the rest wait for refills
+    rpm = max(batches * 9 // 10, 1)
+    run(f"... + {rpm} req/min", embedding_dispatcher.EmbeddingDispatcher(
+        embedder, max_in_flight=args.in_flight, rpm=rpm), texts(args.texts, "d"))
+
+    # End to end: cluster a backlog under the same faults
+    seed(args.texts)
+    clustering.dispatcher = embedding_dispatcher.EmbeddingDispatcher(embedder, max_in_flight=args.in_flight)
+    db = SessionLocal()
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        started = time.perf_counter()
+        topics = clustering.run_clustering(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    unlinked = db.query(models.NewsItem).filter(models.NewsItem.topic_id == None).count()
+    db.close()
+
+    print(f"\n   run_clustering: {topics} topics, {unlinked} articles left unclustered, {elapsed:.2f}s")
+    print(f"   Dispatcher: {clustering.dispatcher.stats()}")
+    print(f"   Server: {fake_embedding_server.stats}")
+    _server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Choose EMBED_DIMENSIONS / EMBED_STORAGE_DTYPE from data
+- Takes full-size article embeddings from the embedding cache table
+  (--from-db) or generates synthetic ones with a Matryoshka-like spectrum
+- For each (dims, dtype) setting: stores every vector through
+  vector_codec, replays greedy clustering at SIMILARITY_THRESHOLD and
+  compares it with full-precision clustering
+- Reports bytes per stored vector, index memory, matching time per article,
+  decisions identical to full precision and the adjusted Rand index
+Run locally:        python3 bench_embedding_compression.py
+Run in Render Shell: python3 bench_embedding_compression.py --from-db --limit 3000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import clustering
+import vector_codec
+from topic_index import ExactTopicIndex
+
+
+def load_from_db(limit: int) -> np.ndarray:
+    from database import SessionLocal
+    from models import EmbeddingCacheEntry
+
+    db = SessionLocal()
+    try:
+        rows = db.query(EmbeddingCacheEntry.vector).filter(
+            EmbeddingCacheEntry.model == clustering.EMBED_MODEL
+        ).order_by(EmbeddingCacheEntry.id).limit(limit).all()
+    finally:
+        db.close()
+    return np.stack([np.frombuffer(blob, dtype=np.float32) for (blob,) in rows])
+
+
+def synthetic(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors whose variance decays along the dimensions, so a
+    prefix carries most of the signal (as with Matryoshka-trained models)."""
+    rng = np.random.default_rng(seed)
+    spectrum = 1 / np.sqrt(1 + np.arange(dims) / 64)
+    centres = rng.standard_normal((max(1, n // 6), dims)) * spectrum
+    picks = rng.integers(0, len(centres), n)
+    noise = rng.standard_normal((n, dims)) * spectrum * 0.6
+    return (centres[picks] + noise).astype(np.float32)
+
+
+def greedy(vectors: np.ndarray, threshold: float):
+    """Greedy single-pass clustering as run_clustering does it.
+    Returns (labels, seconds spent matching)."""
+    index = ExactTopicIndex(dims=vectors.shape[1])
+    labels = np.empty(len(vectors), dtype=np.int64)
+    matching = 0.0
+    for i, vec in enumerate(vectors):
+        started = time.perf_counter()
+        best, sim = index.search(vec)
+        matching += time.perf_counter() - started
+        if best is None or sim < threshold:
+            index.add(i, vec)
+            labels[i] = i
+        else:
+            labels[i] = best
+    return labels, matching
+
+
+def adjusted_rand(a: np.ndarray, b: np.ndarray) -> float:
+    _, a = np.unique(a, return_inverse=True)
+    _, b = np.unique(b, return_inverse=True)
+    table = np.zeros((a.max() + 1, b.max() + 1), dtype=np.int64)
+    np.add.at(table, (a, b), 1)
+
+    def pairs(x):
+        return (x * (x - 1) // 2).sum()
+
+    total = pairs(np.array([len(a)]))
+    both, rows, cols = pairs(table), pairs(table.sum(axis=1)), pairs(table.sum(axis=0))
+    expected = rows * cols / total
+    best = (rows + cols) / 2
+    return 1.0 if best == expected else float((both - expected) / (best - expected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--from-db", action="store_true", help="use cached real embeddings")
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--dims", type=int, nargs="+", default=[1024, 512, 256])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--threshold", type=float, default=clustering.SIMILARITY_THRESHOLD)
+    args = parser.parse_args()
+
+    full = load_from_db(args.limit) if args.from_db else synthetic(args.limit, 3072)
+    n, full_dims = full.shape
+
+    print("=" * 96)
+    print(f"🗜️  EMBEDDING COMPRESSION: {n} {'cached' if args.from_db else 'synthetic'} vectors, "
+          f"{full_dims} dims, threshold {args.threshold}")
+    print("=" * 96)
+    print(f"   {'setting':16} {'bytes/vec':>10} {'index MB':>9} {'match/article':>14} "
+          f"{'topics':>7} {'same decision':>14} {'ARI':>6}")
+
+    baseline, base_time = greedy(np.stack([clustering.compress_embedding(v, full_dims) for v in full]),
+                                 args.threshold)
+
+    for dims in [full_dims] + [d for d in args.dims if d < full_dims]:
+        for dtype in args.dtypes:
+            stored = [vector_codec.encode(clustering.compress_embedding(v, dims), dtype) for v in full]
+            vectors = np.stack([vector_codec.decode(b) for b in stored]).astype(np.float32)
+            labels, match_time = greedy(vectors, args.threshold)
+
+            topics = len(np.unique(labels))
+            same = np.mean(labels == baseline)
+            print(f"   {f'{dims} {dtype}':16} {len(stored[0]):10} {topics * dims * 4 / 1e6:9.2f} "
+                  f"{match_time / n * 1e3:11.3f} ms {topics:7} {same:14.3f} "
+                  f"{adjusted_rand(labels, baseline):6.3f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
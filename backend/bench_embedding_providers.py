@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Embedding providers side by side
+- Generates synthetic AI headlines + summaries: several rewrites of each
+  story (different wording, shared filler) so same-story and different-story
+  pairs can be told apart only by content
+- For each provider: throughput (texts/s), mean cosine of same-story and
+  different-story pairs, the best same-story cutoff (pair F1) next to the
+  provider's default threshold, and greedy clustering agreement with the
+  true stories (adjusted Rand index)
+- hashing runs without and with IDF (fitted on the same texts); onnx when EMBED_ONNX_MODEL_DIR is set up; openai
+  only with --openai (costs money)
+Run locally: python3 bench_embedding_providers.py --stories 300 --rewrites 4
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+import batch_recluster
+import embeddings
+import topic_index
+
+
+COMPANIES = ["OpenAI", "Anthropic", "Google DeepMind", "Meta", "Mistral", "Nvidia", "Microsoft",
+             "Apple", "Amazon", "Cohere", "Stability AI", "xAI", "Hugging Face", "IBM", "Baidu"]
+THINGS = ["reasoning model", "coding assistant", "image generator", "speech model", "robotics stack",
+          "inference chip", "agent framework", "vision transformer", "safety benchmark", "open dataset",
+          "video model", "search assistant", "translation model", "edge LLM", "fine-tuning API"]
+EVENTS = [
+    ["launches", "unveils", "releases", "rolls out"],
+    ["open-sources", "publishes weights for", "makes public"],
+    ["delays", "postpones", "pushes back"],
+    ["cuts prices for", "slashes pricing on", "lowers the cost of"],
+    ["faces lawsuit over", "is sued over", "hit with legal challenge over"],
+]
+FILLER = ["The announcement comes amid fierce competition in artificial intelligence.",
+          "Analysts say the move could reshape the machine learning market.",
+          "The company shared few technical details.",
+          "Developers reacted quickly on social media.",
+          "It follows a busy week of AI news."]
+
+
+def synthetic_stories(stories: int, rewrites: int, seed: int = 0):
+    """(texts, story label per text). Every story has its own product name,
+    as real coverage of one story shares names and figures."""
+    rng = random.Random(seed)
+    combos = [(c, t, e) for c in COMPANIES for t in THINGS for e in range(len(EVENTS))]
+    texts, labels = [], []
+    for story, (company, thing, event) in enumerate(rng.sample(combos, min(stories, len(combos)))):
+        product = "".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(3)).title()
+        version = rng.randint(2, 9)
+        for _ in range(rewrites):
+            verb = rng.choice(EVENTS[event])
+            title = rng.choice([f"{company} {verb} {product}, its {thing}",
+                                f"{company} {verb} {product} {version}",
+                                f"Report: {company} {verb} {thing} {product}"])
+            summary = f"{company} {verb} {product} {version}, a {thing}. {rng.choice(FILLER)}"
+            texts.append(f"{title}. {summary}")
+            labels.append(story)
+    return texts, np.array(labels)
+
+
+def pair_stats(X: np.ndarray, labels: np.ndarray, sample: int = 200000, seed: int = 0):
+    """Same/different-story cosine means and the cutoff with the best pair F1."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, len(X), sample)
+    b = rng.integers(0, len(X), sample)
+    # Rewrites of a story are adjacent: add every neighbouring same-story pair
+    neighbours = np.flatnonzero(labels[:-1] == labels[1:])
+    a = np.concatenate([a, neighbours])
+    b = np.concatenate([b, neighbours + 1])
+    keep = a != b
+    a, b = a[keep], b[keep]
+
+    sims = np.einsum("ij,ij->i", X[a], X[b])
+    same = labels[a] == labels[b]
+    best_t, best_f1 = None, -1.0
+    for t in np.arange(0.2, 0.96, 0.01):
+        predicted = sims >= t
+        tp = np.sum(predicted & same)
+        f1 = 2 * tp / max(1, predicted.sum() + same.sum())
+        if f1 > best_f1:
+            best_t, best_f1 = float(t), float(f1)
+    return float(sims[same].mean()), float(sims[~same].mean()), best_t, best_f1
+
+
+def run(embedder, texts, labels, batch: int):
+    started = time.perf_counter()
+    vectors = []
+    for start in range(0, len(texts), batch):
+        vectors.extend(embedder.embed(texts[start:start + batch]))
+    elapsed = time.perf_counter() - started
+    X = topic_index.normalize_rows(np.stack(vectors).astype(np.float32))
+
+    same, different, best_t, best_f1 = pair_stats(X, labels)
+    greedy = batch_recluster.greedy_labels(X, embedder.similarity_threshold)
+    ari = batch_recluster.adjusted_rand(greedy, labels)
+    print(f"   {embedder.model:26} {len(texts) / elapsed:9.0f} texts/s   dims {X.shape[1]:5}   "
+          f"same {same:.3f}  diff {different:.3f}   best cutoff {best_t:.2f} (F1 {best_f1:.3f})   "
+          f"default {embedder.similarity_threshold:.2f} → {len(np.unique(greedy))} topics, ARI {ari:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stories", type=int, default=300)
+    parser.add_argument("--rewrites", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=512)
+    parser.add_argument("--openai", action="store_true", help="also embed with the OpenAI API")
+    args = parser.parse_args()
+
+    texts, labels = synthetic_stories(args.stories, args.rewrites)
+    print("=" * 100)
+    print(f"🧬 EMBEDDING PROVIDERS: {len(texts)} texts, {args.stories} stories")
+    print("=" * 100)
+
+    plain = embeddings.HashingEmbedder(idf_path="")
+    fitted = embeddings.HashingEmbedder(idf_path="")
+    fitted.fit_idf(texts)
+    embedders = [plain, fitted]
+    if embeddings.ONNXEmbedder.available():
+        embedders.append(embeddings.make_embedder("onnx"))
+    if args.openai:
+        embedders.append(embeddings.make_embedder("openai"))
+    for embedder in embedders:
+        run(embedder, texts, labels, min(args.batch, embedder.max_batch_inputs or args.batch))
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Storage size and load time of topic embeddings: JSON text vs binary
+- Encodes --topics random 3072-dim vectors as JSON and in each binary dtype
+- Times decoding all of them, as run_clustering does for every article
+- Reports the worst cosine error introduced by float16/int8
+Run locally: python3 bench_embedding_storage.py --topics 50 --dims 3072
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import vector_codec
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--dims", type=int, default=3072)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.topics, args.dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    print("=" * 72)
+    print(f"💾 EMBEDDING STORAGE: {args.topics} topics × {args.dims} dims")
+    print("=" * 72)
+
+    blobs = [json.dumps(v.tolist()) for v in vectors]
+    json_bytes = sum(len(b) for b in blobs) / args.topics
+    json_time = timed(lambda: [json.loads(b) for b in blobs], args.repeat)
+    print(f"   {'json':8} {json_bytes / 1024:7.1f} KB/topic   load {json_time * 1000:8.3f} ms")
+
+    for dtype in ("float32", "float16", "int8"):
+        encoded = [vector_codec.encode(v, dtype) for v in vectors]
+        size = sum(len(b) for b in encoded) / args.topics
+        load = timed(lambda: [vector_codec.decode(b) for b in encoded], args.repeat)
+
+        decoded = np.stack([vector_codec.decode(b) for b in encoded]).astype(np.float32)
+        cos = (decoded * vectors).sum(axis=1) / np.linalg.norm(decoded, axis=1)
+        print(f"   {dtype:8} {size / 1024:7.1f} KB/topic   load {load * 1000:8.3f} ms"
+              f"   ({json_bytes / size:4.1f}x smaller, {json_time / load:6.0f}x faster,"
+              f" max cos error {1 - cos.min():.1e})")
+    print()
+
+
+if __name__ == "__main__":
+    main()
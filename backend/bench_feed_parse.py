@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark full feedparser parsing vs bounded streaming parsing
+- Generates multi-megabyte RSS and Atom fixture feeds (arXiv-sized)
+- Parses each in both modes, keeping MAX_ENTRIES_PER_SOURCE entries
+- Reports wall time and peak Python memory (tracemalloc)
+Run locally: python3 bench_feed_parse.py --entries 2000
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+import feed_stream
+import fetcher
+
+
+def build_rss(entries: int, body_chars: int) -> bytes:
+    body = ("Transformer models for reasoning over long contexts. " * (body_chars // 54 + 1))[:body_chars]
+    items = "".join(
+        f"<item><title>Paper {i}: scaling laws for LLM agents</title>"
+        f"<link>https://arxiv.org/abs/2401.{i:05d}</link>"
+        f"<description>&lt;p&gt;{body}&lt;/p&gt;</description>"
+        f"<content:encoded><![CDATA[<p>{body}</p>]]></content:encoded></item>"
+        for i in range(entries)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f"<channel><title>cs.AI</title>{items}</channel></rss>"
+    ).encode()
+
+
+def build_atom(entries: int, body_chars: int) -> bytes:
+    body = ("Diffusion models and neural rendering benchmarks. " * (body_chars // 51 + 1))[:body_chars]
+    items = "".join(
+        f"<entry><title>Post {i}: new diffusion model</title>"
+        f'<link rel="alternate" href="https://example.com/post/{i}"/>'
+        f"<summary>{body}</summary>"
+        f'<content type="html">&lt;p&gt;{body}&lt;/p&gt;</content></entry>'
+        for i in range(entries)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Blog</title>{items}</feed>'
+    ).encode()
+
+
+def parse_full(payload: bytes):
+    return fetcher.parse_feed(payload)
+
+
+def parse_streaming(payload: bytes):
+    stream = io.BytesIO(payload)
+    chunks = iter(lambda: stream.read(feed_stream.CHUNK_SIZE), b"")
+    return list(feed_stream.stream_entries(chunks, fetcher.MAX_ENTRIES_PER_SOURCE))
+
+
+def measure(fn, payload):
+    tracemalloc.start()
+    started = time.perf_counter()
+    entries = fn(payload)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return entries, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--body-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    fixtures = {
+        "RSS 2.0": build_rss(args.entries, args.body_chars),
+        "Atom": build_atom(args.entries, args.body_chars),
+    }
+
+    print("=" * 70)
+    print(f"📄 FEED PARSE BENCHMARK (cap = {fetcher.MAX_ENTRIES_PER_SOURCE} entries)")
+    print("=" * 70)
+
+    for name, payload in fixtures.items():
+        print(f"\n   {name}: {args.entries} entries, {len(payload) / 1e6:.1f} MB")
+
+        full, full_time, full_peak = measure(parse_full, payload)
+        stream, stream_time, stream_peak = measure(parse_streaming, payload)
+
+        print(f"      feedparser: {full_time * 1000:8.1f} ms   peak {full_peak / 1e6:7.1f} MB")
+        print(f"      streaming:  {stream_time * 1000:8.1f} ms   peak {stream_peak / 1e6:7.1f} MB")
+        print(f"      speedup {full_time / stream_time:.0f}x, memory {full_peak / stream_peak:.0f}x lower")
+
+        def cleaned(entries):
+            return [
+                (e["link"], e["title"], fetcher.clean_html(e["summary"]),
+                 [fetcher.clean_html(c) for c in e["content"]])
+                for e in entries
+            ]
+
+        print(f"      same {len(stream)} entries after clean_html: {cleaned(full) == cleaned(stream)}")
+
+    print()
+
+
+if __name__ == "__main__":
+    main()
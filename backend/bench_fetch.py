@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs concurrent feed fetching
+- Serves N stub RSS feeds from a local server with injected latency
+- Runs fetch_and_store_news in both modes against a throwaway SQLite DB
+Run locally: python3 bench_fetch.py --feeds 40 --max-latency 2.0
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Point the app at a throwaway database and feed archive BEFORE importing it
+_TMP_DIR = tempfile.mkdtemp()
+_DB_FILE = os.path.join(_TMP_DIR, "bench_fetch.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["FEED_ARCHIVE_DIR"] = os.path.join(_TMP_DIR, "feed_archive")
+
+from database import SessionLocal, engine
+import models
+import fetcher
+
+
+VOCAB = (
+    "model agent benchmark release weights training inference gpu cluster "
+    "reasoning safety evaluation dataset tokens context latency api pricing "
+    "robotics vision speech diffusion transformer startup funding research"
+).split()
+
+
+def build_feed(feed_id: int, items: int) -> bytes:
+    # Distinct wording per item so the near-duplicate filter keeps them all
+    rng = random.Random(feed_id)
+
+    def words(n):
+        return " ".join(f"{rng.choice(VOCAB)}{rng.randint(0, 999)}" for _ in range(n))
+
+    entries = "".join(
+        f"<item><title>New AI {words(6)}</title>"
+        f"<link>http://stub/{feed_id}/{i}</link>"
+        f"<description>A machine learning study on {words(25)}</description></item>"
+        for i in range(items)
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel>'
+        f"<title>Stub {feed_id}</title>{entries}</channel></rss>"
+    ).encode()
+
+
+def start_stub_server(latencies: dict, items: int):
+    feeds = {fid: build_feed(fid, items) for fid in latencies}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            fid = int(self.path.strip("/").split("/")[0])
+            time.sleep(latencies[fid])
+            body = feeds[fid]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset_db(port: int, feed_ids):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    # Spread feeds over a few "hosts" so the per-host limit is exercised
+    hosts = ["127.0.0.1", "localhost"]
+    for fid in feed_ids:
+        host = hosts[fid % len(hosts)]
+        db.add(models.Source(name=f"Stub {fid}", url=f"http://{host}:{port}/{fid}", type="rss"))
+    db.commit()
+    db.close()
+
+
+def run(mode_concurrent: bool, port: int, feed_ids, args) -> float:
+    reset_db(port, feed_ids)
+    db = SessionLocal()
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        started = time.perf_counter()
+        saved = fetcher.fetch_and_store_news(
+            db,
+            concurrent=mode_concurrent,
+            max_workers=args.workers,
+            per_host=args.per_host,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+        db.close()
+    print(f"   {'concurrent' if mode_concurrent else 'sequential':10}  {elapsed:6.2f}s  ({saved} items saved)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--feeds", type=int, default=40)
+    parser.add_argument("--items", type=int, default=25)
+    parser.add_argument("--max-latency", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=fetcher.FETCH_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=32)
+    args = parser.parse_args()
+
+    random.seed(7)
+    latencies = {fid: random.uniform(0.05, args.max_latency) for fid in range(args.feeds)}
+    server = start_stub_server(latencies, args.items)
+    port = server.server_address[1]
+
+    print("=" * 60)
+    print("📡 FEED FETCH BENCHMARK")
+    print("=" * 60)
+    print(f"   Feeds: {args.feeds}   Items/feed: {args.items}")
+    print(f"   Sum of latencies:  {sum(latencies.values()):6.2f}s")
+    print(f"   Slowest feed:      {max(latencies.values()):6.2f}s")
+    print(f"   Workers: {args.workers}   Per-host limit: {args.per_host}\n")
+
+    sequential = run(False, port, latencies, args)
+    concurrent = run(True, port, latencies, args)
+
+    print(f"\n   Speedup: {sequential / concurrent:.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
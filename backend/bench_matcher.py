@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled keyword matcher against the old per-pattern filters
+- Builds a large synthetic corpus of titles/summaries
+- Checks that every accept/reject decision is identical
+- Reports the time per corpus for old vs new filters
+Run locally: python3 bench_matcher.py --docs 20000
+"""
+
+import argparse
+import random
+import re
+import time
+
+import fetcher
+import relevance
+
+
+# ------------------------------------------------------
+# ORIGINAL IMPLEMENTATIONS (one re.search per pattern)
+# ------------------------------------------------------
+
+def legacy_matches_any(patterns, text):
+    return any(re.search(p, text, re.IGNORECASE) for p in patterns)
+
+
+def legacy_is_ai_related(title, summary):
+    if not title:
+        return False
+    title_l = title.lower()
+    summary_l = summary.lower()
+    if legacy_matches_any(fetcher.EXCLUDE_PATTERNS, title_l + " " + summary_l):
+        return False
+    if any(k in title_l for k in fetcher.TITLE_KEYWORDS):
+        return True
+    if legacy_matches_any(fetcher.AI_KEYWORDS, summary_l):
+        return True
+    return False
+
+
+def legacy_contains_ai_keyword(text):
+    text = text.lower()
+    for kw in relevance.AI_KEYWORDS:
+        if re.search(rf'\b{re.escape(kw)}\b', text):
+            return True
+    return False
+
+
+def legacy_is_meta(text):
+    text = text.lower()
+    return any(p in text for p in relevance.NON_NEWS_PATTERNS)
+
+
+# ------------------------------------------------------
+# SYNTHETIC CORPUS
+# ------------------------------------------------------
+
+FILLER = (
+    "the company said on tuesday that its quarterly results beat estimates "
+    "while analysts expect further growth in cloud revenue and new product "
+    "lines across several markets including europe and asia"
+).split()
+
+SIGNALS = (
+    fetcher.TITLE_KEYWORDS
+    + [p.replace(r"\b", "") for p in fetcher.AI_KEYWORDS]
+    + sorted(relevance.AI_KEYWORDS)
+    + ["hiring", "salary", "who's hiring", "monthly thread", "reddit", "self-promotion"]
+    + ["maiden", "email", "gpuless", "remodel"]  # near-misses for word boundaries
+)
+
+
+def make_doc(rng):
+    def sentence(n):
+        words = [rng.choice(FILLER) for _ in range(n)]
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SIGNALS))
+        return " ".join(words)
+
+    title = sentence(rng.randint(4, 12)).capitalize()
+    summary = sentence(rng.randint(40, 160))
+    return title, summary
+
+
+def timed(fn, docs):
+    started = time.perf_counter()
+    decisions = [fn(t, s) for t, s in docs]
+    return time.perf_counter() - started, decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = [make_doc(rng) for _ in range(args.docs)]
+
+    checks = [
+        ("fetcher.is_ai_related", legacy_is_ai_related, fetcher.is_ai_related),
+        ("relevance.contains_ai_keyword",
+         lambda t, s: legacy_contains_ai_keyword(f"{t}. {s}"),
+         lambda t, s: relevance.contains_ai_keyword(f"{t}. {s}")),
+        ("relevance.is_meta_or_non_ai_thread",
+         lambda t, s: legacy_is_meta(f"{t}. {s}"),
+         lambda t, s: relevance.is_meta_or_non_ai_thread(f"{t}. {s}")),
+    ]
+
+    print("=" * 70)
+    print(f"🔎 KEYWORD MATCHER BENCHMARK ({args.docs} docs)")
+    print("=" * 70)
+
+    for name, legacy, compiled in checks:
+        old_time, old_decisions = timed(legacy, docs)
+        new_time, new_decisions = timed(compiled, docs)
+        mismatches = sum(a != b for a, b in zip(old_decisions, new_decisions))
+        accepted = sum(new_decisions)
+
+        print(f"\n   {name}")
+        print(f"      per-pattern: {old_time * 1000:8.1f} ms")
+        print(f"      compiled:    {new_time * 1000:8.1f} ms   ({old_time / new_time:.1f}x)")
+        print(f"      accepted:    {accepted}/{len(docs)}   mismatches: {mismatches}")
+
+        if mismatches:
+            raise SystemExit(f"❌ {name}: decisions differ from the original filter")
+
+    print("\n✅ Identical accept/reject decisions\n")
+
+
+if __name__ == "__main__":
+    main()
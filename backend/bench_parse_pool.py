@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the parse/clean/filter stage of the fetcher
+- Loads a recorded corpus of raw feed bodies (*.xml / *.rss / *.atom in
+  --corpus) or generates a synthetic one
+- Runs fetcher.prepare_result inline, then on process pools of growing size
+- Reports feeds/s and entries/s for each worker count
+Run locally: python3 bench_parse_pool.py --corpus ./feeds --workers 1 2 4 8
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import fetcher
+from bench_feed_parse import build_atom, build_rss
+
+
+def load_corpus(path: str, synthetic: int) -> list:
+    if path:
+        files = sorted(
+            f for ext in ("xml", "rss", "atom")
+            for f in glob.glob(os.path.join(path, f"*.{ext}"))
+        )
+        return [open(f, "rb").read() for f in files]
+
+    # Synthetic: mix of RSS and Atom feeds with long content:encoded bodies
+    return [
+        build_rss(60, 4000) if i % 2 else build_atom(60, 4000)
+        for i in range(synthetic)
+    ]
+
+
+def make_result(i: int, payload: bytes) -> dict:
+    """Shape of a successful fetcher.download_feed() result."""
+    return {
+        "source": {"id": i, "name": f"feed-{i}", "url": ""},
+        "status": 200, "content": payload, "entries": None,
+        "error": None, "unchanged": False,
+        "etag": None, "last_modified": None, "content_hash": None, "elapsed": 0.0,
+    }
+
+
+def run_inline(payloads):
+    return [fetcher.prepare_result(make_result(i, p)) for i, p in enumerate(payloads)]
+
+
+def run_pool(payloads, workers):
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        # Warm the workers so process start-up isn't counted
+        list(pool.map(fetcher.needs_parsing, [make_result(0, b"")] * workers))
+        started = time.perf_counter()
+        results = list(pool.map(fetcher.prepare_result,
+                                [make_result(i, p) for i, p in enumerate(payloads)]))
+        return results, time.perf_counter() - started
+
+
+def report(label, results, elapsed, baseline=None):
+    entries = sum(r.get("entry_count", 0) for r in results)
+    line = f"   {label:12} {elapsed:7.2f}s  {len(results) / elapsed:8.1f} feeds/s  {entries / elapsed:9.0f} entries/s"
+    if baseline:
+        line += f"   ({baseline / elapsed:.1f}x)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=None, help="directory of recorded feed bodies")
+    parser.add_argument("--synthetic", type=int, default=80, help="feeds to generate without --corpus")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    payloads = load_corpus(args.corpus, args.synthetic)
+    size_mb = sum(len(p) for p in payloads) / 1e6
+
+    print("=" * 70)
+    print(f"⚙️  PARSE POOL BENCHMARK: {len(payloads)} feeds, {size_mb:.1f} MB, {os.cpu_count()} cores")
+    print("=" * 70)
+
+    started = time.perf_counter()
+    inline = run_inline(payloads)
+    baseline = time.perf_counter() - started
+    report("inline", inline, baseline)
+
+    for workers in sorted(set(args.workers)):
+        results, elapsed = run_pool(payloads, workers)
+        report(f"{workers} workers", results, elapsed, baseline)
+
+        same = [r["candidates"] and [c["url"] for c in r["candidates"]] for r in results] == \
+               [r["candidates"] and [c["url"] for c in r["candidates"]] for r in inline]
+        if not same:
+            raise SystemExit("❌ Pool results differ from inline results")
+
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Exact vs IVF topic index at large topic counts
+- Builds both backends over N synthetic topics (clustered, like real news)
+- Queries with noisy copies of stored topics (a story resurfacing) and
+  with unrelated vectors
+- Reports per-query latency, recall@1 against exact search (resurfacing
+  stories), and how often the approximate index changes the
+  assign/create decision at the clustering threshold
+- Round-trips the IVF index through save/load and checks deletes
+Run locally: python3 bench_topic_ann.py --topics 10000 100000 --dims 256
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import topic_index
+
+THRESHOLD = 0.65  # clustering.SIMILARITY_THRESHOLD
+
+
+def synthetic_topics(n: int, dims: int, rng):
+    centres = rng.standard_normal((max(1, n // 20), dims)).astype(np.float32)
+    picks = rng.integers(0, len(centres), n)
+    return centres[picks] + rng.standard_normal((n, dims)).astype(np.float32) * 0.8
+
+
+def queries_for(topics, count: int, rng):
+    """Half resurfacing stories (noisy copies of topics), half unrelated."""
+    half = count // 2
+    picks = rng.integers(0, len(topics), half)
+    noisy = topics[picks] + rng.standard_normal((half, topics.shape[1])).astype(np.float32) * 0.6
+    unrelated = rng.standard_normal((count - half, topics.shape[1])).astype(np.float32)
+    return np.concatenate([noisy, unrelated])
+
+
+def timed_search(index, queries):
+    started = time.perf_counter()
+    results = [index.search(q) for q in queries]
+    return results, (time.perf_counter() - started) / len(queries)
+
+
+def run(n: int, args, rng):
+    topics = synthetic_topics(n, args.dims, rng)
+    queries = queries_for(topics, args.queries, rng)
+    ids = list(range(n))
+
+    exact = topic_index.make_index("exact", dims=args.dims)
+    exact.add_many(ids, topics)
+
+    started = time.perf_counter()
+    ivf = topic_index.make_index("ivf", dims=args.dims, nprobe=args.nprobe, train_min=min(n, 5000))
+    ivf.add_many(ids, topics)
+    build = time.perf_counter() - started
+
+    truth, exact_time = timed_search(exact, queries)
+    approx, ivf_time = timed_search(ivf, queries)
+
+    # recall@1 on resurfacing stories (unrelated queries have no meaningful neighbour)
+    half = len(queries) // 2
+    recall = np.mean([a[0] == t[0] for a, t in zip(approx[:half], truth[:half])])
+    decisions = np.mean([(a[1] >= THRESHOLD) == (t[1] >= THRESHOLD) for a, t in zip(approx, truth)])
+    lists = len(ivf.lists)
+    print(f"   {n:7}  exact {exact_time * 1e3:7.3f} ms   ivf {ivf_time * 1e3:6.3f} ms "
+          f"({exact_time / ivf_time:5.1f}x)   recall@1 {recall:.3f}   "
+          f"same decision {decisions:.3f}   [{lists} lists, nprobe {ivf.nprobe}, built {build:.1f}s]")
+
+    # Persistence + deletes
+    path = os.path.join(tempfile.mkdtemp(), "topics.npz")
+    ivf.save(path)
+    loaded = topic_index.load_index(path)
+    assert len(loaded) == n and [loaded.search(q)[0] for q in queries[:50]] == [a[0] for a in approx[:50]]
+
+    for topic_id in ids[:100]:
+        loaded.delete(topic_id)
+    assert all(loaded.search(topics[i])[0] != i for i in range(100))
+    loaded.add(ids[0], topics[0])
+    assert loaded.search(topics[0])[0] == ids[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--topics", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--nprobe", type=int, default=topic_index.IVF_NPROBE)
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"🔎 TOPIC INDEX: exact vs IVF, {args.dims} dims, {args.queries} queries")
+    print("=" * 100)
+    rng = np.random.default_rng(0)
+    for n in args.topics:
+        run(n, args, rng)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Topic matching: per-pair Python loop vs the exact topic index matrix
+- Replays greedy clustering of synthetic article vectors both ways and
+  checks every assign/create decision is identical
+- Times matching one article against growing topic counts
+Run locally: python3 bench_topic_index.py --articles 1000 --dims 3072
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from clustering import SIMILARITY_THRESHOLD, cosine_sim
+from topic_index import ExactTopicIndex
+
+OLD_WINDOW = 50  # the former clustering.MAX_RECENT_TOPICS
+
+
+def synthetic_articles(n: int, dims: int, stories: int, seed: int = 0):
+    """Articles scattered around `stories` centres, so some match and some don't."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((stories, dims))
+    picks = rng.integers(0, stories, n)
+    noise = rng.standard_normal((n, dims)) * 0.65
+    return (centres[picks] + noise).astype(np.float32)
+
+
+def greedy_loop(articles, window):
+    """The old run_clustering matching: newest-first loop over recent topics."""
+    topics, decisions = [], []
+    for vec in articles:
+        vec = vec.tolist()
+        best, best_sim = None, 0
+        for tid in range(len(topics) - 1, max(-1, len(topics) - 1 - window), -1):
+            sim = cosine_sim(vec, topics[tid])
+            if sim > best_sim and sim >= SIMILARITY_THRESHOLD:
+                best, best_sim = tid, sim
+        if best is None:
+            topics.append(vec)
+            decisions.append(("new", len(topics) - 1))
+        else:
+            decisions.append(("add", best))
+    return decisions
+
+
+def greedy_index(articles, window):
+    index = ExactTopicIndex(dims=articles.shape[1], window=window)
+    decisions = []
+    for vec in articles:
+        best, sim = index.search(vec) if len(index) else (None, 0.0)
+        if best is None or sim < SIMILARITY_THRESHOLD:
+            index.add(len(index), vec)
+            decisions.append(("new", len(index) - 1))
+        else:
+            decisions.append(("add", best))
+    return decisions
+
+
+def per_article_cost(dims, topic_counts, queries=200):
+    rng = np.random.default_rng(1)
+    probe = rng.standard_normal((queries, dims)).astype(np.float32)
+    print(f"\n   {'topics':>7} {'python loop':>14} {'index':>12} {'index batch':>14}")
+    for n in topic_counts:
+        topics = rng.standard_normal((n, dims)).astype(np.float32)
+        index = ExactTopicIndex(dims=dims)
+        for i, t in enumerate(topics):
+            index.add(i, t)
+        topic_lists = [t.tolist() for t in topics]
+
+        q = probe[:max(1, min(queries, 20000 // n))]
+        started = time.perf_counter()
+        for v in q:
+            vl = v.tolist()
+            max(cosine_sim(vl, t) for t in topic_lists)
+        loop = (time.perf_counter() - started) / len(q)
+
+        started = time.perf_counter()
+        for v in probe:
+            index.search(v)
+        single = (time.perf_counter() - started) / len(probe)
+
+        started = time.perf_counter()
+        index.search_batch(probe)
+        batch = (time.perf_counter() - started) / len(probe)
+
+        print(f"   {n:7} {loop * 1e3:11.3f} ms {single * 1e3:9.3f} ms {batch * 1e3:11.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--dims", type=int, default=3072)
+    parser.add_argument("--stories", type=int, default=150)
+    parser.add_argument("--topics", type=int, nargs="+", default=[50, 200, 1000, 5000])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"🧲 TOPIC INDEX BENCHMARK: {args.articles} articles, {args.dims} dims")
+    print("=" * 60)
+
+    articles = synthetic_articles(args.articles, args.dims, args.stories)
+    for window in (OLD_WINDOW, None):
+        started = time.perf_counter()
+        old = greedy_loop(articles, window or len(articles))
+        loop_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        new = greedy_index(articles, window)
+        index_time = time.perf_counter() - started
+
+        same = sum(a == b for a, b in zip(old, new))
+        created = sum(d[0] == "new" for d in new)
+        print(f"   window={str(window):5} loop {loop_time:6.2f}s  index {index_time:6.2f}s  "
+              f"decisions identical: {same}/{len(new)}  ({created} topics)")
+        if same != len(new):
+            raise SystemExit("❌ Index decisions differ from the Python loop")
+
+    per_article_cost(args.dims, args.topics)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Incremental topic maintenance vs a full batch recluster
+- Seeds synthetic stories (bench_embedding_providers) into a throwaway
+  SQLite DB and clusters them with the local hashing provider (IDF fitted
+  on the same texts)
+- Damages the result the way greedy assignment does: splits some topics
+  into duplicates and glues some unrelated pairs together, flagging only
+  those topics as changed
+- Runs topic_maintenance.maintain and reports time, SQL statements and
+  agreement with the true stories (adjusted Rand), then a second pass
+  (nothing changed) and a full batch_recluster for comparison
+Run locally: python3 bench_topic_maintenance.py --stories 500 --damage 0.2
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Throwaway database, offline embeddings, no persisted index — BEFORE importing the app
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_maintenance.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["EMBED_PROVIDER"] = "hashing"
+os.environ["EMBED_HASHING_IDF"] = ""
+os.environ["TOPIC_INDEX_PATH"] = ""
+
+import numpy as np
+from sqlalchemy import event, update
+
+from database import SessionLocal, engine
+import models
+import clustering
+import batch_recluster
+import topic_index
+import topic_maintenance
+import topic_stats
+from bench_embedding_providers import synthetic_stories
+
+
+counters = {"statements": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters["statements"] += 1
+
+
+def seed(texts: list):
+    """One article per text, in story order (ids follow the labels)."""
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(models.Source(name="Bench", url="http://bench", type="rss"))
+    db.commit()
+    for i, text in enumerate(texts):
+        title, summary = text.split(". ", 1)
+        db.add(models.NewsItem(title=title, summary=summary, url=f"http://bench/{i}", source_id=1))
+    db.commit()
+    db.close()
+
+
+def quiet(fn, *args):
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        return fn(*args)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+
+def labels_of(db) -> np.ndarray:
+    """Topic label of every clustered article, in id order (= story order)."""
+    rows = db.query(models.NewsItem.topic_id).filter(
+        models.NewsItem.topic_id != None
+    ).order_by(models.NewsItem.id).all()
+    return batch_recluster.compact(np.array([topic_id for (topic_id,) in rows]))
+
+
+def clustered_positions(db) -> np.ndarray:
+    """Positions in the corpus of the articles clustering takes (relevance filter)."""
+    ids = db.query(models.NewsItem.id).filter(models.NewsItem.relevant == True).order_by(models.NewsItem.id)
+    return np.array([article_id - 1 for (article_id,) in ids], dtype=np.int64)
+
+
+def centroid_of(db, article_ids):
+    blobs = db.query(models.NewsItem.embedding).filter(models.NewsItem.id.in_(article_ids))
+    return topic_index.normalize(sum(clustering.deserialize_embedding(b) for (b,) in blobs))
+
+
+def damage(db, share: float, rng: random.Random) -> int:
+    """Split `share` of the multi-article topics in two and glue as many unrelated
+    pairs together; only those topics are flagged as changed. Returns topics touched."""
+    db.query(models.Topic).update({"maintenance_pending": False})
+    members = {}
+    for article_id, topic_id in db.query(models.NewsItem.id, models.NewsItem.topic_id).filter(
+        models.NewsItem.topic_id.isnot(None), models.NewsItem.relevant == True
+    ):
+        members.setdefault(topic_id, []).append(article_id)
+    multi = [t for t, ids in members.items() if len(ids) >= 4]
+    rng.shuffle(multi)
+    k = int(len(multi) * share)
+    to_split, to_glue = multi[:k], multi[k:k + 2 * (k // 2)]
+    changed = set()
+
+    for topic_id in to_split:
+        moved = members[topic_id][len(members[topic_id]) // 2:]
+        kept = members[topic_id][:len(members[topic_id]) // 2]
+        duplicate = models.Topic(title=f"duplicate of {topic_id}", summary="",
+                                 embedding=clustering.serialize_embedding(centroid_of(db, moved)),
+                                 centroid_count=len(moved), maintenance_pending=True)
+        db.add(duplicate)
+        db.flush()
+        db.execute(update(models.NewsItem), [{"id": a, "topic_id": duplicate.id} for a in moved])
+        db.execute(update(models.Topic), [{"id": topic_id, "centroid_count": len(kept), "maintenance_pending": True,
+                                           "embedding": clustering.serialize_embedding(centroid_of(db, kept))}])
+        changed |= {topic_id, duplicate.id}
+
+    for a, b in zip(to_glue[::2], to_glue[1::2]):
+        db.execute(update(models.NewsItem), [{"id": i, "topic_id": a} for i in members[b]])
+        glued = members[a] + members[b]
+        db.execute(update(models.Topic), [{"id": a, "centroid_count": len(glued), "maintenance_pending": True,
+                                           "embedding": clustering.serialize_embedding(centroid_of(db, glued))}])
+        db.query(models.TopicSource).filter(models.TopicSource.topic_id == b).delete()
+        db.query(models.Topic).filter(models.Topic.id == b).delete()
+        changed.add(a)
+
+    db.commit()
+    quiet(topic_stats.reconcile, db)
+    return len(changed)
+
+
+def timed(db, fn):
+    before = counters["statements"]
+    started = time.perf_counter()
+    result = quiet(fn, db)
+    return result, time.perf_counter() - started, counters["statements"] - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stories", type=int, default=500)
+    parser.add_argument("--rewrites", type=int, default=4)
+    parser.add_argument("--damage", type=float, default=0.2, help="share of topics split / glued")
+    args = parser.parse_args()
+    if args.stories < 1 or args.rewrites < 1:
+        parser.error("--stories and --rewrites must be at least 1")
+
+    texts, reference = synthetic_stories(args.stories, args.rewrites)
+    # IDF fitted on the corpus, as fit_hashing_idf.py does; the thresholds
+    # derived from the embedder at import follow it
+    clustering.embedder.fit_idf(texts)
+    clustering.EMBED_MODEL = clustering.embedder.model
+    clustering.SIMILARITY_THRESHOLD = clustering.embedder.similarity_threshold
+    topic_maintenance.MERGE_THRESHOLD = min(clustering.SIMILARITY_THRESHOLD + 0.1, 0.95)
+    topic_maintenance.SPLIT_COHESION = clustering.SIMILARITY_THRESHOLD
+
+    seed(texts)
+    db = SessionLocal()
+    try:
+        quiet(clustering.run_clustering, db)
+        reference = reference[clustered_positions(db)]
+        print("=" * 72)
+        print(f"🧹 TOPIC MAINTENANCE: {len(reference)} AI articles, {len(np.unique(reference))} stories, "
+              f"merge ≥ {topic_maintenance.MERGE_THRESHOLD:.2f}")
+        print("=" * 72)
+        print(f"   greedy clustering  {db.query(models.Topic).count():5} topics  ARI vs stories "
+              f"{batch_recluster.adjusted_rand(reference, labels_of(db)):.3f}")
+        touched = damage(db, args.damage, random.Random(11))
+        damaged = labels_of(db)
+        topics_damaged = db.query(models.Topic).count()
+
+        print(f"   damaged ({touched:3})      {topics_damaged:5} topics  ARI vs stories "
+              f"{batch_recluster.adjusted_rand(reference, damaged):.3f}")
+
+        stats, elapsed, statements = timed(db, topic_maintenance.maintain)
+        print(f"   maintain           {db.query(models.Topic).count():5} topics  ARI vs stories "
+              f"{batch_recluster.adjusted_rand(reference, labels_of(db)):.3f}  "
+              f"{elapsed:6.2f}s  {statements:5} statements")
+        print(f"      {stats}")
+
+        stats, elapsed, statements = timed(db, topic_maintenance.maintain)
+        print(f"   maintain again     {stats['examined']:5} examined      {elapsed:6.2f}s  {statements:5} statements")
+
+        _, elapsed, statements = timed(db, batch_recluster.batch_recluster)
+        print(f"   batch recluster    {db.query(models.Topic).count():5} topics  ARI vs stories "
+              f"{batch_recluster.adjusted_rand(reference, labels_of(db)):.3f}  "
+              f"{elapsed:6.2f}s  {statements:5} statements")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
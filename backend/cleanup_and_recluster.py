@@ -7,8 +7,11 @@ Complete cleanup and re-clustering script
 Run in Render Shell: python3 cleanup_and_recluster.py
 """
 
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+import migrate
+import topic_stats
+import relevance
 import clustering
 
 def main():
@@ -16,6 +19,9 @@ def main():
     print("🧹 COMPLETE DATABASE CLEANUP & RE-CLUSTERING")
     print("=" * 70)
     
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Step 1: Show initial state
@@ -64,12 +70,12 @@ def main():
             
             # Also remove if it doesn't contain AI keywords
             if not should_remove:
-                if not clustering.contains_ai_keyword(text):
+                if not relevance.contains_ai_keyword(text):
                     should_remove = True
             
             # Remove meta/reddit threads
             if not should_remove:
-                if clustering.is_meta_or_non_ai_thread(text):
+                if relevance.is_meta_or_non_ai_thread(text):
                     should_remove = True
             
             if should_remove:
@@ -87,6 +93,7 @@ def main():
         db.commit()
         print(f"   ✅ Cleared all topic assignments")
         
+        topic_stats.clear(db)
         deleted_topics = db.query(models.Topic).delete()
         db.commit()
         print(f"   ✅ Deleted {deleted_topics} old topics")
@@ -139,7 +146,7 @@ def main():
         ).limit(10).all()
         
         for i, topic in enumerate(top_topics, 1):
-            article_count = db.query(models.NewsItem).filter_by(topic_id=topic.id).count()
+            article_count = topic.article_count or 0
             title_short = topic.title[:55] + "..." if len(topic.title) > 55 else topic.title
             print(f"   {i:2}. [{article_count} articles] {title_short}")
         
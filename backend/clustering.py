@@ -1,122 +1,213 @@
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
-from openai import OpenAI
 import numpy as np
 import models
+import embedding_cache
+import embeddings
+import embedding_dispatcher
+import vector_codec
+import topic_index
+import topic_stats
+import popularity
+import relevance
+from embedding_cache import EMBED_CACHE_ENABLED
 import math
+import os
 import re
-import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 # -------------------------------
 # CONFIG
 # -------------------------------
 
-client = OpenAI()
-
-EMBED_MODEL = "text-embedding-3-large"
-SIMILARITY_THRESHOLD = 0.65        # lower threshold for better grouping of diverse articles
-MAX_RECENT_TOPICS = 50  # Increased to check against more existing topics
+# Embedding provider (embeddings.py): EMBED_PROVIDER=openai | hashing | onnx | local
+embedder = embeddings.make_embedder()
+EMBED_MODEL = embedder.model
+# Concurrent, rate-limited, retrying requests (embedding_dispatcher.py)
+dispatcher = embedding_dispatcher.EmbeddingDispatcher(embedder)
+
+# Same-story cutoff; the default depends on the provider's vector space
+# (0.65 for OpenAI — low enough to group diverse articles)
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0")) or embedder.similarity_threshold
+# Articles are matched against ALL topics through a search index
+# (topic_index.py), persisted between runs at TOPIC_INDEX_PATH ("" = off)
+TOPIC_INDEX_PATH = os.getenv(
+    "TOPIC_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_data", "topic_index.npz")
+)
+# Topic vectors are running centroids of their articles. CENTROID_DECAY > 0
+# weights each new article by at least that much (exponential recency);
+# 0 = plain mean.
+CENTROID_DECAY = float(os.getenv("CENTROID_DECAY", "0"))
+# A loaded index also re-reads topics written this long before its sync
+# time (writes still committing, small clock differences)
+INDEX_SYNC_MARGIN = timedelta(minutes=5)
+# Writes: "batched" collects decisions in memory and flushes them in bulk,
+# one transaction per CLUSTER_FLUSH_CHUNK articles; "per-article" commits
+# after every decision (the original path)
+CLUSTER_WRITE_MODE = os.getenv("CLUSTER_WRITE_MODE", "batched")
+CLUSTER_FLUSH_CHUNK = int(os.getenv("CLUSTER_FLUSH_CHUNK", "500"))
 DEBUG_CLUSTERING = True  # Enable debugging output
 
-# Strong AI-only detection
-AI_KEYWORDS = {
-    "ai", "artificial intelligence",
-    "machine learning", "ml",
-    "deep learning", "neural", "neural network",
-    "robotics", "computer vision",
-    "nlp", "transformer", "rag",
-    "llm", "large language model",
-    "chatgpt", "gpt", "openai",
-    "anthropic", "meta ai", "google ai",
-}
-
-# Patterns to block Reddit/meta/hiring/non-news posts
-NON_NEWS_PATTERNS = [
-    "[d] self-promotion",
-    "self-promotion thread",
-    "who's hiring",
-    "who wants to be hired",
-    "monthly thread",
-    "meta thread",
-    "discussion thread",
-    "automoderator",
-    "reddit",
-]
-
-
 # -------------------------------
-# FILTER HELPERS
+# EMBEDDING / MATH HELPERS
 # -------------------------------
 
-def contains_ai_keyword(text: str) -> bool:
-    """Matches AI keywords by full words only to prevent false positives."""
-    text = text.lower()
-    for kw in AI_KEYWORDS:
-        if re.search(rf'\b{re.escape(kw)}\b', text):
-            return True
-    return False
-
+# Truncate to ~6000 tokens max (rough estimate: 1 token ≈ 4 chars)
+# text-embedding-3-large has 8192 token limit, so 6000 provides buffer
+MAX_CHARS = 24000  # ~6000 tokens
+CHARS_PER_TOKEN = 4
 
-def is_meta_or_non_ai_thread(text: str) -> bool:
-    """Block Reddit/meta threads completely."""
-    text = text.lower()
-    return any(p in text for p in NON_NEWS_PATTERNS)
+# Compression: keep only the first EMBED_DIMENSIONS dims (Matryoshka-style;
+# text-embedding-3 vectors stay meaningful when truncated), renormalized.
+# 0 = full size. The cache keeps full vectors, so this can change without
+# re-embedding. Storage precision is vector_codec.EMBED_STORAGE_DTYPE
+# (float32 / float16 / int8 with a per-vector scale).
+EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "0")) or None
 
+# Batching: many inputs per embeddings request, capped by count and tokens
+MAX_BATCH_INPUTS = int(os.getenv("EMBED_BATCH_INPUTS", "512"))
+MAX_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))
 
-# -------------------------------
-# EMBEDDING / MATH HELPERS
-# -------------------------------
 
-def embed_text(text: str) -> list:
-    """Generate embedding for text. Auto-truncates to fit token limits."""
+def prepare_embedding_text(text: str):
+    """Empty → None; long texts are truncated to fit the token limit."""
     if not text or text.strip() == "":
         return None
-    
-    # Truncate to ~6000 tokens max (rough estimate: 1 token ≈ 4 chars)
-    # text-embedding-3-large has 8192 token limit, so 6000 provides buffer
-    MAX_CHARS = 24000  # ~6000 tokens
+
     if len(text) > MAX_CHARS:
-        text = text[:MAX_CHARS] + "..."
         if DEBUG_CLUSTERING:
             print(f"   ⚠️ Truncated long text ({len(text)} chars → {MAX_CHARS} chars)")
-    
-    response = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=text,
+        text = text[:MAX_CHARS] + "..."
+    return text
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(texts: list, max_inputs: int = None, max_tokens: int = None) -> list:
+    """Group text positions into requests under MAX_BATCH_INPUTS / MAX_BATCH_TOKENS
+    (or the provider's own, smaller limits)."""
+    max_inputs = min(filter(None, (max_inputs, MAX_BATCH_INPUTS)))
+    max_tokens = min(filter(None, (max_tokens, MAX_BATCH_TOKENS)))
+    batches, batch, batch_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def request_embeddings(texts: list) -> list:
+    """
+    Embed prepared texts in as few provider batches as possible, in order.
+    Texts of a batch that kept failing come back None (embedded next run).
+    """
+    results = [None] * len(texts)
+    batches = pack_batches(texts, embedder.max_batch_inputs, embedder.max_batch_tokens)
+    started = time.perf_counter()
+
+    vectors = dispatcher.embed_batches(
+        [[texts[j] for j in batch] for batch in batches],
+        [sum(estimate_tokens(texts[j]) for j in batch) for batch in batches],
     )
-    return response.data[0].embedding
+    for batch, batch_vectors in zip(batches, vectors):
+        for j, vector in zip(batch, batch_vectors or ()):
+            results[j] = vector
+
+    if DEBUG_CLUSTERING and len(texts) > 1:
+        elapsed = time.perf_counter() - started
+        print(f"   📦 Embedded {len(texts)} texts in {len(batches)} {embedder.name} batch(es), "
+              f"{len(texts) / max(elapsed, 1e-9):.0f} texts/s")
+    return results
+
+
+def embed_texts(texts: list) -> list:
+    """
+    Embed many texts, going through the embedding cache first.
+    Returns one embedding per input, in order (None for empty texts).
+    """
+    results = [None] * len(texts)
+    prepared = [(i, prepare_embedding_text(t)) for i, t in enumerate(texts)]
+    prepared = [(i, t) for i, t in prepared if t]
+    if not prepared:
+        return results
+
+    inputs = [t for _, t in prepared]
+    if EMBED_CACHE_ENABLED:
+        vectors = embedding_cache.cache.get_many(EMBED_MODEL, inputs, request_embeddings)
+    else:
+        vectors = request_embeddings(inputs)
+
+    for (i, _), vector in zip(prepared, vectors):
+        results[i] = compress_embedding(vector)
+    return results
 
 
-def serialize_embedding(embedding):
-    """Convert embedding list to JSON string for database storage."""
-    if embedding is None:
-        return None
-    return json.dumps(embedding)
+def embed_text(text: str) -> list:
+    """Generate embedding for text. Auto-truncates to fit token limits."""
+    return embed_texts([text])[0]
 
 
-def deserialize_embedding(embedding_str):
-    """Convert JSON string from database back to list."""
-    if not embedding_str:
+def compress_embedding(vector, dims: int = None):
+    """Truncate to `dims` (default EMBED_DIMENSIONS) and renormalize → float32 array."""
+    if vector is None:
         return None
-    if isinstance(embedding_str, str):
-        return json.loads(embedding_str)
-    return embedding_str  # Already a list
+    vector = np.asarray(vector, dtype=np.float32)
+    dims = dims or EMBED_DIMENSIONS
+    if dims and len(vector) > dims:
+        vector = vector[:dims]
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+    return vector
+
+
+def serialize_embedding(embedding):
+    """Convert embedding to compact binary for database storage (see vector_codec)."""
+    return vector_codec.encode(embedding)
+
+
+def deserialize_embedding(blob):
+    """Stored embedding (binary, or legacy JSON text) → numpy vector."""
+    return vector_codec.decode(blob)
+
+
+def topic_vector(topic):
+    """
+    A topic's vector in the current compressed space, falling back to the
+    legacy JSON column if not yet converted. Vectors stored before
+    EMBED_DIMENSIONS was lowered are truncated on read.
+    """
+    if topic.embedding is not None:
+        return compress_embedding(deserialize_embedding(topic.embedding))
+    return compress_embedding(deserialize_embedding(topic.embedding_json))
+
+
+def update_centroid(centroid, count: int, vector, decay: float = None):
+    """
+    Fold one more unit vector into a running mean of `count` vectors, in O(d).
+    With decay, the newest vector weighs at least `decay`.
+    """
+    decay = CENTROID_DECAY if decay is None else decay
+    weight = max(1.0 / (count + 1), decay)
+    centroid = np.asarray(centroid, dtype=np.float32)
+    return centroid + weight * (topic_index.normalize(vector) - centroid)
 
 
 def cosine_sim(a, b):
     """Cosine similarity between vectors."""
-    a = np.array(a)
-    b = np.array(b)
+    a = np.asarray(a)
+    b = np.asarray(b)
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
 
-def calculate_popularity(topic, article_count, unique_sources):
-    coverage = min(article_count * 10, 100)
-    diversity = min(unique_sources * 20, 100)
-    velocity = 60
-    return round((0.4 * coverage) + (0.2 * diversity) + (0.2 * velocity), 1)
-
-
 def generate_topic_title(title: str, summary: str) -> str:
     """Cleaner titles for new clusters."""
     title = title.strip()
@@ -139,93 +230,276 @@ def generate_topic_title(title: str, summary: str) -> str:
 # MAIN CLUSTERING LOGIC
 # -------------------------------
 
-def run_clustering(db: Session):
-    print("🧠 Running Semantic AI Topic Clustering...")
-
-    new_articles = db.query(models.NewsItem).filter(
-        models.NewsItem.topic_id == None
-    ).all()
-
-    if not new_articles:
-        print("✔ No new articles to cluster.")
+def load_topic_index(db: Session, dims: int):
+    """
+    The topic search index, synced with the topics table: reuse the copy
+    saved at TOPIC_INDEX_PATH when it matches, drop topics that no longer
+    exist (e.g. after /reset-clustering), refresh the centroids written
+    since it was synced and add the topics it lacks.
+    """
+    synced_at = datetime.utcnow() - INDEX_SYNC_MARGIN
+    index = topic_index.load_index(TOPIC_INDEX_PATH) if TOPIC_INDEX_PATH else None
+    if index is None or index.backend != topic_index.TOPIC_INDEX_BACKEND or index.dims not in (None, dims):
+        index = topic_index.make_index(dims=dims)
+
+    topic_ids = [tid for (tid,) in db.query(models.Topic.id).order_by(models.Topic.created_at, models.Topic.id)]
+    live = set(topic_ids)
+    index.delete_many([tid for tid in index.ids if tid not in live])
+    refreshed = refresh_changed(db, index, dims, index.synced_at)
+
+    missing = [tid for tid in topic_ids if tid not in index]
+    for start in range(0, len(missing), 1000):
+        chunk = missing[start:start + 1000]
+        topics = {t.id: t for t in db.query(models.Topic).filter(models.Topic.id.in_(chunk))}
+        ids, vectors, stale = [], [], []
+        for tid in chunk:
+            vector = topic_vector(topics[tid])
+            if vector is not None and len(vector) == dims:
+                ids.append(tid)
+                vectors.append(vector)
+            else:
+                stale.append(topics[tid])
+
+        # Stored smaller than the current EMBED_DIMENSIONS (or missing):
+        # re-embed, normally straight from the embedding cache
+        if stale:
+            for topic, vector in zip(stale, embed_texts([f"{t.title}. {t.summary}" for t in stale])):
+                if vector is not None and len(vector) == dims:
+                    topic.embedding = serialize_embedding(vector)
+                    topic.centroid_updated_at = datetime.utcnow()
+                    ids.append(topic.id)
+                    vectors.append(vector)
+        if ids:
+            index.add_many(ids, np.stack(vectors))
+
+    index.synced_at = synced_at
+    if DEBUG_CLUSTERING:
+        print(f"   🧲 Topic index ({index.backend}): {len(index)} topics, {len(missing)} newly loaded, "
+              f"{refreshed} refreshed")
+    return index
+
+
+def refresh_changed(db: Session, index, dims: int, since, chunk_size: int = 1000) -> int:
+    """
+    Overwrite the index rows of topics whose centroid was written after
+    `since` (Topic.centroid_updated_at): rewritten by batch_recluster or
+    topic_maintenance, or committed by a run that died before saving the
+    index. since=None (an index saved without a sync time) checks them all.
+    """
+    query = db.query(models.Topic.id, models.Topic.embedding, models.Topic.embedding_json)
+    if since is not None:
+        query = query.filter(models.Topic.centroid_updated_at > since)
+
+    refreshed = 0
+    for row in query.yield_per(chunk_size):
+        if row.id not in index:
+            continue  # not indexed yet: loaded with the missing topics
+        vector = topic_vector(row)
+        if vector is not None and len(vector) == dims:
+            index.update(row.id, vector)
+            refreshed += 1
+    return refreshed
+
+
+def load_topic_state(db: Session, topic_ids, centroids: dict, counts: dict, titles: dict):
+    """Centroid, article count and title of existing topics, in one query."""
+    missing = [tid for tid in topic_ids if tid not in centroids]
+    if not missing:
         return
+    rows = db.query(
+        models.Topic.id, models.Topic.title, models.Topic.embedding,
+        models.Topic.embedding_json, models.Topic.centroid_count,
+    ).filter(models.Topic.id.in_(missing))
+    for row in rows:
+        centroids[row.id] = topic_vector(row)
+        counts[row.id] = row.centroid_count or 1
+        titles[row.id] = row.title
+
+
+def flush_chunk(db: Session, index, new_topics: dict, links: list, touched: set,
+                centroids: dict, counts: dict, titles: dict):
+    """
+    Write one chunk of clustering decisions in one transaction: new topics
+    (one INSERT … RETURNING), article links, topic counters and centroids,
+    then the popularity windows and scores of every topic that gained articles.
+    """
+    now = datetime.utcnow()
+    real = {}
+    if new_topics:
+        provisional = list(new_topics)
+        topic_ids = db.execute(
+            insert(models.Topic).returning(models.Topic.id, sort_by_parameter_order=True),
+            [{**new_topics[tmp], "embedding": serialize_embedding(centroids[tmp]), "centroid_count": counts[tmp],
+              "centroid_updated_at": now, "article_count": 0, "distinct_source_count": 0,
+              "maintenance_pending": True}
+             for tmp in provisional],
+        ).scalars().all()
+        real = dict(zip(provisional, topic_ids))
+        for tmp, topic_id in real.items():
+            index.rename(tmp, topic_id)
+            centroids[topic_id] = centroids.pop(tmp)
+            counts[topic_id] = counts.pop(tmp)
+            titles[topic_id] = titles.pop(tmp)
+
+    links = [(article_id, real.get(topic_id, topic_id), source_id, hour)
+             for article_id, topic_id, source_id, hour in links]
+    if links:
+        db.execute(update(models.NewsItem), [
+            {"id": article_id, "topic_id": topic_id} for article_id, topic_id, _, _ in links
+        ])
+    totals = topic_stats.record_links(db, [(topic_id, source_id) for _, topic_id, source_id, _ in links])
+
+    # Topics that gained articles: centroid and counters.
+    # Topics founded here and not joined since: counters only
+    touched = {real.get(topic_id, topic_id) for topic_id in touched}
+    grown = [
+        {
+            "id": topic_id,
+            "embedding": serialize_embedding(centroids[topic_id]),
+            "centroid_count": counts[topic_id],
+            "centroid_updated_at": now,
+            "article_count": article_count,
+            "distinct_source_count": sources,
+            "maintenance_pending": True,
+        }
+        for topic_id, (article_count, sources) in totals.items() if topic_id in touched
+    ]
+    founded = [
+        {"id": topic_id, "article_count": article_count, "distinct_source_count": sources}
+        for topic_id, (article_count, sources) in totals.items() if topic_id not in touched
+    ]
+    for rows in (grown, founded):
+        if rows:
+            db.execute(update(models.Topic), rows)
+    popularity.record(db, [(topic_id, hour) for _, topic_id, _, hour in links], totals)
+    db.commit()
+
+
+def cluster_batched(db: Session, eligible: list, article_embeddings: list, index, progress) -> int:
+    """
+    The greedy assignment with writes kept in memory and flushed every
+    CLUSTER_FLUSH_CHUNK articles (flush_chunk): a handful of round trips
+    per chunk instead of several commits per article. New topics get
+    provisional negative ids in the index until their INSERT returns.
+    """
+    # Plain values up front: committed ORM objects would reload row by row
+    now_hour = popularity.hour_of(datetime.utcnow())
+    articles = [(a.id, a.title, a.summary, a.source_id,
+                 popularity.arrival_hour(a.published_at, a.created_at, now_hour)) for a in eligible]
+    db.commit()  # article embeddings (and any topic re-embeds), in one go
+
+    centroids, counts, titles = {}, {}, {}  # topic id → running centroid / article count / title
+    topics_created = 0
+    next_provisional = -1
+
+    for start in range(0, len(articles), CLUSTER_FLUSH_CHUNK):
+        chunk = range(start, min(start + CLUSTER_FLUSH_CHUNK, len(articles)))
+
+        # Prefetch the existing topics this chunk will most likely join
+        queries = [article_embeddings[i] for i in chunk if article_embeddings[i] is not None]
+        if queries:
+            hits = index.search_batch(np.stack(queries))
+            load_topic_state(db, {tid for tid, sim in hits if tid is not None and sim >= SIMILARITY_THRESHOLD},
+                             centroids, counts, titles)
+
+        new_topics, links, touched = {}, [], set()
+        for i in chunk:
+            progress(articles_processed=i + 1, topics_created=topics_created)
+            article_id, title, summary, source_id, hour = articles[i]
+            article_embedding = article_embeddings[i]
+            if article_embedding is None:
+                print(f"⚠ No embedding for article: {title}")
+                continue
 
-    # -------------------------------
-    # PROCESS EACH NEW ARTICLE
-    # -------------------------------
-    for article in new_articles:
-        
-        # IMPORTANT: Reload existing topics for EACH article to include newly created topics
-        existing_topics = db.query(models.Topic).order_by(
-            models.Topic.created_at.desc()
-        ).limit(MAX_RECENT_TOPICS).all()
-        
-        # Ensure all topic embeddings exist and are deserialized
-        for topic in existing_topics:
-            if not topic.embedding:
-                topic_text = f"{topic.title}. {topic.summary}"
-                embedding = embed_text(topic_text)
-                topic.embedding = serialize_embedding(embedding)
-                db.commit()
+            best_id, max_sim_seen = index.search(article_embedding)
+            max_sim_seen = max(max_sim_seen, 0)
+
+            # Assign to existing (or this chunk's new) topic
+            if best_id is not None and max_sim_seen >= SIMILARITY_THRESHOLD:
+                load_topic_state(db, [best_id], centroids, counts, titles)
+                centroids[best_id] = update_centroid(centroids[best_id], counts[best_id], article_embedding)
+                counts[best_id] += 1
+                index.update(best_id, centroids[best_id])
+                links.append((article_id, best_id, source_id, hour))
+                touched.add(best_id)
+                print(f"   ↳ Added to Topic: {titles[best_id]}  (sim={max_sim_seen:.2f})")
+                continue
+
+            # Create NEW topic
+            new_title = generate_topic_title(title, summary)
+            provisional, next_provisional = next_provisional, next_provisional - 1
+            new_topics[provisional] = {
+                "title": new_title,
+                "summary": summary,
+                "created_at": datetime.utcnow(),
+            }
+            centroids[provisional] = topic_index.normalize(article_embedding)
+            counts[provisional] = 1
+            titles[provisional] = new_title
+            index.add(provisional, article_embedding)
+            links.append((article_id, provisional, source_id, hour))
+            topics_created += 1
+
+            if max_sim_seen > 0:
+                print(f"   ✨ New Topic: {new_title[:60]}... (best_sim={max_sim_seen:.3f}, threshold={SIMILARITY_THRESHOLD})")
             else:
-                # Deserialize for comparison
-                topic._embedding_vector = deserialize_embedding(topic.embedding)
+                print(f"   ✨ New AI Topic Created: {new_title}")
 
-        text = f"{article.title}. {article.summary}".strip().lower()
+        flush_chunk(db, index, new_topics, links, touched, centroids, counts, titles)
 
-        # 🚫 Block Reddit/meta/hiring/noise posts
-        if is_meta_or_non_ai_thread(text):
-            print(f"   ❌ Skipped META/Reddit Thread: {article.title[:60]}")
-            continue
+    return topics_created
 
-        # 🚫 Skip non-AI articles early
-        if not contains_ai_keyword(text):
-            print(f"   ❌ Non-AI Article Skipped: {article.title[:60]}")
-            continue
 
-        # Generate article embedding
-        article_embedding = embed_text(f"{article.title}. {article.summary}")
-        if not article_embedding:
+def cluster_per_article(db: Session, eligible: list, article_embeddings: list, index, progress) -> int:
+    """The original write path: commit after every decision (CLUSTER_WRITE_MODE=per-article)."""
+    topics_by_id = {}
+    centroids = {}  # topic id → float32 running centroid (kept unquantized during the run)
+    topics_created = 0
+
+    for processed, (article, article_embedding) in enumerate(zip(eligible, article_embeddings), 1):
+        progress(articles_processed=processed, topics_created=topics_created)
+
+        if article_embedding is None:
             print(f"⚠ No embedding for article: {article.title}")
             continue
 
-        best_topic = None
-        best_sim = 0
-        max_sim_seen = 0  # Track highest similarity even if below threshold
-
         # ----------------------------------------
         # Match to existing topic if similarity > threshold
         # ----------------------------------------
-        for topic in existing_topics:
-            if not topic.embedding:
-                continue
-
-            # Get deserialized embedding
-            topic_embedding = getattr(topic, '_embedding_vector', None) or deserialize_embedding(topic.embedding)
-            if not topic_embedding:
-                continue
-
-            sim = cosine_sim(article_embedding, topic_embedding)
-            max_sim_seen = max(max_sim_seen, sim)
+        best_id, max_sim_seen = index.search(article_embedding)
+        max_sim_seen = max(max_sim_seen, 0)  # Track highest similarity even if below threshold
 
-            if sim > best_sim and sim >= SIMILARITY_THRESHOLD:
-                best_sim = sim
-                best_topic = topic
+        best_topic = None
+        best_sim = 0
+        if best_id is not None and max_sim_seen >= SIMILARITY_THRESHOLD:
+            if best_id not in topics_by_id:
+                topics_by_id[best_id] = db.get(models.Topic, best_id)
+            best_topic = topics_by_id[best_id]
+            best_sim = max_sim_seen
 
         # ----------------------------------------
         # Assign to existing topic
         # ----------------------------------------
         if best_topic:
             article.topic_id = best_topic.id
-            db.commit()
-            db.refresh(best_topic)
+
+            # Move the topic's centroid toward the article; the index sees it at once
+            count = best_topic.centroid_count or 1
+            if best_id not in centroids:
+                centroids[best_id] = topic_vector(best_topic)
+            centroids[best_id] = update_centroid(centroids[best_id], count, article_embedding)
+            best_topic.embedding = serialize_embedding(centroids[best_id])
+            best_topic.centroid_count = count + 1
+            best_topic.centroid_updated_at = datetime.utcnow()
+            best_topic.maintenance_pending = True
+            index.update(best_id, centroids[best_id])
 
             print(f"   ↳ Added to Topic: {best_topic.title}  (sim={best_sim:.2f})")
 
-            # Update topic popularity
-            count = len(best_topic.articles)
-            sources = len(set(a.source_id for a in best_topic.articles))
-            best_topic.popularity_score = calculate_popularity(best_topic, count, sources)
+            # Update topic counters and popularity
+            totals = topic_stats.record_links(db, [(best_id, article.source_id)])
+            best_topic.article_count, best_topic.distinct_source_count = totals[best_id]
+            popularity.record(db, [(best_id, popularity.arrival_hour(article.published_at, article.created_at))], totals)
 
             db.commit()
             continue
@@ -239,15 +513,26 @@ def run_clustering(db: Session):
             title=new_title,
             summary=article.summary,
             embedding=serialize_embedding(article_embedding),
-            popularity_score=10.0,
+            centroid_count=1,
+            centroid_updated_at=datetime.utcnow(),
+            maintenance_pending=True,
             created_at=datetime.utcnow()
         )
 
         db.add(new_topic)
         db.commit()
         db.refresh(new_topic)
+        topics_created += 1
+        index.add(new_topic.id, article_embedding)
+        topics_by_id[new_topic.id] = new_topic
+        centroids[new_topic.id] = topic_index.normalize(article_embedding)
 
         article.topic_id = new_topic.id
+        totals = topic_stats.record_links(db, [(new_topic.id, article.source_id)])
+        new_topic.article_count, new_topic.distinct_source_count = totals[new_topic.id]
+        popularity.record(
+            db, [(new_topic.id, popularity.arrival_hour(article.published_at, article.created_at))], totals
+        )
         db.commit()
 
         # Show why it didn't match (if we saw similar topics)
@@ -256,4 +541,78 @@ def run_clustering(db: Session):
         else:
             print(f"   ✨ New AI Topic Created: {new_title}")
 
+    return topics_created
+
+
+def run_clustering(db: Session, progress=None):
+    """
+    Assign every unclustered article to its closest topic, or start a new
+    one. Returns the number of topics created. `progress(**counters)`, if
+    given, is told how far along the run is (see jobs.py).
+    """
+    print("🧠 Running Semantic AI Topic Clustering...")
+    progress = progress or (lambda **counters: None)
+
+    # Counters are incremented from here on, so they must start out right
+    if topic_stats.needs_reconcile(db):
+        topic_stats.reconcile(db)
+    # Rows stored without a current verdict (older filter version, or
+    # inserted outside the fetcher) are classified once, in bulk
+    if relevance.needs_reclassify(db):
+        relevance.reclassify(db)
+
+    # -------------------------------
+    # BACKFILL MISSING TOPIC EMBEDDINGS (one batch)
+    # -------------------------------
+    missing = db.query(models.Topic).filter(
+        models.Topic.embedding == None,
+        models.Topic.embedding_json == None,
+    ).all()
+    if missing:
+        vectors = embed_texts([f"{t.title}. {t.summary}" for t in missing])
+        for topic, vector in zip(missing, vectors):
+            topic.embedding = serialize_embedding(vector)
+            topic.centroid_updated_at = datetime.utcnow()
+        db.commit()
+
+    # Loaded after the backfill commit, which would expire them. Rejected
+    # articles were classified at ingest and are never loaded again.
+    eligible = db.query(models.NewsItem).filter(
+        models.NewsItem.topic_id == None,
+        models.NewsItem.relevant == True,
+    ).all()
+
+    if not eligible:
+        print("✔ No new articles to cluster.")
+        return 0
+
+    # -------------------------------
+    # EMBED ALL PENDING ARTICLES (batched)
+    # -------------------------------
+    article_embeddings = embed_texts([f"{a.title}. {a.summary}" for a in eligible])
+    for article, embedding in zip(eligible, article_embeddings):
+        article.embedding = serialize_embedding(embedding)
+    progress(articles_pending=len(eligible),
+             articles_embedded=sum(e is not None for e in article_embeddings))
+
+    # -------------------------------
+    # TOPIC INDEX over every topic, loaded once per run
+    # -------------------------------
+    dims = next((len(e) for e in article_embeddings if e is not None), None)
+    index = load_topic_index(db, dims) if dims else None
+
+    # -------------------------------
+    # ASSIGN EACH NEW ARTICLE
+    # -------------------------------
+    if CLUSTER_WRITE_MODE == "per-article":
+        topics_created = cluster_per_article(db, eligible, article_embeddings, index, progress)
+    else:
+        topics_created = cluster_batched(db, eligible, article_embeddings, index, progress)
+
+    if index is not None and TOPIC_INDEX_PATH:
+        index.save(TOPIC_INDEX_PATH)
+
+    if EMBED_CACHE_ENABLED:
+        print(f"   🗃️  Embedding cache: {embedding_cache.cache.stats()}")
     print("✔ Semantic clustering complete.")
+    return topics_created
@@ -1,5 +1,10 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
 import models
+import polling
+import simhash
 from models import NewsItem, Source
 
 
@@ -12,6 +17,44 @@ def get_active_sources(db: Session):
     return db.query(Source).filter(Source.active == True).all()
 
 
+def get_pollable_sources(db: Session, now: datetime = None):
+    """Active sources whose circuit breaker is not open."""
+    now = now or datetime.utcnow()
+    return db.query(Source).filter(
+        Source.active == True,
+        or_(Source.circuit_open_until == None, Source.circuit_open_until <= now),
+    ).all()
+
+
+def get_due_sources(db: Session, now: datetime = None):
+    """Pollable sources whose next scheduled poll has come."""
+    now = now or datetime.utcnow()
+    return db.query(Source).filter(
+        Source.active == True,
+        or_(Source.circuit_open_until == None, Source.circuit_open_until <= now),
+        or_(Source.next_poll_at == None, Source.next_poll_at <= now),
+    ).all()
+
+
+def record_poll_outcome(db: Session, source_id: int, outcome: dict):
+    """Feed one poll's result into the source's adaptive schedule (not committed)."""
+    source = db.get(Source, source_id)
+    if source:
+        polling.apply_outcome(source, outcome)
+
+
+def update_source_validators(db: Session, source_id: int, etag=None, last_modified=None,
+                             content_hash=None, fetched_at=None):
+    """Remember HTTP validators so the next poll can send a conditional GET.
+    Not committed here: the fetcher commits once per feed."""
+    values = {"last_fetched_at": fetched_at}
+    # A 304 carries no new body, so keep the validators we already have
+    if content_hash:
+        values.update(etag=etag, last_modified=last_modified, content_hash=content_hash)
+
+    db.query(Source).filter(Source.id == source_id).update(values)
+
+
 # ============================================================
 # NEWS ITEM HELPERS
 # ============================================================
@@ -45,6 +88,69 @@ def create_news_item(db: Session, title: str, summary: str, url: str, source_id:
     return item
 
 
+# ============================================================
+# BATCHED INGEST
+# ============================================================
+
+def get_existing_urls(db: Session, urls) -> set:
+    """Which of these URLs are already stored — one IN query."""
+    urls = list(set(u for u in urls if u))
+    if not urls:
+        return set()
+    rows = db.query(NewsItem.url).filter(NewsItem.url.in_(urls)).all()
+    return {url for (url,) in rows}
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT ... ON CONFLICT (url) DO NOTHING for the active dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(NewsItem).on_conflict_do_nothing(index_elements=["url"])
+    if dialect == "sqlite":
+        return sqlite.insert(NewsItem).on_conflict_do_nothing(index_elements=["url"])
+    raise NotImplementedError(f"Bulk insert not supported for {dialect}")
+
+
+def bulk_create_news_items(db: Session, rows: list, commit: bool = True) -> list:
+    """
+    Insert many news rows in one statement, silently skipping URLs that
+    already exist (including ones inserted concurrently).
+    Returns the (id, url) pairs that were actually inserted.
+    """
+    if not rows:
+        return []
+
+    stmt = _insert_ignoring_duplicates(db).values(rows).returning(NewsItem.id, NewsItem.url)
+    inserted = [(row.id, row.url) for row in db.execute(stmt)]
+
+    if commit:
+        db.commit()
+    return inserted
+
+
+def load_simhash_index(db: Session, days: int = 14) -> simhash.SimHashIndex:
+    """Near-duplicate index over the SimHashes of recently stored articles,
+    labelled (url, source_id)."""
+    index = simhash.SimHashIndex()
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.query(NewsItem.simhash, NewsItem.url, NewsItem.source_id).filter(
+        NewsItem.simhash != None,
+        NewsItem.created_at >= since,
+    ).all()
+    for value, url, source_id in rows:
+        index.add(simhash.to_unsigned(value), (url, source_id))
+    return index
+
+
+def get_texts_by_url(db: Session, urls) -> dict:
+    """url → "title summary" of stored articles (the text their SimHash covers)."""
+    urls = list(urls)
+    if not urls:
+        return {}
+    rows = db.query(NewsItem.url, NewsItem.title, NewsItem.summary).filter(NewsItem.url.in_(urls))
+    return {url: f"{title} {summary or ''}" for url, title, summary in rows}
+
+
 # ============================================================
 # FETCH PAGINATED NEWS INCLUDING SOURCE NAME
 # ============================================================
@@ -0,0 +1,240 @@
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import os
+import threading
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import SessionLocal
+from models import EmbeddingCacheEntry
+
+
+# ============================================================
+# CONTENT-HASH EMBEDDING CACHE
+# ============================================================
+# Reclustering (reset-clustering, quick_recluster, ...) deletes topics and
+# re-embeds every article although the text never changed. Vectors are
+# cached by (model, sha256 of whitespace-normalized text):
+#
+#   in-process LRU  →  embedding_cache table  →  embedding API
+#
+# The table is capped at EMBED_CACHE_MAX_ROWS; least recently used rows
+# are evicted past it. Concurrent callers asking for the same text while
+# it is being embedded wait for the first request instead of sending
+# their own (single-flight).
+
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_LRU_SIZE = int(os.getenv("EMBED_CACHE_LRU_SIZE", "20000"))
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "200000"))
+DB_LOOKUP_CHUNK = 500
+
+_DONE = threading.Event()
+_DONE.set()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def frozen(vector) -> np.ndarray:
+    """float32 array that cannot be modified (cached vectors are shared)."""
+    vector = np.array(vector, dtype=np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+class EmbeddingCache:
+    def __init__(self, lru_size: int = EMBED_CACHE_LRU_SIZE, max_rows: int = EMBED_CACHE_MAX_ROWS,
+                 session_factory=SessionLocal):
+        self.lru_size = lru_size
+        self.max_rows = max_rows
+        self.session_factory = session_factory
+        self._lru = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # misses = texts embedded and cached; failed = computes that returned no vector
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "failed": 0, "coalesced": 0, "evicted": 0}
+
+    # ---------- in-process LRU ----------
+
+    def _lru_get(self, key):
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key, vector):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    # ---------- database store ----------
+
+    def _db_get(self, model: str, hashes: list) -> dict:
+        found = {}
+        db = self.session_factory()
+        try:
+            for start in range(0, len(hashes), DB_LOOKUP_CHUNK):
+                chunk = hashes[start:start + DB_LOOKUP_CHUNK]
+                rows = db.query(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.vector).filter(
+                    EmbeddingCacheEntry.model == model,
+                    EmbeddingCacheEntry.text_hash.in_(chunk),
+                ).all()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                # Touch for LRU eviction
+                keys = list(found)
+                for start in range(0, len(keys), DB_LOOKUP_CHUNK):
+                    db.query(EmbeddingCacheEntry).filter(
+                        EmbeddingCacheEntry.model == model,
+                        EmbeddingCacheEntry.text_hash.in_(keys[start:start + DB_LOOKUP_CHUNK]),
+                    ).update({"last_used_at": datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+        return found
+
+    def _db_put(self, model: str, vectors: dict):
+        if not vectors:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"model": model, "text_hash": h, "dimensions": len(v),
+             "vector": v.tobytes(), "created_at": now, "last_used_at": now}
+            for h, v in vectors.items()
+        ]
+        db = self.session_factory()
+        try:
+            dialect = db.get_bind().dialect.name
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(EmbeddingCacheEntry).on_conflict_do_nothing(
+                index_elements=["model", "text_hash"]
+            )
+            for start in range(0, len(rows), DB_LOOKUP_CHUNK):
+                db.execute(stmt, rows[start:start + DB_LOOKUP_CHUNK])
+            db.commit()
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """Drop least recently used rows beyond max_rows."""
+        total = db.query(func.count(EmbeddingCacheEntry.id)).scalar()
+        excess = total - self.max_rows
+        if excess <= 0:
+            return
+        oldest = db.query(EmbeddingCacheEntry.id).order_by(
+            EmbeddingCacheEntry.last_used_at.asc()
+        ).limit(excess).subquery()
+        db.query(EmbeddingCacheEntry).filter(
+            EmbeddingCacheEntry.id.in_(oldest.select())
+        ).delete(synchronize_session=False)
+        db.commit()
+        self._count("evicted", excess)
+
+    # ---------- lookup ----------
+
+    def get_many(self, model: str, texts: list, compute) -> list:
+        """
+        Embeddings for texts, in order, as read-only float32 arrays (shared
+        with the cache; None where compute failed). `compute(texts) -> vectors`
+        is called once with the texts nobody has cached or is already embedding.
+        """
+        hashes = [text_hash(t) for t in texts]
+        results = [None] * len(texts)
+        pending = {}  # hash → positions
+
+        for i, h in enumerate(hashes):
+            vector = self._lru_get((model, h))
+            if vector is not None:
+                results[i] = vector
+                self._count("memory_hits")
+            else:
+                pending.setdefault(h, []).append(i)
+
+        if pending:
+            for h, vector in self._db_get(model, list(pending)).items():
+                self._lru_put((model, h), vector)
+                for i in pending.pop(h):
+                    results[i] = vector
+                self._count("db_hits")
+
+        # Single-flight: claim the hashes nobody else is embedding right now
+        mine, waiting = [], []
+        with self._lock:
+            for h in pending:
+                event = self._inflight.get((model, h))
+                if event is None and (model, h) in self._lru:
+                    # Finished by another caller since our lookup
+                    waiting.append((h, _DONE))
+                elif event is None:
+                    self._inflight[(model, h)] = threading.Event()
+                    mine.append(h)
+                else:
+                    waiting.append((h, event))
+
+        try:
+            if mine:
+                computed = compute([texts[pending[h][0]] for h in mine])
+                fresh = {}
+                for h, vector in zip(mine, computed):
+                    if vector is None:
+                        continue
+                    vector = frozen(vector)
+                    fresh[h] = vector
+                    self._lru_put((model, h), vector)
+                    for i in pending[h]:
+                        results[i] = vector
+                self._count("misses", len(fresh))
+                self._count("failed", len(mine) - len(fresh))
+                self._db_put(model, fresh)
+        finally:
+            with self._lock:
+                for h in mine:
+                    self._inflight.pop((model, h)).set()
+
+        for h, event in waiting:
+            event.wait()
+            vector = self._lru_get((model, h))
+            if vector is None:
+                # The leading request failed; embed it ourselves
+                vector = compute([texts[pending[h][0]]])[0]
+                if vector is not None:
+                    vector = frozen(vector)
+                    self._lru_put((model, h), vector)
+                    self._count("misses")
+                else:
+                    self._count("failed")
+            else:
+                self._count("coalesced")
+            for i in pending[h]:
+                results[i] = vector
+
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters, memory_entries=len(self._lru))
+        # Failed computes are neither hits nor misses
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else None
+        return stats
+
+
+cache = EmbeddingCache()
@@ -0,0 +1,234 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+
+# ============================================================
+# EMBEDDING DISPATCHER
+# ============================================================
+# clustering.request_embeddings hands its packed batches to the dispatcher,
+# which sends them to the provider concurrently:
+#   - at most `max_in_flight` requests at once (asyncio semaphore)
+#   - under the provider's requests/min and tokens/min quotas (token
+#     buckets shared by every caller, refilled continuously)
+#   - retrying 429 / 5xx / connection errors with jittered exponential
+#     backoff (honouring Retry-After); a 429 pauses every request, not
+#     just the one that got it
+# A batch that still fails after EMBED_MAX_RETRIES comes back as None:
+# those articles stay unclustered and are picked up by the next run
+# instead of aborting it. Other errors (bad key, bad request) still raise.
+#
+# Limits default to the provider's (embeddings.Embedder); EMBED_RPM,
+# EMBED_TPM and EMBED_MAX_IN_FLIGHT override them.
+
+EMBED_RPM = int(os.getenv("EMBED_RPM", "0")) or None
+EMBED_TPM = int(os.getenv("EMBED_TPM", "0")) or None
+EMBED_MAX_IN_FLIGHT = int(os.getenv("EMBED_MAX_IN_FLIGHT", "0")) or None
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+RETRY_BASE_SECONDS = float(os.getenv("EMBED_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = 30.0
+LATENCY_SAMPLES = 2000
+
+TRANSIENT_STATUS = {408, 409, 429}
+TRANSIENT_ERRORS = ("APIConnectionError", "APITimeoutError")  # openai, matched by name
+
+
+class TokenBucket:
+    """`per_minute` units per minute, refilled continuously, bursting up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()  # buckets outlive event loops and threads
+
+    def _take(self, n: float) -> float:
+        """Take n units now if available (0.0), else the seconds until they will be."""
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.per_minute, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.level >= n:
+                self.level -= n
+                return 0.0
+            return (n - self.level) / self.rate
+
+    async def acquire(self, n: float = 1) -> float:
+        """Wait until n units are available and take them. Returns seconds waited."""
+        n = min(n, self.per_minute)  # an oversized request still goes, on a full bucket
+        waited = 0.0
+        while True:
+            delay = self._take(n)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+# -------------------------------
+# ERRORS
+# -------------------------------
+
+def status_of(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_transient(error) -> bool:
+    status = status_of(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError)) or any(
+        cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__
+    )
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(name)) * scale
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def backoff(attempt: int, error=None) -> float:
+    """Full-jitter exponential backoff, never sooner than Retry-After."""
+    delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+    asked = retry_after(error) if error is not None else None
+    return max(delay, asked + random.uniform(0, RETRY_BASE_SECONDS)) if asked else delay
+
+
+# -------------------------------
+# DISPATCHER
+# -------------------------------
+
+class EmbeddingDispatcher:
+    def __init__(self, embedder, rpm: int = None, tpm: int = None, max_in_flight: int = None,
+                 max_retries: int = EMBED_MAX_RETRIES):
+        self.embedder = embedder
+        rpm = rpm or EMBED_RPM or embedder.requests_per_minute
+        tpm = tpm or EMBED_TPM or embedder.tokens_per_minute
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_in_flight = max_in_flight or EMBED_MAX_IN_FLIGHT or embedder.max_in_flight
+        self.max_retries = max_retries
+
+        self._paused_until = 0.0  # monotonic; set by 429s
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counts = {
+            "batches": 0, "calls": 0, "retries": 0, "throttled": 0,
+            "server_errors": 0, "failed_batches": 0, "limiter_wait_seconds": 0.0,
+        }
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def embed_batches(self, batches: list, tokens: list = None) -> list:
+        """
+        Embed many batches of texts (`tokens` = estimated tokens per batch).
+        Returns one vector list per batch, in order; None for a batch that
+        kept failing with transient errors.
+        """
+        if not batches:
+            return []
+        tokens = tokens or [0] * len(batches)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._dispatch(batches, tokens))
+        # Called from async code: dispatch on a loop of our own
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self._dispatch(batches, tokens)).result()
+
+    async def _dispatch(self, batches: list, tokens: list) -> list:
+        slots = asyncio.Semaphore(self.max_in_flight)
+        return await asyncio.gather(*(
+            self._send(slots, batch, batch_tokens) for batch, batch_tokens in zip(batches, tokens)
+        ))
+
+    async def _throttle(self, tokens: int):
+        waited = 0.0
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+            waited += pause
+        if self.requests:
+            waited += await self.requests.acquire(1)
+        if self.tokens and tokens:
+            waited += await self.tokens.acquire(tokens)
+        if waited:
+            self._count("limiter_wait_seconds", waited)
+
+    async def _send(self, slots: asyncio.Semaphore, texts: list, tokens: int):
+        self._count("batches")
+        for attempt in range(self.max_retries + 1):
+            async with slots:
+                await self._throttle(tokens)
+                started = time.perf_counter()
+                try:
+                    vectors = await asyncio.to_thread(self.embedder.embed, texts)
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+                finally:
+                    with self._lock:
+                        self._latencies.append(time.perf_counter() - started)
+                        self._counts["calls"] += 1
+            if error is None:
+                return vectors
+
+            if not is_transient(error):
+                raise error
+            status = status_of(error)
+            if status == 429:
+                self._count("throttled")
+            elif status is not None and status >= 500:
+                self._count("server_errors")
+            if attempt == self.max_retries:
+                break
+
+            delay = backoff(attempt, error)
+            if status == 429:
+                # Quota exhausted for everyone: hold back the other requests too
+                with self._lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+        self._count("failed_batches")
+        print(f"⚠ Embedding batch of {len(texts)} failed after {self.max_retries + 1} attempts: {error}")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = np.array(self._latencies)
+        counts["limiter_wait_seconds"] = round(counts["limiter_wait_seconds"], 3)
+        latency = {}
+        if len(latencies):
+            p50, p95, p99 = (float(p) for p in np.percentile(latencies, [50, 95, 99]))
+            latency = {
+                "p50_ms": round(p50 * 1000, 1),
+                "p95_ms": round(p95 * 1000, 1),
+                "p99_ms": round(p99 * 1000, 1),
+                "max_ms": round(float(latencies.max()) * 1000, 1),
+            }
+        return {
+            "max_in_flight": self.max_in_flight,
+            "requests_per_minute": self.requests.per_minute if self.requests else None,
+            "tokens_per_minute": self.tokens.per_minute if self.tokens else None,
+            **counts,
+            "latency": latency,
+        }
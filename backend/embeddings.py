@@ -0,0 +1,299 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+
+# ============================================================
+# EMBEDDING PROVIDERS
+# ============================================================
+# clustering.py embeds through one provider, picked by EMBED_PROVIDER:
+#   openai  - OpenAI embeddings API (EMBED_MODEL), client built on first use
+#   hashing - local NumPy feature-hashing embedder: no network, no key,
+#             deterministic (CI, benchmarks, large on-prem backlogs)
+#   onnx    - local sentence-embedding model run with onnxruntime
+#             (EMBED_ONNX_MODEL_DIR with model.onnx + tokenizer.json)
+#   local   - onnx when that model and onnxruntime are present, else hashing
+#
+# Every provider embeds one batch at a time (clustering.request_embeddings
+# packs the batches, embedding_dispatcher sends them within the provider's
+# rate limits) and keeps throughput counters for /diagnose.
+# `model` names the vector space: it keys the embedding cache, so vectors
+# from different providers never mix. Stored topic/article vectors do not
+# carry it - after switching providers run /reset-clustering.
+
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "openai").lower()
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-large")
+
+HASHING_DIMENSIONS = int(os.getenv("EMBED_HASHING_DIMENSIONS", "512"))
+HASHING_IDF_PATH = os.getenv(
+    "EMBED_HASHING_IDF", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_data", "hashing_idf.npy")
+)
+IDF_BUCKETS = 1 << 18
+ONNX_MODEL_DIR = os.getenv("EMBED_ONNX_MODEL_DIR", "")
+ONNX_BATCH_INPUTS = int(os.getenv("EMBED_ONNX_BATCH", "32"))
+ONNX_MAX_TOKENS = 256
+
+
+class Embedder:
+    name = "base"
+    model = "base"
+    # None = no provider-side limit (clustering's MAX_BATCH_* still apply)
+    max_batch_inputs = None
+    max_batch_tokens = None
+    # Dispatch limits (embedding_dispatcher); None = unlimited. Local
+    # providers are CPU-bound, so one batch at a time.
+    requests_per_minute = None
+    tokens_per_minute = None
+    max_in_flight = 1
+    # Cosine similarity at which two articles count as the same story;
+    # depends on the vector space (clustering.SIMILARITY_THRESHOLD)
+    similarity_threshold = 0.65
+
+    def __init__(self):
+        self._counts = {"batches": 0, "texts": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def embed_batch(self, texts: list) -> list:
+        """One vector per text, in order."""
+        raise NotImplementedError
+
+    def embed(self, texts: list) -> list:
+        started = time.perf_counter()
+        vectors = self.embed_batch(texts)
+        with self._lock:
+            self._counts["batches"] += 1
+            self._counts["texts"] += len(texts)
+            self._counts["seconds"] += time.perf_counter() - started
+        return vectors
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        seconds = counts["seconds"]
+        return {
+            "provider": self.name,
+            "model": self.model,
+            **counts,
+            "seconds": round(seconds, 3),
+            "texts_per_second": round(counts["texts"] / seconds, 1) if seconds else None,
+        }
+
+
+# -------------------------------
+# OPENAI
+# -------------------------------
+
+class OpenAIEmbedder(Embedder):
+    name = "openai"
+    max_batch_inputs = 2048     # API limit per request
+    max_batch_tokens = 300000
+    # Tier-dependent account quotas: set EMBED_RPM / EMBED_TPM to yours
+    requests_per_minute = 3000
+    tokens_per_minute = 1000000
+    max_in_flight = 4
+
+    def __init__(self, model: str = EMBED_MODEL):
+        super().__init__()
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        # Built on first use: importing clustering needs no key or network
+        if self._client is None:
+            from openai import OpenAI
+            # Retries belong to embedding_dispatcher (shared backoff on 429s)
+            self._client = OpenAI(max_retries=0)
+        return self._client
+
+    def embed_batch(self, texts: list) -> list:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        # Map results back by index: the API does not promise input order
+        results = [None] * len(texts)
+        for item in response.data:
+            results[item.index] = item.embedding
+        return results
+
+
+# -------------------------------
+# LOCAL: FEATURE HASHING
+# -------------------------------
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+BIGRAM_WEIGHT = 0.5
+
+
+class HashingEmbedder(Embedder):
+    """
+    Word unigrams + bigrams, hashed into `dims` signed buckets (a sparse
+    random projection of the bag of words), log-scaled term counts times
+    IDF, L2-normalized.
+
+    The IDF table (IDF_BUCKETS hashed features) is fitted on stored articles
+    by fit_hashing_idf.py and read from EMBED_HASHING_IDF; without it every
+    feature weighs the same. Its digest is part of `model`, so refitting
+    starts a new vector space (cache entries and thresholds don't mix).
+    """
+
+    name = "hashing"
+
+    def __init__(self, dims: int = HASHING_DIMENSIONS, idf_path: str = HASHING_IDF_PATH):
+        super().__init__()
+        self.dims = dims
+        self.idf = None
+        if idf_path and os.path.exists(idf_path):
+            self.idf = np.load(idf_path).astype(np.float32)
+        self._refresh_model()
+
+    def _refresh_model(self):
+        self.model = f"hashing-v1-{self.dims}"
+        if self.idf is not None:
+            self.model += "-idf" + hashlib.sha256(self.idf.tobytes()).hexdigest()[:8]
+
+    @property
+    def similarity_threshold(self) -> float:
+        # Measured with bench_embedding_providers.py: plain term counts
+        # need a higher cutoff than IDF-weighted ones
+        return 0.5 if self.idf is not None else 0.65
+
+    @staticmethod
+    def features(text: str) -> dict:
+        words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+        counts = {}
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        return counts
+
+    def fit_idf(self, texts: list):
+        """Learn IDF weights from a corpus (then save_idf to keep them)."""
+        df = np.zeros(IDF_BUCKETS, dtype=np.float64)
+        for text in texts:
+            hashes = [zlib.crc32(f.encode()) % IDF_BUCKETS for f in self.features(text)]
+            df[np.unique(np.asarray(hashes, dtype=np.int64))] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        self._refresh_model()
+
+    def save_idf(self, path: str = HASHING_IDF_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.save(f, self.idf)
+
+    def embed_batch(self, texts: list) -> list:
+        rows, hashes, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self.features(text).items():
+                rows.append(row)
+                hashes.append(zlib.crc32(feature.encode()))
+                weights.append((BIGRAM_WEIGHT if " " in feature else 1.0) * (1.0 + math.log(count)))
+
+        hashes = np.asarray(hashes, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        weights[(hashes >> 16) & 1 == 0] *= -1
+        if self.idf is not None:
+            weights *= self.idf[hashes % IDF_BUCKETS]
+
+        slots = np.asarray(rows, dtype=np.int64) * self.dims + hashes % self.dims
+        flat = np.bincount(slots, weights=weights, minlength=len(texts) * self.dims)
+        matrix = flat.reshape(len(texts), self.dims).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+        return list(matrix)
+
+
+# -------------------------------
+# LOCAL: ONNX SENTENCE MODEL
+# -------------------------------
+
+class ONNXEmbedder(Embedder):
+    """
+    A sentence-transformers style model exported to ONNX (e.g. all-MiniLM-L6-v2):
+    model.onnx + tokenizer.json in `model_dir`, mean-pooled over the attention
+    mask. Needs the onnxruntime and tokenizers packages.
+    """
+
+    name = "onnx"
+    max_batch_inputs = ONNX_BATCH_INPUTS
+    similarity_threshold = 0.6
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR):
+        super().__init__()
+        self.model_dir = model_dir
+        self.model = f"onnx-{os.path.basename(os.path.normpath(model_dir))}"
+        self._session = None
+        self._tokenizer = None
+
+    @staticmethod
+    def available(model_dir: str = ONNX_MODEL_DIR) -> bool:
+        if not model_dir or not os.path.exists(os.path.join(model_dir, "model.onnx")):
+            return False
+        try:
+            import onnxruntime  # noqa: F401
+            import tokenizers  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _load(self):
+        if self._session is None:
+            import onnxruntime
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+            tokenizer.enable_truncation(ONNX_MAX_TOKENS)
+            tokenizer.enable_padding()
+            self._tokenizer = tokenizer
+            self._session = onnxruntime.InferenceSession(
+                os.path.join(self.model_dir, "model.onnx"), providers=["CPUExecutionProvider"]
+            )
+            print(f"🧩 Loaded ONNX embedding model from {self.model_dir}")
+
+    def embed_batch(self, texts: list) -> list:
+        self._load()
+        encoded = self._tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        input_names = {i.name for i in self._session.get_inputs()}
+        if "token_type_ids" in input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self._session.run(None, feeds)[0]           # (batch, tokens, dims)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return list(pooled.astype(np.float32))
+
+
+# -------------------------------
+# SELECTION
+# -------------------------------
+
+PROVIDERS = {
+    "openai": OpenAIEmbedder,
+    "hashing": HashingEmbedder,
+    "onnx": ONNXEmbedder,
+}
+
+
+def make_embedder(provider: str = None) -> Embedder:
+    provider = (provider or EMBED_PROVIDER).lower()
+    if provider == "local":
+        provider = "onnx" if ONNXEmbedder.available() else "hashing"
+    if provider == "onnx" and not ONNXEmbedder.available():
+        raise ValueError(
+            "EMBED_PROVIDER=onnx needs EMBED_ONNX_MODEL_DIR with model.onnx and "
+            "tokenizer.json, and the onnxruntime + tokenizers packages"
+        )
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown EMBED_PROVIDER {provider!r} (choose from {', '.join(PROVIDERS)}, local)")
+    return PROVIDERS[provider]()
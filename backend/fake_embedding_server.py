@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI embeddings endpoint
+- POST /v1/embeddings with {"model", "input": str | [str]}
+- Returns deterministic, normalized bag-of-words hashed vectors in the
+  OpenAI response shape, so similar texts get similar embeddings
+- Counts requests and inputs so callers can check round trips
+- Optional faults: a requests/min quota answered with 429 + Retry-After,
+  random 429s / 500s, and added latency (see `faults`)
+Run locally: python3 fake_embedding_server.py --port 8765 --rpm 600 --error-rate 0.05
+Then:        OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python3 quick_recluster.py
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+DIMENSIONS = 256
+
+stats = {"requests": 0, "inputs": 0, "throttled": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+# Fault injection, checked per request (set before or while serving)
+faults = {
+    "rpm": 0,              # requests/min quota over a sliding minute; 0 = none
+    "throttle_rate": 0.0,  # fraction of requests answered 429 anyway
+    "error_rate": 0.0,     # fraction answered 500
+    "latency_ms": 0,       # added to every answer
+}
+_recent = deque()  # monotonic times of accepted requests, for the quota
+_rng = random.Random(7)
+
+
+def injected_fault():
+    """(status, retry-after seconds) for this request, or None to serve it."""
+    with _stats_lock:
+        now = time.monotonic()
+        while _recent and now - _recent[0] >= 60:
+            _recent.popleft()
+        if faults["rpm"] and len(_recent) >= faults["rpm"]:
+            stats["throttled"] += 1
+            return 429, 60 - (now - _recent[0])
+        roll = _rng.random()
+        if roll < faults["throttle_rate"]:
+            stats["throttled"] += 1
+            return 429, 1.0
+        if roll < faults["throttle_rate"] + faults["error_rate"]:
+            stats["errors"] += 1
+            return 500, None
+        _recent.append(now)
+    return None
+
+
+def fake_embedding(text: str, dimensions: int = DIMENSIONS) -> list:
+    vec = np.zeros(dimensions, dtype=np.float32)
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+        vec[h % dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec.tolist()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self.send_error(404)
+            return
+
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if faults["latency_ms"]:
+            time.sleep(faults["latency_ms"] / 1000)
+
+        fault = injected_fault()
+        if fault:
+            status, wait = fault
+            body = json.dumps({"error": {"message": "injected fault", "code": status}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if wait is not None:
+                self.send_header("Retry-After", f"{wait:.3f}")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = payload.get("dimensions") or DIMENSIONS
+
+        with _stats_lock:
+            stats["requests"] += 1
+            stats["inputs"] += len(inputs)
+
+        body = json.dumps({
+            "object": "list",
+            "model": payload.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a background thread; returns the server (see server_address)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=0, help="requests/min quota (429 beyond it)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    args = parser.parse_args()
+    faults.update(rpm=args.rpm, throttle_rate=args.throttle_rate,
+                  error_rate=args.error_rate, latency_ms=args.latency_ms)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"🧪 Fake embedding server on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from datetime import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+
+# ============================================================
+# CONTENT-ADDRESSED RAW FEED ARCHIVE
+# ============================================================
+# Every raw feed body the fetcher downloads is kept on disk, in full (a
+# streaming fetch reads past its entry cap when archiving), gzip-compressed:
+#
+#   FEED_ARCHIVE_DIR/<source key>/<sha256 of body>.gz
+#   FEED_ARCHIVE_DIR/index.json
+#
+# The source key is derived from the feed URL (not the DB id), so an
+# archive can be replayed into a fresh database. Identical bodies are
+# stored once. When the archive grows past FEED_ARCHIVE_MAX_MB the oldest
+# snapshots are evicted, but the latest snapshot of every source is kept
+# so replay always has something to read.
+
+FEED_ARCHIVE_ENABLED = os.getenv("FEED_ARCHIVE_ENABLED", "1") == "1"
+FEED_ARCHIVE_DIR = os.getenv(
+    "FEED_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feed_archive")
+)
+FEED_ARCHIVE_MAX_MB = float(os.getenv("FEED_ARCHIVE_MAX_MB", "200"))
+
+
+def source_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+
+class FeedArchive:
+    def __init__(self, root: str = FEED_ARCHIVE_DIR, max_mb: float = FEED_ARCHIVE_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self._index = None
+
+    # ---------- index ----------
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._index = {"snapshots": {}}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    # ---------- write ----------
+
+    def store(self, url: str, body: bytes, content_hash: str = None) -> str:
+        """Archive one raw body. Returns its content hash."""
+        digest = content_hash or hashlib.sha256(body).hexdigest()
+        key = source_key(url)
+        snapshot_id = f"{key}/{digest}"
+        now = datetime.utcnow().isoformat()
+
+        with self._lock:
+            snapshots = self._load_index()["snapshots"]
+
+            if snapshot_id in snapshots:
+                snapshots[snapshot_id]["last_seen_at"] = now
+            else:
+                path = os.path.join(self.root, key, f"{digest}.gz")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path, "wb") as f:
+                    f.write(body)
+
+                snapshots[snapshot_id] = {
+                    "url": url,
+                    "sha256": digest,
+                    "raw_bytes": len(body),
+                    "stored_bytes": os.path.getsize(path),
+                    "fetched_at": now,
+                    "last_seen_at": now,
+                }
+                self._evict()
+
+            self._save_index()
+        return digest
+
+    def _evict(self):
+        """Drop oldest snapshots until under max size, keeping each source's latest."""
+        snapshots = self._index["snapshots"]
+        total = sum(s["stored_bytes"] for s in snapshots.values())
+        if total <= self.max_bytes:
+            return
+
+        latest = {}
+        for sid, s in snapshots.items():
+            if s["url"] not in latest or s["last_seen_at"] > snapshots[latest[s["url"]]]["last_seen_at"]:
+                latest[s["url"]] = sid
+        keep = set(latest.values())
+
+        for sid in sorted(snapshots, key=lambda k: snapshots[k]["last_seen_at"]):
+            if total <= self.max_bytes:
+                break
+            if sid in keep:
+                continue
+            total -= snapshots[sid]["stored_bytes"]
+            try:
+                os.remove(os.path.join(self.root, f"{sid}.gz"))
+            except FileNotFoundError:
+                pass
+            del snapshots[sid]
+
+    # ---------- read ----------
+
+    def latest(self, url: str):
+        """(body, sha256) of the most recently seen snapshot of a feed, or None."""
+        with self._lock:
+            snapshots = self._load_index()["snapshots"]
+            matches = [(sid, s) for sid, s in snapshots.items() if s["url"] == url]
+        if not matches:
+            return None
+
+        sid, snap = max(matches, key=lambda m: m[1]["last_seen_at"])
+        with gzip.open(os.path.join(self.root, f"{sid}.gz"), "rb") as f:
+            return f.read(), snap["sha256"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshots = self._load_index()["snapshots"]
+            return {
+                "snapshots": len(snapshots),
+                "sources": len({s["url"] for s in snapshots.values()}),
+                "stored_mb": round(sum(s["stored_bytes"] for s in snapshots.values()) / 1e6, 2),
+                "raw_mb": round(sum(s["raw_bytes"] for s in snapshots.values()) / 1e6, 2),
+            }
+
+
+archive = FeedArchive()
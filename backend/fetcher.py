@@ -1,9 +1,26 @@
 import feedparser
 import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy.orm import Session
 import crud
+import feed_stream
+from feed_archive import archive, FEED_ARCHIVE_ENABLED
+from matcher import KeywordMatcher
+import simhash
+import relevance
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from urllib.parse import urlparse
+import hashlib
+import multiprocessing
+import os
+import queue
 import re
+import threading
+import time
 
 # ============================================================
 # AI DETECTION — SMART TITLE-FOCUSED (MUCH MORE ACCURATE)
@@ -62,31 +79,44 @@ EXCLUDE_PATTERNS = [
     r"consulting",
 ]
 
-def matches_any(patterns, text):
-    return any(re.search(p, text, re.IGNORECASE) for p in patterns)
+# Compiled once at import; each filter is a single regex scan
+EXCLUDE_MATCHER = KeywordMatcher(EXCLUDE_PATTERNS, regex=True)
+TITLE_MATCHER = KeywordMatcher(TITLE_KEYWORDS)  # substring match, like `k in title`
+SUMMARY_MATCHER = KeywordMatcher(AI_KEYWORDS, regex=True)
 
 
-def is_ai_related(title: str, summary: str) -> bool:
-    """Corrected & balanced — accepts real AI content, blocks junk."""
+def classify_ai_related(title: str, summary: str):
+    """
+    Same decision as is_ai_related, plus the rule that decided it:
+    returns (accepted, "exclude:<rule>" | "title:<rule>" | "summary:<rule>" | None).
+    """
     if not title:
-        return False
+        return False, None
 
     title_l = title.lower()
     summary_l = summary.lower()
 
     # --- HARD EXCLUSIONS ---
-    if matches_any(EXCLUDE_PATTERNS, title_l + " " + summary_l):
-        return False
+    rule = EXCLUDE_MATCHER.search(title_l + " " + summary_l)
+    if rule:
+        return False, f"exclude:{rule}"
 
     # --- PRIORITY: TITLE MATCH ---
-    if any(k in title_l for k in TITLE_KEYWORDS):
-        return True
+    rule = TITLE_MATCHER.search(title_l)
+    if rule:
+        return True, f"title:{rule}"
 
     # --- FALLBACK: SUMMARY KEYWORDS ---
-    if matches_any(AI_KEYWORDS, summary_l):
-        return True
+    rule = SUMMARY_MATCHER.search(summary_l)
+    if rule:
+        return True, f"summary:{rule}"
 
-    return False
+    return False, None
+
+
+def is_ai_related(title: str, summary: str) -> bool:
+    """Corrected & balanced — accepts real AI content, blocks junk."""
+    return classify_ai_related(title, summary)[0]
 
 # ============================================================
 # CLEAN HTML
@@ -100,78 +130,612 @@ def clean_html(raw_html):
     return clean.strip()
 
 # ============================================================
-# MAIN FETCHER LOGIC
+# FETCH CONFIG
 # ============================================================
 
-def fetch_and_store_news(db: Session):
-    sources = crud.get_active_sources(db)
-    new_count = 0
+FETCH_TIMEOUT = 12
+MAX_ENTRIES_PER_SOURCE = 25
 
-    print(f"\n🔄 Fetching from {len(sources)} sources...\n")
+# Concurrent mode: total downloads in flight, and per publisher host
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "16"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "2"))
 
-    HEADERS = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/rss+xml,text/xml,*/*"
-    }
+# Streaming mode: parse while downloading and stop after the entry cap
+FETCH_STREAMING = os.getenv("FETCH_STREAMING", "1") == "1"
+
+# Pipeline mode: >0 moves parsing/cleaning/filtering to a process pool fed
+# through a bounded queue of downloaded payloads
+FETCH_PARSE_WORKERS = int(os.getenv("FETCH_PARSE_WORKERS", "0"))
+PARSE_QUEUE_SIZE = int(os.getenv("FETCH_PARSE_QUEUE_SIZE", "8"))
 
-    for source in sources:
-        print(f"\n📡 Source: {source.name}")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/rss+xml,text/xml,*/*"
+}
+
+# ============================================================
+# HTTP LAYER
+# ============================================================
 
+def make_http_session(pool_size: int = FETCH_CONCURRENCY) -> requests.Session:
+    """Session with a keep-alive pool sized for the concurrent fetcher."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+class HostLimiter:
+    """Caps how many downloads hit the same host at once."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+
+def conditional_headers(source: dict) -> dict:
+    """If-None-Match / If-Modified-Since from the source's last poll."""
+    headers = {}
+    if source.get("etag"):
+        headers["If-None-Match"] = source["etag"]
+    if source.get("last_modified"):
+        headers["If-Modified-Since"] = source["last_modified"]
+    return headers
+
+
+def download_feed(http: requests.Session, source: dict, limiter: HostLimiter = None,
+                  streaming: bool = FETCH_STREAMING) -> dict:
+    """
+    Download one feed. Runs in worker threads, so it never touches the DB.
+    In streaming mode the body is parsed as it arrives and the download
+    stops at MAX_ENTRIES_PER_SOURCE; `entries` is then filled here and the
+    content hash covers only the bytes actually read. With the feed archive
+    on, the rest of the body is still read so the snapshot (and the hash)
+    is the full document the server sent.
+    """
+    result = {
+        "source": source, "status": None, "content": None, "entries": None,
+        "error": None, "unchanged": False,
+        "etag": None, "last_modified": None, "content_hash": None,
+    }
+    started = time.perf_counter()
+
+    try:
+        if limiter:
+            with limiter.slot(source["url"]):
+                read_response(http, source, result, streaming)
+        else:
+            read_response(http, source, result, streaming)
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+
+def read_response(http: requests.Session, source: dict, result: dict, streaming: bool):
+    response = http.get(
+        source["url"],
+        headers=conditional_headers(source),
+        timeout=FETCH_TIMEOUT,
+        stream=streaming,
+    )
+    result["status"] = response.status_code
+
+    if response.status_code != 200:
+        result["unchanged"] = response.status_code == 304
+        response.close()
+        return
+
+    result["etag"] = response.headers.get("ETag")
+    result["last_modified"] = response.headers.get("Last-Modified")
+
+    if streaming:
+        entries, result["content_hash"], body = feed_stream.read_feed(
+            response, MAX_ENTRIES_PER_SOURCE, drain=FEED_ARCHIVE_ENABLED
+        )
+        # Not well-formed XML: hand the full body to feedparser instead
+        if entries:
+            result["entries"] = entries
+        else:
+            result["content"] = body
+    else:
+        body = response.content
+        result["content_hash"] = hashlib.sha256(body).hexdigest()
+        result["content"] = body
+
+    if FEED_ARCHIVE_ENABLED:
         try:
-            response = requests.get(source.url, headers=HEADERS, timeout=12)
+            archive.store(source["url"], body, result["content_hash"])
+        except OSError as e:
+            print(f"⚠️ Could not archive {source['name']}: {e}")
+
+    # Same bytes as last time → nothing to parse or store
+    if result["content_hash"] == source.get("content_hash"):
+        result["unchanged"] = True
+        result["content"] = result["entries"] = None
+
+
+def replay_feed(source: dict, streaming: bool = FETCH_STREAMING) -> dict:
+    """
+    Offline stand-in for download_feed(): serve the source's latest
+    archived body instead of hitting the network.
+    """
+    result = {
+        "source": source, "status": None, "content": None, "entries": None,
+        "error": None, "unchanged": False, "replay": True,
+        "etag": None, "last_modified": None, "content_hash": None, "elapsed": 0.0,
+    }
 
-            if response.status_code != 200:
-                print(f"⚠️ HTTP {response.status_code}")
-                continue
+    snapshot = archive.latest(source["url"])
+    if snapshot is None:
+        result["error"] = "not in feed archive"
+        return result
 
-            feed = feedparser.parse(response.content)
+    body, result["content_hash"] = snapshot
+    result["status"] = 200
+
+    entries = feed_stream.parse_bytes([body], MAX_ENTRIES_PER_SOURCE) if streaming else []
+    if entries:
+        result["entries"] = entries
+    else:
+        result["content"] = body
+    return result
 
-            if not feed.entries:
-                print("⚠️ No entries returned from feed")
-                continue
 
-            for entry in feed.entries[:25]:  # Fetch more items
-                title = clean_html(getattr(entry, "title", ""))
-                link = getattr(entry, "link", "")
-                summary = clean_html(
-                    getattr(entry, "summary", "") or
-                    getattr(entry, "description", "")
-                )
+# ============================================================
+# FILTER + STORE
+# ============================================================
 
-                # Include full content if provided
-                parts = [title, summary]
-                if hasattr(entry, "content"):
-                    for c in entry.content:
-                        parts.append(clean_html(c.value))
+def normalize_entry(entry) -> dict:
+    """feedparser entry → the plain dict shape feed_stream also produces."""
+    return {
+        "title": getattr(entry, "title", ""),
+        "link": getattr(entry, "link", ""),
+        "summary": getattr(entry, "summary", "") or getattr(entry, "description", ""),
+        "content": [c.value for c in getattr(entry, "content", [])],
+    }
 
-                full_summary = " ".join(parts)
 
-                # Filter NON-AI posts
-                if not is_ai_related(title, full_summary):
-                    print(f"   ⏩ Skipped: {title[:70]}")
+def parse_feed(content: bytes, limit: int = MAX_ENTRIES_PER_SOURCE) -> list:
+    """Full (non-streaming) parse with feedparser."""
+    feed = feedparser.parse(content)
+    return [normalize_entry(e) for e in feed.entries[:limit]]
+
+
+def extract_candidates(entries: list, source_id: int):
+    """
+    CPU stage: clean + filter + classify a feed's entries (relevance.py).
+    Pure function (no DB), so it can run in the parse process pool.
+    Returns (candidate rows, titles of skipped non-AI entries).
+    """
+    candidates = {}
+    skipped = []
+    for entry in entries[:MAX_ENTRIES_PER_SOURCE]:  # Fetch more items
+        title = clean_html(entry["title"])
+        link = entry["link"]
+        summary = clean_html(entry["summary"])
+
+        # Include full content if provided
+        parts = [title, summary]
+        for value in entry["content"]:
+            parts.append(clean_html(value))
+
+        full_summary = " ".join(parts)
+
+        # Filter NON-AI posts
+        if not is_ai_related(title, full_summary):
+            skipped.append(title)
+            continue
+
+        if link in candidates:
+            continue
+
+        candidates[link] = {
+            "title": title,
+            "summary": summary or title,
+            "url": link,
+            "source_id": source_id,
+            "published_at": datetime.utcnow(),  # naive UTC, like every stored timestamp
+            "simhash": simhash.to_signed(simhash.simhash(f"{title} {summary}")),
+            **relevance.classify(title, summary or title),
+        }
+
+    return list(candidates.values()), skipped
+
+
+def needs_parsing(result: dict) -> bool:
+    return (
+        not result["error"]
+        and result["status"] == 200
+        and not result["unchanged"]
+        and "candidates" not in result
+        and "parse_error" not in result
+    )
+
+
+def prepare_result(result: dict) -> dict:
+    """
+    Parse/clean/filter a downloaded feed, in place. Runs inline or in the
+    parse pool; only the normalized candidates travel back, not the raw body.
+    """
+    if not needs_parsing(result):
+        return result
+
+    try:
+        entries = result["entries"]
+        if entries is None:
+            entries = parse_feed(result["content"])
+        result["entry_count"] = len(entries)
+        result["candidates"], result["skipped"] = extract_candidates(entries, result["source"]["id"])
+    except Exception as e:
+        result["parse_error"] = str(e)
+
+    result["content"] = result["entries"] = None
+    return result
+
+
+def store_candidates(db: Session, candidates: list, near_dups: simhash.SimHashIndex = None,
+                     stats: dict = None) -> int:
+    """
+    DB stage: store the new candidate rows of one feed.
+    Existing URLs are resolved with one query and new rows go in with one
+    INSERT; the caller commits once for the whole feed. Near-duplicates of
+    recently stored articles from other sources (syndicated copies under
+    another URL) are dropped before they reach clustering: a SimHash hit is
+    confirmed by shingle Jaccard >= simhash.MIN_JACCARD, and every drop is
+    logged and counted.
+    """
+    by_url = {c["url"]: c for c in candidates}
+
+    # Skip duplicates (one set-based lookup for the whole feed)
+    existing = crud.get_existing_urls(db, by_url.keys())
+    for url in existing:
+        print(f"   ⚪ Duplicate: {by_url.pop(url)['title'][:70]}")
+
+    # Skip near-duplicates. Only other sources count: one feed's templated
+    # headlines are separate stories, not syndicated copies.
+    if near_dups is not None:
+        hits = {}
+        for url, row in by_url.items():
+            hits[url] = [(label, distance) for label, distance in near_dups.matches(simhash.to_unsigned(row["simhash"]))
+                         if label[1] != row["source_id"]]
+        texts = crud.get_texts_by_url(db, {label[0] for found in hits.values() for label, _ in found})
+
+        for url, row in list(by_url.items()):
+            text = f"{row['title']} {row['summary']}"
+            for (other_url, _), distance in hits[url]:
+                if other_url not in texts:
                     continue
+                overlap = simhash.jaccard(text, texts[other_url])
+                if overlap >= simhash.MIN_JACCARD:
+                    del by_url[url]
+                    if stats is not None:
+                        stats["near_duplicates"] += 1
+                    print(f"   🟰 Near-duplicate (Δ{distance} bits, Jaccard {overlap:.2f} with {other_url[:60]}): "
+                          f"{row['title'][:50]}")
+                    break
+            else:
+                if hits[url] and stats is not None:
+                    stats["near_duplicates_kept"] += 1
+
+    # Store items
+    inserted = crud.bulk_create_news_items(db, list(by_url.values()), commit=False)
+    for _, url in inserted:
+        print(f"   ✅ Saved: {by_url[url]['title'][:80]}")
+
+    # Only rows that were really stored join the index: a feed whose insert
+    # failed (and was rolled back) must not hide copies in later feeds
+    if near_dups is not None:
+        for _, url in inserted:
+            near_dups.add(simhash.to_unsigned(by_url[url]["simhash"]), (url, by_url[url]["source_id"]))
+
+    return len(inserted)
+
+
+def handle_download(db: Session, result: dict, stats: dict,
+                    near_dups: simhash.SimHashIndex = None, progress=None) -> int:
+    """
+    Report a finished download, pass its payload to the store step and
+    feed the outcome into the source's polling schedule.
+    `progress(**counters)`, if given, hears about every finished source.
+    """
+    source = result["source"]
+    status = result["status"]
+    print(f"\n📡 Source: {source['name']}  ({result['elapsed']:.1f}s)")
+
+    outcome = {
+        "ok": False, "status": "error", "new_items": 0,
+        "elapsed_ms": result["elapsed"] * 1000, "error": None,
+    }
 
-                # Skip duplicates
-                if crud.news_exists(db, link):
-                    print(f"   ⚪ Duplicate: {title[:70]}")
-                    continue
+    if result["error"]:
+        stats["errors"] += 1
+        print(f"❌ Error in {source['name']}: {result['error']}")
+        outcome["error"] = result["error"]
+
+    elif status not in (200, 304):
+        stats["errors"] += 1
+        print(f"⚠️ HTTP {status}")
+        outcome.update(status=f"http_{status}", error=f"HTTP {status}")
+
+    else:
+        # Replays come from the archive: leave the live poll state alone
+        if not result.get("replay"):
+            crud.update_source_validators(
+                db,
+                source["id"],
+                etag=result["etag"],
+                last_modified=result["last_modified"],
+                content_hash=result["content_hash"],
+                fetched_at=datetime.utcnow(),
+            )
+
+        if result["unchanged"]:
+            stats["unchanged"] += 1
+            reason = "304 Not Modified" if status == 304 else "same content hash"
+            print(f"   💤 Unchanged ({reason})")
+            outcome.update(ok=True, status="unchanged")
+        else:
+            stats["parsed"] += 1
+            # No-op when the parse pool already did this
+            result = prepare_result(result)
+            try:
+                if result.get("parse_error"):
+                    raise ValueError(result["parse_error"])
+
+                if not result["entry_count"]:
+                    print("⚠️ No entries returned from feed")
+                for title in result["skipped"]:
+                    print(f"   ⏩ Skipped: {title[:70]}")
 
-                # Store item
-                item = crud.create_news_item(
-                    db=db,
-                    title=title,
-                    summary=summary or title,
-                    url=link,
-                    source_id=source.id,
-                    published_at=datetime.now(),
-                )
+                saved = store_candidates(db, result["candidates"], near_dups, stats)
+                outcome.update(ok=True, status="ok", new_items=saved)
+            except Exception as e:
+                db.rollback()
+                stats["errors"] += 1
+                print(f"❌ Error in {source['name']}: {e}")
+                outcome["error"] = str(e)
 
-                if item:
-                    new_count += 1
-                    print(f"   ✅ Saved: {title[:80]}")
+    if not result.get("replay"):
+        crud.record_poll_outcome(db, source["id"], outcome)
+    db.commit()  # validators + new rows + schedule: one transaction per feed
 
-        except Exception as e:
-            print(f"❌ Error in {source.name}: {e}")
+    stats["sources_done"] += 1
+    stats["new_items"] += outcome["new_items"]
+    if progress:
+        progress(sources_done=stats["sources_done"], sources_total=stats["sources"],
+                 new_items=stats["new_items"])
+    return outcome["new_items"]
 
-    print(f"\n🏁 Done. Saved {new_count} new items.\n")
+
+# ============================================================
+# DOWNLOAD → PARSE POOL → DB PIPELINE
+# ============================================================
+
+_parse_pool = None
+_parse_pool_workers = 0
+
+
+def discard_parse_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool (a worker died); the next get_parse_pool starts a new one."""
+    global _parse_pool
+    pool.shutdown(wait=False, cancel_futures=True)
+    if _parse_pool is pool:
+        _parse_pool = None
+
+
+def parse_failed(result: dict, error: Exception) -> dict:
+    """A download whose parse raised in the pool → a parse_error result for handle_download."""
+    result.update(parse_error=f"parse worker failed: {error!r}", content=None, entries=None)
+    return result
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Long-lived process pool (spawned, never forked from a threaded app)."""
+    global _parse_pool, _parse_pool_workers
+    if _parse_pool is None or _parse_pool_workers != workers:
+        if _parse_pool is not None:
+            _parse_pool.shutdown()
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _parse_pool_workers = workers
+    return _parse_pool
+
+
+def run_pipeline(db: Session, http: requests.Session, sources: list, stats: dict,
+                 max_workers: int, per_host: int, parse_workers: int,
+                 near_dups: simhash.SimHashIndex = None, progress=None) -> int:
+    """
+    Download threads put raw payloads on a bounded queue (they block when
+    parsing falls behind); this thread hands them to the parse pool and
+    writes the normalized candidates that come back to the DB.
+
+    A parse that fails in the pool (even a killed worker) becomes that
+    feed's parse_error. Any other error stops the download threads before
+    it propagates, so none stays blocked on the full queue.
+    """
+    downloads = queue.Queue(maxsize=PARSE_QUEUE_SIZE)
+    limiter = HostLimiter(per_host)
+    max_in_flight = parse_workers * 2
+    cancelled = threading.Event()
+    new_count = 0
+
+    def download_to_queue(source):
+        if cancelled.is_set():
+            return
+        result = download_feed(http, source, limiter)
+        while not cancelled.is_set():
+            try:
+                downloads.put(result, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def submit_parse(result):
+        pool = get_parse_pool(parse_workers)
+        try:
+            return pool.submit(prepare_result, result), pool
+        except BrokenProcessPool:
+            discard_parse_pool(pool)
+            pool = get_parse_pool(parse_workers)
+            return pool.submit(prepare_result, result), pool
+
+    with ThreadPoolExecutor(max_workers=max_workers) as io_pool:
+        for source in sources:
+            io_pool.submit(download_to_queue, source)
+
+        try:
+            received = 0
+            parsing = {}  # future → (downloaded result, pool)
+            while received < len(sources) or parsing:
+                # Move downloads into the parse pool while it has room
+                while received < len(sources) and len(parsing) < max_in_flight:
+                    try:
+                        result = downloads.get(timeout=0.05 if parsing else None)
+                    except queue.Empty:
+                        break
+                    received += 1
+                    if needs_parsing(result):
+                        future, pool = submit_parse(result)
+                        parsing[future] = (result, pool)
+                    else:
+                        new_count += handle_download(db, result, stats, near_dups, progress)
+
+                if parsing:
+                    done, _ = wait(parsing, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result, pool = parsing.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool as e:
+                            discard_parse_pool(pool)
+                            result = parse_failed(result, e)
+                        except Exception as e:
+                            result = parse_failed(result, e)
+                        new_count += handle_download(db, result, stats, near_dups, progress)
+        except BaseException:
+            # Unblock the download threads so the pool can shut down
+            cancelled.set()
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return new_count
+
+
+# ============================================================
+# MAIN FETCHER LOGIC
+# ============================================================
+
+# Counters from the most recent fetch_and_store_news() call
+last_run_stats = {}
+
+
+def new_run_stats(total_sources: int) -> dict:
+    return {
+        "sources": total_sources,
+        "sources_done": 0,
+        "unchanged": 0,
+        "parsed": 0,
+        "errors": 0,
+        "near_duplicates": 0,
+        "near_duplicates_kept": 0,  # SimHash hits the Jaccard check did not confirm
+        "new_items": 0,
+        "elapsed": 0.0,
+    }
+
+
+def fetch_and_store_news(db: Session, concurrent: bool = True,
+                         max_workers: int = None, per_host: int = None, sources=None,
+                         parse_workers: int = None, replay: bool = False, progress=None):
+    """
+    Download `sources` (default: every active source whose circuit breaker
+    is not open) and store new AI items.
+
+    With `replay=True` nothing is downloaded: each source's latest body
+    from the feed archive goes through the same parse/filter/store steps.
+
+    In concurrent mode downloads run on a thread pool (global limit
+    `max_workers`, per-host limit `per_host`) over pooled keep-alive
+    connections; each feed is filtered and stored on this thread as soon
+    as it arrives, so the DB session is never shared across threads.
+    With `parse_workers` > 0, parsing/cleaning/filtering moves to a
+    process pool (see run_pipeline).
+
+    `progress(**counters)` is called after every source (see jobs.py).
+    """
+    max_workers = max_workers or FETCH_CONCURRENCY
+    per_host = per_host or FETCH_PER_HOST_LIMIT
+    parse_workers = FETCH_PARSE_WORKERS if parse_workers is None else parse_workers
+
+    # Plain dicts: ORM rows must not cross into the download threads
+    sources = [
+        {
+            "id": s.id, "name": s.name, "url": s.url,
+            "etag": s.etag, "last_modified": s.last_modified,
+            "content_hash": s.content_hash,
+        }
+        for s in (sources if sources is not None else
+                  crud.get_active_sources(db) if replay else
+                  crud.get_pollable_sources(db))
+    ]
+    new_count = 0
+    stats = new_run_stats(len(sources))
+    started = time.perf_counter()
+    near_dups = crud.load_simhash_index(db)
+
+    mode = f"concurrent x{max_workers}" if concurrent else "sequential"
+    if concurrent and parse_workers:
+        mode += f", {parse_workers} parse processes"
+    if replay:
+        mode = "offline replay from feed archive"
+    print(f"\n🔄 Fetching from {len(sources)} sources ({mode})...\n")
+
+    http = make_http_session(max_workers)
+    try:
+        if replay:
+            for source in sources:
+                new_count += handle_download(db, replay_feed(source), stats, near_dups, progress)
+        elif not concurrent:
+            for source in sources:
+                new_count += handle_download(db, download_feed(http, source), stats, near_dups, progress)
+        elif parse_workers:
+            new_count += run_pipeline(
+                db, http, sources, stats, max_workers, per_host, parse_workers, near_dups, progress
+            )
+        else:
+            limiter = HostLimiter(per_host)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [
+                    pool.submit(download_feed, http, source, limiter)
+                    for source in sources
+                ]
+                for future in as_completed(futures):
+                    new_count += handle_download(db, future.result(), stats, near_dups, progress)
+    finally:
+        http.close()
+
+    elapsed = time.perf_counter() - started
+    stats["new_items"] = new_count
+    stats["elapsed"] = round(elapsed, 2)
+    last_run_stats.clear()
+    last_run_stats.update(stats)
+
+    print(
+        f"\n🏁 Done. Saved {new_count} new items in {elapsed:.1f}s "
+        f"({stats['unchanged']} unchanged, {stats['parsed']} parsed, "
+        f"{stats['errors']} failed, {stats['near_duplicates']} near-duplicates dropped, "
+        f"{stats['near_duplicates_kept']} near-duplicate candidates kept).\n"
+    )
     return new_count
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fit the IDF table for the local hashing embedder (EMBED_PROVIDER=hashing)
+- Reads title + summary of the stored AI articles (relevance verdict)
+- Learns IDF weights and writes them to EMBED_HASHING_IDF
+- The new table is a new vector space: recluster afterwards
+  (POST /reset-clustering?mode=batch) so topics use it too
+Run in Render Shell: python3 fit_hashing_idf.py [--limit 50000]
+"""
+
+import argparse
+
+from database import SessionLocal, engine
+import models
+import migrate
+import relevance
+import embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=50000, help="newest N articles")
+    parser.add_argument("--out", default=embeddings.HASHING_IDF_PATH)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔤 FIT HASHING EMBEDDER IDF")
+    print("=" * 60)
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        if relevance.needs_reclassify(db):
+            relevance.reclassify(db)
+        articles = db.query(models.NewsItem).filter(
+            models.NewsItem.relevant == True
+        ).order_by(models.NewsItem.id.desc()).limit(args.limit).all()
+        texts = [f"{a.title}. {a.summary}" for a in articles]
+    finally:
+        db.close()
+
+    if not texts:
+        print("⚠️ No articles to fit on")
+        return
+
+    embedder = embeddings.HashingEmbedder(idf_path="")
+    embedder.fit_idf(texts)
+    embedder.save_idf(args.out)
+    print(f"✓ Fitted on {len(texts)} articles → {args.out}")
+    print(f"   Model: {embedder.model} (similarity threshold {embedder.similarity_threshold})")
+    print("   Next: POST /reset-clustering?mode=batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,10 @@ COMPLETE FRESH START - Delete everything and reload
 Run in Render Shell: python3 fresh_start.py
 """
 
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+import migrate
+import topic_stats
 import fetcher
 import clustering
 import sys
@@ -20,6 +22,9 @@ def main():
     print("\n⚠️  WARNING: This will delete ALL articles and topics!")
     print("   A fresh dataset will be fetched from all 40 sources.\n")
     
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Step 1: Show current state
@@ -40,6 +45,7 @@ def main():
         
         # Step 3: Delete all topics
         print(f"\n🗑️  Step 2: Deleting all topics...")
+        topic_stats.clear(db)
         deleted_topics = db.query(models.Topic).delete()
         db.commit()
         print(f"   ✓ Deleted {deleted_topics} topics")
@@ -117,9 +123,7 @@ def main():
         ).limit(15).all()
         
         for i, topic in enumerate(top_topics, 1):
-            article_count = db.query(models.NewsItem).filter_by(
-                topic_id=topic.id
-            ).count()
+            article_count = topic.article_count or 0
             
             # Get the first article title for display
             first_article = db.query(models.NewsItem).filter_by(
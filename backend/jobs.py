@@ -0,0 +1,186 @@
+from collections import OrderedDict
+from datetime import datetime
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+from database import SessionLocal
+import scheduler
+
+
+# ============================================================
+# BACKGROUND JOB RUNNER
+# ============================================================
+# Fetching, embedding and clustering take minutes, so the HTTP endpoints
+# no longer run them inline: they submit a job and return its id, and
+# one worker thread runs jobs in order under scheduler.pipeline_lock
+# (never alongside a scheduler tick). GET /jobs/{id} shows status,
+# progress counters and timing.
+#
+# Submitting a job type that is already queued or running returns that
+# job instead of queueing a duplicate (coalescing); submitting while a job
+# of a `conflicts` type is unfinished raises JobConflict. Finished jobs are
+# kept in memory, JOB_HISTORY at most.
+
+JOB_HISTORY = 100
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class JobConflict(Exception):
+    """A job of a conflicting type is already queued or running."""
+
+    def __init__(self, job):
+        super().__init__(f"{job.type} job {job.id} is {job.status}")
+        self.job = job
+
+
+class Job:
+    def __init__(self, job_type: str, fn):
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.fn = fn
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.coalesced = 0  # duplicate submissions folded into this job
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def report(self, **counters):
+        """Progress callback handed to the job function."""
+        with self._lock:
+            self.progress.update(counters)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            progress = dict(self.progress)
+        end = self.finished_at or datetime.utcnow()
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status,
+            "progress": progress,
+            "result": self.result,
+            "error": self.error,
+            "coalesced": self.coalesced,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round(((self.started_at or end) - self.created_at).total_seconds(), 2),
+            "run_seconds": round((end - self.started_at).total_seconds(), 2) if self.started_at else None,
+        }
+
+
+class JobRunner:
+    def __init__(self, history: int = JOB_HISTORY):
+        self.history = history
+        self._jobs = OrderedDict()  # id → Job, oldest first
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+        print("🧵 Job runner started")
+
+    def stop(self):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    # ---------- submit / lookup ----------
+
+    def submit(self, job_type: str, fn, conflicts=()) -> Job:
+        """
+        Queue `fn(db, progress) -> result dict` as a job of `job_type`,
+        or return the queued/running job of that type. Raises JobConflict
+        if a job of one of the `conflicts` types is queued or running.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.type in conflicts and not job.finished:
+                    raise JobConflict(job)
+            for job in self._jobs.values():
+                if job.type == job_type and not job.finished:
+                    job.coalesced += 1
+                    return job
+
+            job = Job(job_type, fn)
+            self._jobs[job.id] = job
+            self._trim()
+        self._queue.put(job)
+        if not self.running:
+            self.start()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 20) -> list:
+        with self._lock:
+            return list(self._jobs.values())[-limit:][::-1]
+
+    def _trim(self):
+        finished = [jid for jid, job in self._jobs.items() if job.finished]
+        for jid in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[jid]
+
+    # ---------- worker ----------
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                continue
+            self._run(job)
+
+    def _run(self, job: Job):
+        db = SessionLocal()
+        try:
+            with scheduler.pipeline_lock:
+                job.started_at = datetime.utcnow()
+                job.status = RUNNING
+                started = time.perf_counter()
+                print(f"\n🧵 Job {job.id} ({job.type}) started")
+                job.result = job.fn(db, job.report)
+                job.status = SUCCEEDED
+                print(f"🧵 Job {job.id} ({job.type}) done in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            db.rollback()
+            job.status = FAILED
+            job.error = str(e)
+            print(f"❌ Job {job.id} ({job.type}) failed: {e}")
+            traceback.print_exc()
+        finally:
+            db.close()
+            job.finished_at = datetime.utcnow()
+            job._done.set()
+
+
+job_runner = JobRunner()
@@ -8,7 +8,16 @@ import models
 import crud
 import fetcher
 import clustering
+import batch_recluster
+import embedding_cache
 import seed
+import migrate
+import scheduler
+import jobs
+import topic_stats
+import popularity
+import relevance
+import topic_maintenance
 
 from database import engine, get_db
 
@@ -25,6 +34,8 @@ class BroadcastRequest(BaseModel):
 # INITIAL SETUP
 # ------------------------------------------------------
 models.Base.metadata.create_all(bind=engine)
+migrate.upgrade_schema(engine)
+migrate.convert_json_embeddings(engine)
 
 app = FastAPI(title="AI News Dashboard Backend", version="2.0")
 
@@ -46,6 +57,7 @@ app.add_middleware(
 # ------------------------------------------------------
 @app.on_event("startup")
 def startup_event():
+    reconcile_pending = reclassify_pending = False
     db = next(get_db())
     try:
         existing_sources = db.query(models.Source).first()
@@ -63,9 +75,28 @@ def startup_event():
             print("✅ System Ready!")
         else:
             print("⚡ Backend Ready — DB Already Initialized.")
+            # Topic counters added by an upgrade (or never filled)
+            reconcile_pending = topic_stats.needs_reconcile(db)
+            # Relevance verdicts missing, or from an older FILTER_VERSION
+            reclassify_pending = relevance.needs_reclassify(db)
     finally:
         db.close()
 
+    jobs.job_runner.start()
+    if reconcile_pending:
+        jobs.job_runner.submit("reconcile-topics", reconcile_job)
+    if reclassify_pending:
+        jobs.job_runner.submit("reclassify-articles", reclassify_job)
+
+    if scheduler.SCHEDULER_ENABLED:
+        scheduler.poll_scheduler.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    scheduler.poll_scheduler.stop()
+    jobs.job_runner.stop()
+
 
 # ------------------------------------------------------
 # ROOT CHECK
@@ -114,6 +145,8 @@ def get_topics(db: Session = Depends(get_db)):
             "title": first_title,  # Use actual article title (not AI-generated cluster name)
             "summary": topic.summary,
             "popularity_score": topic.popularity_score,
+            "article_count": topic.article_count,
+            "source_count": topic.distinct_source_count,
             "url": first_url,
             "articles": articles,
         })
@@ -147,26 +180,63 @@ def toggle_favorite(news_id: int, db: Session = Depends(get_db)):
 # ------------------------------------------------------
 # FETCH NEW NEWS + RECLUSTER (MANUAL REFRESH)
 # ------------------------------------------------------
+def fetch_job(db: Session, progress) -> dict:
+    print("\n⚡ Running News Fetcher...\n")
+    inserted = fetcher.fetch_and_store_news(db, progress=progress)
+    print(f"📰 Saved {inserted} new articles.")
+
+    print("\n🧠 Running Semantic AI Topic Clustering...")
+    topics_created = clustering.run_clustering(db, progress=progress)
+    print(f"📌 Created {topics_created} new topics.")
+
+    return {
+        "new_items_saved": inserted,
+        "topics_created": topics_created,
+        "sources_unchanged": fetcher.last_run_stats.get("unchanged", 0),
+        "fetch_stats": dict(fetcher.last_run_stats),
+    }
+
+
+def job_response(job, wait: bool) -> dict:
+    """Return the job's status; with wait=true block until it finishes
+    and answer like the old synchronous endpoint."""
+    if not wait:
+        return {"status": job.status, "job_id": job.id, "job": job.to_dict()}
+
+    job.wait()
+    if job.status == jobs.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    return {"status": "ok", "job_id": job.id, **job.result}
+
+
 @app.post("/fetch-news")
-def trigger_fetch(db: Session = Depends(get_db)):
-    try:
-        print("\n⚡ Running News Fetcher...\n")
-        inserted = fetcher.fetch_and_store_news(db)
-        print(f"📰 Saved {inserted} new articles.")
+def trigger_fetch(wait: bool = False):
+    job = jobs.job_runner.submit("fetch-news", fetch_job)
+    return job_response(job, wait)
 
-        print("\n🧠 Running Semantic AI Topic Clustering...")
-        topics_created = clustering.run_clustering(db)
-        print(f"📌 Created {topics_created} new topics.")
 
-        return {
-            "status": "ok",
-            "new_items_saved": inserted,
-            "topics_created": topics_created
-        }
+# ------------------------------------------------------
+# BACKGROUND JOBS
+# ------------------------------------------------------
+@app.get("/jobs")
+def list_jobs(limit: int = 20):
+    return [job.to_dict() for job in jobs.job_runner.recent(limit)]
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = jobs.job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+# ------------------------------------------------------
+# POLL SCHEDULER STATE (per-source intervals, circuit breakers)
+# ------------------------------------------------------
+@app.get("/scheduler")
+def scheduler_status(db: Session = Depends(get_db)):
+    return scheduler.poll_scheduler.status(db)
 
-    except Exception as e:
-        print("❌ Fetch/Cluster Error:", str(e))
-        raise HTTPException(status_code=500, detail=str(e))
 
 # ------------------------------------------------------
 # DIAGNOSE DATABASE STATE
@@ -178,14 +248,16 @@ def diagnose_database(db: Session = Depends(get_db)):
         total_articles = db.query(models.NewsItem).count()
         linked_articles = db.query(models.NewsItem).filter(models.NewsItem.topic_id != None).count()
         unlinked_articles = db.query(models.NewsItem).filter(models.NewsItem.topic_id == None).count()
+        rejected_articles = db.query(models.NewsItem).filter(models.NewsItem.relevant == False).count()
         
         # Get sample topics with article counts
-        topics_sample = db.query(models.Topic).options(joinedload(models.Topic.articles)).limit(5).all()
+        topics_sample = db.query(models.Topic).limit(5).all()
         topics_info = [
             {
                 "id": t.id,
                 "title": t.title[:50],
-                "article_count": len(t.articles),
+                "article_count": t.article_count,
+                "distinct_source_count": t.distinct_source_count,
                 "popularity_score": t.popularity_score
             }
             for t in topics_sample
@@ -196,9 +268,14 @@ def diagnose_database(db: Session = Depends(get_db)):
                 "total_topics": total_topics,
                 "total_articles": total_articles,
                 "linked_articles": linked_articles,
-                "unlinked_articles": unlinked_articles
+                "unlinked_articles": unlinked_articles,
+                "rejected_articles": rejected_articles,
+                "filter_version": relevance.FILTER_VERSION
             },
             "sample_topics": topics_info,
+            "embedding_cache": embedding_cache.cache.stats(),
+            "embedding_provider": clustering.embedder.stats(),
+            "embedding_dispatcher": clustering.dispatcher.stats(),
             "diagnosis": "Check if topics have 0 articles - that's the bug"
         }
     except Exception as e:
@@ -208,40 +285,111 @@ def diagnose_database(db: Session = Depends(get_db)):
 # ------------------------------------------------------
 # FORCE RE-CLUSTER ALL ARTICLES (FIX DATABASE)
 # ------------------------------------------------------
+def batch_reset_job(db: Session, progress) -> dict:
+    # One vectorized pass over all stored embeddings
+    print("\n🧮 Batch reclustering all articles...")
+    stats = batch_recluster.batch_recluster(db, progress=progress)
+    return {
+        "message": "Database reset and re-clustered (batch)",
+        "topics_created": stats["batch"].get("topics", 0),
+        "articles_linked": stats["articles"],
+        "total_articles": db.query(models.NewsItem).count(),
+        "batch_stats": stats,
+    }
+
+
+def greedy_reset_job(db: Session, progress) -> dict:
+    print("\n🔄 Resetting all topic assignments...")
+
+    # Clear all topic_id assignments
+    db.query(models.NewsItem).update({"topic_id": None})
+    db.commit()
+    print("✔ Cleared all article-topic links")
+
+    # Delete all existing topics
+    topic_stats.clear(db)
+    deleted = db.query(models.Topic).delete()
+    db.commit()
+    print(f"✔ Deleted {deleted} old topics")
+
+    # Re-run clustering (this might take a while due to OpenAI API calls)
+    print("\n🧠 Running fresh clustering (this may take 1-2 minutes)...")
+    clustering.run_clustering(db, progress=progress)
+
+    return {
+        "message": "Database reset and re-clustered",
+        "topics_created": db.query(models.Topic).count(),
+        "articles_linked": db.query(models.NewsItem).filter(models.NewsItem.topic_id != None).count(),
+        "total_articles": db.query(models.NewsItem).count(),
+    }
+
+
 @app.post("/reset-clustering")
-def reset_clustering(db: Session = Depends(get_db)):
+def reset_clustering(mode: str = "greedy", wait: bool = False):
+    if mode not in ("greedy", "batch"):
+        raise HTTPException(status_code=400, detail="mode must be 'greedy' or 'batch'")
+
+    # Same-mode requests coalesce; a reset in the other mode already queued
+    # or running is a conflict (both rebuild every topic)
+    other = "greedy" if mode == "batch" else "batch"
+    fn = batch_reset_job if mode == "batch" else greedy_reset_job
     try:
-        print("\n🔄 Resetting all topic assignments...")
-        
-        # Clear all topic_id assignments
-        db.query(models.NewsItem).update({"topic_id": None})
-        db.commit()
-        print("✔ Cleared all article-topic links")
-        
-        # Delete all existing topics
-        deleted = db.query(models.Topic).delete()
-        db.commit()
-        print(f"✔ Deleted {deleted} old topics")
-        
-        # Re-run clustering (this might take a while due to OpenAI API calls)
-        print("\n🧠 Running fresh clustering (this may take 1-2 minutes)...")
-        clustering.run_clustering(db)
-        
-        # Count results
-        total_topics = db.query(models.Topic).count()
-        linked_articles = db.query(models.NewsItem).filter(models.NewsItem.topic_id != None).count()
-        total_articles = db.query(models.NewsItem).count()
-        
-        return {
-            "status": "success",
-            "message": "Database reset and re-clustered",
-            "topics_created": total_topics,
-            "articles_linked": linked_articles,
-            "total_articles": total_articles
-        }
-    except Exception as e:
-        print(f"❌ Reset Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        job = jobs.job_runner.submit(f"reset-clustering:{mode}", fn, conflicts=(f"reset-clustering:{other}",))
+    except jobs.JobConflict as e:
+        raise HTTPException(status_code=409, detail=f"A {other} reset is already in progress (job {e.job.id})")
+    return job_response(job, wait)
+
+
+# ------------------------------------------------------
+# REBUILD TOPIC COUNTERS (article / distinct source counts)
+# ------------------------------------------------------
+def reconcile_job(db: Session, progress) -> dict:
+    return topic_stats.reconcile(db)
+
+
+@app.post("/topics/reconcile")
+def reconcile_topics(wait: bool = False):
+    job = jobs.job_runner.submit("reconcile-topics", reconcile_job)
+    return job_response(job, wait)
+
+
+# ------------------------------------------------------
+# RECLASSIFY ARTICLE RELEVANCE (after a FILTER_VERSION bump)
+# ------------------------------------------------------
+def reclassify_job(db: Session, progress) -> dict:
+    return relevance.reclassify(db)
+
+
+@app.post("/articles/reclassify")
+def reclassify_articles(wait: bool = False):
+    job = jobs.job_runner.submit("reclassify-articles", reclassify_job)
+    return job_response(job, wait)
+
+
+# ------------------------------------------------------
+# MERGE / SPLIT CHANGED TOPICS (also runs on the scheduler)
+# ------------------------------------------------------
+def maintain_job(db: Session, progress) -> dict:
+    return topic_maintenance.maintain(db, progress)
+
+
+@app.post("/topics/maintain")
+def maintain_topics(wait: bool = False):
+    job = jobs.job_runner.submit("maintain-topics", maintain_job)
+    return job_response(job, wait)
+
+
+# ------------------------------------------------------
+# RESCORE TOPIC POPULARITY (also runs on the scheduler)
+# ------------------------------------------------------
+def rescore_job(db: Session, progress) -> dict:
+    return popularity.rescore(db)
+
+
+@app.post("/topics/rescore")
+def rescore_topics(wait: bool = False):
+    job = jobs.job_runner.submit("rescore-topics", rescore_job)
+    return job_response(job, wait)
 
 
 # ------------------------------------------------------
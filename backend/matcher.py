@@ -0,0 +1,77 @@
+import re
+
+
+# ============================================================
+# COMPILED KEYWORD MATCHER
+# ============================================================
+# Compiled once, reused for every article. Regex and whole-word rules are
+# joined into ONE alternation so a text is scanned once instead of once
+# per rule; the rule that fired is only worked out after a hit.
+#
+# Plain substring keywords are checked with `in` instead: CPython's C
+# string search beats a combined regex for those (see bench_matcher.py).
+
+class KeywordMatcher:
+    """
+    rules:          keywords (literal) or regex patterns, written in lowercase
+    regex:          treat rules as regex patterns instead of literals
+    whole_word:     wrap each rule in \\b...\\b
+    ignore_case:    lowercase the text before matching (cheaper than re.I)
+    """
+
+    def __init__(self, rules, regex=False, whole_word=False, ignore_case=True):
+        self.ignore_case = ignore_case
+        self.rules = [r if regex or not ignore_case else r.lower() for r in rules]
+
+        # Literal substrings: no regex at all
+        self._literal = not regex and not whole_word
+
+        bodies = []
+        for rule in self.rules:
+            body = rule if regex else re.escape(rule)
+            if whole_word:
+                body = rf"\b{body}\b"
+            bodies.append(body)
+
+        # One regex per rule, only used to name the rule after a hit
+        self._each = [re.compile(b) for b in bodies]
+        # A regex that can never match keeps an empty rule list harmless
+        self._combined = re.compile("|".join(f"(?:{b})" for b in bodies) or r"(?!x)x")
+
+    def search(self, text: str):
+        """Return the rule that fires first in `text`, or None."""
+        if not text:
+            return None
+        if self.ignore_case:
+            text = text.lower()
+
+        if self._literal:
+            for rule in self.rules:
+                if rule in text:
+                    return rule
+            return None
+
+        match = self._combined.search(text)
+        if not match:
+            return None
+
+        # The alternation tries rules in order at the match position, so
+        # the first rule that matches there is the one that fired
+        start = match.start()
+        for rule, regex in zip(self.rules, self._each):
+            if regex.match(text, start):
+                return rule
+        return None
+
+    def matches(self, text: str) -> bool:
+        return self.search(text) is not None
+
+    def find_all(self, text: str) -> set:
+        """Every distinct rule that occurs in `text`."""
+        if not text:
+            return set()
+        if self.ignore_case:
+            text = text.lower()
+        if self._literal:
+            return {rule for rule in self.rules if rule in text}
+        return {rule for rule, regex in zip(self.rules, self._each) if regex.search(text)}
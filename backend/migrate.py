@@ -0,0 +1,78 @@
+from sqlalchemy import inspect, select, text, update
+from database import engine, Base
+import vector_codec
+
+
+# ============================================================
+# LIGHTWEIGHT SCHEMA UPGRADE
+# ============================================================
+# create_all() only creates missing tables; it never adds columns to
+# tables that already exist. This adds any model column (and its index)
+# missing from the live database so new fields roll out without a manual
+# migration.
+
+def upgrade_schema(bind=engine):
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_cols = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_cols:
+                    continue
+
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'
+                ))
+                added.append(f"{table.name}.{column.name}")
+
+            # Indexes declared on the model (index=True) for those columns
+            existing_idx = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_idx:
+                    index.create(conn)
+                    added.append(index.name)
+
+    if added:
+        print(f"🛠️  Added columns/indexes: {', '.join(added)}")
+    return added
+
+
+# ============================================================
+# JSON → BINARY TOPIC EMBEDDINGS
+# ============================================================
+# Topic vectors used to be json.dumps() text in topics.embedding. They now
+# live in topics.embedding_vec as binary (vector_codec); this converts the
+# old rows in chunks and clears the JSON so the space is freed.
+
+def convert_json_embeddings(bind=engine, dtype: str = None, chunk_size: int = 200) -> int:
+    topics = Base.metadata.tables["topics"]
+    legacy, binary = topics.c["embedding"], topics.c["embedding_vec"]
+    converted = 0
+
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(topics.c.id, legacy).where(legacy != None).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+
+            for topic_id, raw in rows:
+                conn.execute(
+                    update(topics).where(topics.c.id == topic_id).values({
+                        binary: vector_codec.encode(vector_codec.decode(raw), dtype),
+                        legacy: None,
+                    })
+                )
+            converted += len(rows)
+
+    if converted:
+        print(f"🛠️  Converted {converted} topic embeddings from JSON to binary")
+    return converted
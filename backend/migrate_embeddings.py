@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Convert stored embeddings to the binary format
+- Adds the binary embedding columns if the schema predates them
+- Converts JSON text topic embeddings to binary and clears the JSON
+- --reencode rewrites every binary topic/article embedding in --dtype
+  (e.g. float16 to halve storage again)
+Run in Render Shell: python3 migrate_embeddings.py [--dtype float16 --reencode]
+"""
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import func
+
+from database import SessionLocal, engine
+import models
+import migrate
+import vector_codec
+
+
+def storage_report(db):
+    for model in (models.Topic, models.NewsItem):
+        count, size = db.query(
+            func.count(model.embedding), func.sum(func.length(model.embedding))
+        ).one()
+        print(f"   {model.__tablename__:11} {count:6} vectors  {(size or 0) / 1e6:8.2f} MB binary")
+
+    legacy_count, legacy_size = db.query(
+        func.count(models.Topic.embedding_json), func.sum(func.length(models.Topic.embedding_json))
+    ).one()
+    print(f"   {'topics JSON':11} {legacy_count:6} vectors  {(legacy_size or 0) / 1e6:8.2f} MB text")
+
+
+def reencode(db, dtype: str, chunk_size: int = 500) -> int:
+    rewritten = 0
+    for model in (models.Topic, models.NewsItem):
+        last_id = 0
+        while True:
+            rows = db.query(model).filter(
+                model.embedding != None, model.id > last_id
+            ).order_by(model.id).limit(chunk_size).all()
+            if not rows:
+                break
+            for row in rows:
+                if vector_codec.storage_dtype(row.embedding) != dtype:
+                    row.embedding = vector_codec.encode(vector_codec.decode(row.embedding), dtype)
+                    if model is models.Topic:
+                        row.centroid_updated_at = datetime.utcnow()
+                    rewritten += 1
+            last_id = rows[-1].id
+            db.commit()
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dtype", choices=sorted(vector_codec.DTYPES),
+                        default=vector_codec.EMBED_STORAGE_DTYPE)
+    parser.add_argument("--reencode", action="store_true", help="rewrite existing binary vectors in --dtype")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🗜️  EMBEDDING STORAGE MIGRATION")
+    print("=" * 60)
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        print("\n📊 Before:")
+        storage_report(db)
+
+        converted = migrate.convert_json_embeddings(engine, args.dtype)
+        print(f"\n✓ Converted {converted} JSON topic embeddings to {args.dtype}")
+
+        if args.reencode:
+            print(f"✓ Re-encoded {reencode(db, args.dtype)} binary embeddings to {args.dtype}")
+
+        print("\n📊 After:")
+        storage_report(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
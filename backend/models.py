@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Text, DateTime, ForeignKey, Float, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -9,11 +9,33 @@ class Topic(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)  # e.g., "OpenAI Sora Release"
     summary = Column(Text)  # AI Summary of the whole topic
-    popularity_score = Column(Float, default=0.0)
+    popularity_score = Column(Float, default=0.0, index=True)
     created_at = Column(DateTime, server_default=func.now())
     
     # ⭐ REQUIRED for clustering
-    embedding = Column(Text, nullable=True)  # store vector JSON here
+    # Binary vector (see vector_codec.py), stored in the "embedding_vec" column
+    embedding = Column("embedding_vec", LargeBinary, nullable=True)
+    # Legacy JSON text vectors; converted and cleared by migrate.convert_json_embeddings()
+    embedding_json = Column("embedding", Text, nullable=True)
+    # Running centroid: `embedding` is the mean of the member article vectors,
+    # over this many articles (see clustering.update_centroid)
+    centroid_count = Column(Integer, nullable=True)
+    # When `embedding` was last written; the persisted search index reloads
+    # only topics changed since it was saved (clustering.load_topic_index)
+    centroid_updated_at = Column(DateTime, nullable=True, index=True)
+
+    # Maintained as articles join (see topic_stats.py) so nothing has to
+    # load `articles` just to count them; NULL until first reconciled
+    article_count = Column(Integer, nullable=True)
+    distinct_source_count = Column(Integer, nullable=True)
+
+    # Hourly arrival ring buffer and newest arrival hour (see popularity.py)
+    arrival_counts = Column(LargeBinary, nullable=True)
+    last_arrival_hour = Column(Integer, nullable=True)
+
+    # Changed since the last merge/split pass (see topic_maintenance.py);
+    # NULL (never maintained) counts as changed
+    maintenance_pending = Column(Boolean, nullable=True, index=True)
 
     # Relationship to articles
     articles = relationship("NewsItem", back_populates="topic")
@@ -36,6 +58,26 @@ class NewsItem(Base):
     is_favorite = Column(Boolean, default=False)
     created_at = Column(DateTime, server_default=func.now())
 
+    # 64-bit SimHash of title + summary (signed), for near-duplicate checks
+    simhash = Column(BigInteger, nullable=True)
+
+    # Binary vector of title + summary (see vector_codec.py), set by clustering
+    embedding = Column(LargeBinary, nullable=True)
+
+    # Relevance verdict from ingest (relevance.py); clustering only takes
+    # relevant rows. Reclassified when filter_version is not current.
+    relevant = Column(Boolean, nullable=True, index=True)
+    relevance_score = Column(Float, nullable=True)
+    filter_version = Column(Integer, nullable=True, index=True)
+
+
+class TopicSource(Base):
+    """Articles per (topic, source): the source set behind Topic.distinct_source_count"""
+    __tablename__ = "topic_sources"
+    topic_id = Column(Integer, ForeignKey("topics.id", ondelete="CASCADE"), primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), primary_key=True)
+    article_count = Column(Integer, nullable=False, default=0)
+
 
 class Source(Base):
     __tablename__ = "sources"
@@ -44,3 +86,33 @@ class Source(Base):
     url = Column(String, unique=True, nullable=False)
     type = Column(String)
     active = Column(Boolean, default=True)
+
+    # HTTP validators from the last successful poll (conditional GET)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of last body
+    last_fetched_at = Column(DateTime, nullable=True)
+
+    # Adaptive polling schedule (see polling.py)
+    poll_interval = Column(Integer, nullable=True)  # seconds
+    next_poll_at = Column(DateTime, nullable=True, index=True)
+    last_polled_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    consecutive_failures = Column(Integer, default=0)
+    circuit_open_until = Column(DateTime, nullable=True)
+    avg_response_ms = Column(Float, nullable=True)
+    avg_new_items = Column(Float, nullable=True)
+
+
+class EmbeddingCacheEntry(Base):
+    """Embedding vectors keyed by (model, hash of normalized text), see embedding_cache.py"""
+    __tablename__ = "embedding_cache"
+    __table_args__ = (UniqueConstraint("model", "text_hash", name="uq_embedding_cache_model_hash"),)
+    id = Column(Integer, primary_key=True)
+    model = Column(String(100), nullable=False)
+    text_hash = Column(String(64), nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now(), index=True)
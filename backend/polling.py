@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+import os
+import random
+
+
+# ============================================================
+# ADAPTIVE POLLING POLICY (per Source)
+# ============================================================
+# Each source gets its own poll interval:
+#   - productive feeds (many new items per poll) are polled more often
+#   - slow feeds are polled a bit less often
+#   - failures back off exponentially, and after CIRCUIT_FAILURE_THRESHOLD
+#     consecutive failures the circuit opens and the source is skipped
+#     until CIRCUIT_OPEN_SECONDS have passed. The next poll after that is
+#     a single probe (half-open): success closes the circuit, failure
+#     re-opens it straight away.
+
+DEFAULT_POLL_SECONDS = int(os.getenv("POLL_DEFAULT_SECONDS", "1800"))   # 30 min
+MIN_POLL_SECONDS = int(os.getenv("POLL_MIN_SECONDS", "600"))            # 10 min
+MAX_POLL_SECONDS = int(os.getenv("POLL_MAX_SECONDS", "21600"))          # 6 h
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = int(os.getenv("POLL_CIRCUIT_OPEN_SECONDS", "43200"))  # 12 h
+
+SLOW_RESPONSE_MS = 5000
+EWMA_ALPHA = 0.3   # weight of the newest observation
+JITTER = 0.1       # ±10% so sources don't all line up on the same tick
+
+
+def ewma(previous, value):
+    if previous is None:
+        return float(value)
+    return (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * value
+
+
+def circuit_state(source, now=None) -> str:
+    """closed | open | half-open"""
+    now = now or datetime.utcnow()
+    if (source.consecutive_failures or 0) < CIRCUIT_FAILURE_THRESHOLD:
+        return "closed"
+    if source.circuit_open_until and source.circuit_open_until > now:
+        return "open"
+    return "half-open"
+
+
+def healthy_interval(source) -> float:
+    """Shorter for feeds that keep producing new items, longer for slow ones."""
+    avg_new = source.avg_new_items or 0.0
+    interval = DEFAULT_POLL_SECONDS / (1.0 + avg_new)
+    if (source.avg_response_ms or 0) > SLOW_RESPONSE_MS:
+        interval *= 1.5
+    return interval
+
+
+def apply_outcome(source, outcome: dict, now=None):
+    """
+    Update a Source's schedule from one poll.
+    outcome: {"ok": bool, "status": str, "new_items": int,
+              "elapsed_ms": float, "error": str | None}
+    """
+    now = now or datetime.utcnow()
+
+    source.last_polled_at = now
+    source.last_status = outcome["status"]
+    if outcome.get("elapsed_ms") is not None:
+        source.avg_response_ms = ewma(source.avg_response_ms, outcome["elapsed_ms"])
+
+    if outcome["ok"]:
+        source.consecutive_failures = 0
+        source.circuit_open_until = None
+        source.last_error = None
+        source.avg_new_items = ewma(source.avg_new_items, outcome.get("new_items", 0))
+        interval = healthy_interval(source)
+    else:
+        source.consecutive_failures = (source.consecutive_failures or 0) + 1
+        source.last_error = (outcome.get("error") or "")[:500]
+        interval = healthy_interval(source) * (2 ** source.consecutive_failures)
+
+    # Jitter first, then clamp: the bounds hold for the jittered interval too
+    jitter = random.uniform(1 - JITTER, 1 + JITTER)
+    interval = min(max(interval * jitter, MIN_POLL_SECONDS), MAX_POLL_SECONDS)
+
+    if (source.consecutive_failures or 0) >= CIRCUIT_FAILURE_THRESHOLD:
+        source.circuit_open_until = now + timedelta(seconds=CIRCUIT_OPEN_SECONDS)
+        # The circuit keeps the source out until circuit_open_until anyway
+        interval = CIRCUIT_OPEN_SECONDS * jitter
+
+    source.poll_interval = int(interval)
+    source.next_poll_at = now + timedelta(seconds=interval)
+
+
+def describe(source, now=None) -> dict:
+    """Schedule state for the /scheduler endpoint."""
+    now = now or datetime.utcnow()
+    return {
+        "id": source.id,
+        "name": source.name,
+        "active": source.active,
+        "circuit": circuit_state(source, now),
+        "poll_interval_seconds": source.poll_interval,
+        "next_poll_at": source.next_poll_at,
+        "last_polled_at": source.last_polled_at,
+        "last_status": source.last_status,
+        "last_error": source.last_error,
+        "consecutive_failures": source.consecutive_failures or 0,
+        "circuit_open_until": source.circuit_open_until,
+        "avg_response_ms": round(source.avg_response_ms, 1) if source.avg_response_ms else None,
+        "avg_new_items": round(source.avg_new_items, 2) if source.avg_new_items else 0.0,
+    }
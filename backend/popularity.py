@@ -0,0 +1,217 @@
+from datetime import datetime, timezone
+import os
+import time
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import models
+
+
+# ============================================================
+# POPULARITY ENGINE
+# ============================================================
+# Every topic keeps a ring buffer of article arrivals per hour over the
+# last WINDOW_HOURS (topics.arrival_counts, uint16 per hour; slot = hour %
+# WINDOW_HOURS) and the hour of its newest arrival (last_arrival_hour).
+#
+#   score = (0.4 coverage + 0.2 diversity + 0.2 velocity) × freshness
+#     coverage  = min(10 × articles, 100)
+#     diversity = min(20 × distinct sources, 100)
+#     velocity  = arrivals per hour over the last VELOCITY_HOURS,
+#                 100 at VELOCITY_FULL_RATE
+#     freshness = 0.5 ^ (hours since the newest arrival / HALF_LIFE_HOURS)
+#
+# record() folds new arrivals in as clustering links articles; rescore()
+# recomputes every topic in one vectorized pass per chunk (the scheduler
+# runs it every RESCORE_SECONDS) so idle topics sink even when nothing
+# joins them. rebuild() recomputes the buffers from news_items.
+
+WINDOW_HOURS = int(os.getenv("POPULARITY_WINDOW_HOURS", "72"))
+HALF_LIFE_HOURS = float(os.getenv("POPULARITY_HALF_LIFE_HOURS", "24"))
+VELOCITY_HOURS = int(os.getenv("POPULARITY_VELOCITY_HOURS", "6"))
+VELOCITY_FULL_RATE = float(os.getenv("POPULARITY_VELOCITY_FULL_RATE", "2"))  # articles/hour
+RESCORE_SECONDS = int(os.getenv("POPULARITY_RESCORE_SECONDS", "900"))
+RESCORE_CHUNK = 5000
+SCORE_EPSILON = 0.05  # smaller changes are not written back
+
+NO_ARRIVAL = -(10 ** 9)  # last_arrival_hour of a topic that never had one
+
+
+# -------------------------------
+# HOURS & WINDOWS
+# -------------------------------
+
+def hour_of(ts: datetime) -> int:
+    """Hours since the epoch; naive datetimes are UTC (as stored)."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() // 3600)
+
+
+def arrival_hour(published_at, created_at=None, now_hour: int = None) -> int:
+    """When an article counts as arriving: published, else ingested; never in the future."""
+    now_hour = hour_of(datetime.utcnow()) if now_hour is None else now_hour
+    ts = published_at or created_at
+    return now_hour if ts is None else min(hour_of(ts), now_hour)
+
+
+def decode_window(blob) -> np.ndarray:
+    """A stored ring buffer; empty if missing or sized for another WINDOW_HOURS."""
+    if blob is None or len(blob) != WINDOW_HOURS * 2:
+        return np.zeros(WINDOW_HOURS, dtype=np.uint16)
+    return np.frombuffer(blob, dtype=np.uint16).copy()
+
+
+def add_arrival(window: np.ndarray, last_hour: int, hour: int) -> int:
+    """Count one arrival at `hour` in place. Returns the new last_arrival_hour."""
+    if hour > last_hour:
+        # Slots for the hours in between belong to a past lap: clear them
+        if hour - last_hour >= WINDOW_HOURS:
+            window[:] = 0
+        else:
+            window[np.arange(last_hour + 1, hour + 1) % WINDOW_HOURS] = 0
+        last_hour = hour
+    if last_hour - hour < WINDOW_HOURS and window[hour % WINDOW_HOURS] < np.iinfo(np.uint16).max:
+        window[hour % WINDOW_HOURS] += 1
+    return last_hour
+
+
+# -------------------------------
+# SCORING (vectorized)
+# -------------------------------
+
+def scores(article_counts, source_counts, windows: np.ndarray, last_hours, now_hour: int) -> np.ndarray:
+    """Popularity of N topics: counters (N,), windows (N, WINDOW_HOURS), last hours (N,)."""
+    article_counts = np.asarray(article_counts, dtype=np.float64)
+    source_counts = np.asarray(source_counts, dtype=np.float64)
+    last_hours = np.asarray(last_hours, dtype=np.int64)
+
+    # Age in hours of the arrivals in each slot, relative to now
+    slots = np.arange(WINDOW_HOURS)
+    idle = np.maximum(now_hour - last_hours, 0)
+    age = idle[:, None] + (last_hours[:, None] - slots) % WINDOW_HOURS
+    recent = np.where(age < VELOCITY_HOURS, windows, 0).sum(axis=1)
+
+    coverage = np.minimum(article_counts * 10, 100)
+    diversity = np.minimum(source_counts * 20, 100)
+    velocity = np.minimum(100 * recent / VELOCITY_HOURS / VELOCITY_FULL_RATE, 100)
+    freshness = np.exp2(-idle / HALF_LIFE_HOURS)
+    return np.round((0.4 * coverage + 0.2 * diversity + 0.2 * velocity) * freshness, 1)
+
+
+# -------------------------------
+# DATABASE
+# -------------------------------
+
+def record(db: Session, arrivals: list, totals: dict):
+    """
+    Fold (topic id, arrival hour) pairs into the topics' windows and rescore
+    them with their counters, `totals` = {topic id: (articles, sources)}
+    from topic_stats.record_links. Does not commit.
+    """
+    topic_ids = {topic_id for topic_id, _ in arrivals}
+    if not topic_ids:
+        return
+    now_hour = hour_of(datetime.utcnow())
+    rows = db.query(
+        models.Topic.id, models.Topic.arrival_counts, models.Topic.last_arrival_hour
+    ).filter(models.Topic.id.in_(topic_ids)).all()
+
+    windows = {topic_id: decode_window(blob) for topic_id, blob, _ in rows}
+    last = {topic_id: NO_ARRIVAL if hour is None else hour for topic_id, _, hour in rows}
+    for topic_id, hour in arrivals:
+        if topic_id in windows:
+            last[topic_id] = add_arrival(windows[topic_id], last[topic_id], hour)
+
+    ids = list(windows)
+    new_scores = scores(
+        [totals[t][0] for t in ids], [totals[t][1] for t in ids],
+        np.stack([windows[t] for t in ids]), [last[t] for t in ids], now_hour,
+    )
+    db.execute(update(models.Topic), [
+        {
+            "id": topic_id,
+            "arrival_counts": windows[topic_id].tobytes(),
+            "last_arrival_hour": last[topic_id],
+            "popularity_score": float(score),
+        }
+        for topic_id, score in zip(ids, new_scores)
+    ])
+
+
+def rescore(db: Session, now: datetime = None, topic_ids: list = None) -> dict:
+    """Recompute every topic's score (or just `topic_ids`'), RESCORE_CHUNK topics per vectorized pass."""
+    started = time.perf_counter()
+    now_hour = hour_of(now or datetime.utcnow())
+    total = changed = 0
+    last_id = 0
+
+    while True:
+        query = db.query(
+            models.Topic.id, models.Topic.article_count, models.Topic.distinct_source_count,
+            models.Topic.arrival_counts, models.Topic.last_arrival_hour, models.Topic.popularity_score,
+        ).filter(models.Topic.id > last_id)
+        if topic_ids is not None:
+            query = query.filter(models.Topic.id.in_(topic_ids))
+        rows = query.order_by(models.Topic.id).limit(RESCORE_CHUNK).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        total += len(rows)
+
+        ids, articles, sources, blobs, hours, old = zip(*rows)
+        new = scores(
+            [a or 0 for a in articles], [s or 0 for s in sources],
+            np.stack([decode_window(b) for b in blobs]),
+            [NO_ARRIVAL if h is None else h for h in hours], now_hour,
+        )
+        old = np.array([o or 0.0 for o in old])
+        moved = np.flatnonzero(np.abs(new - old) >= SCORE_EPSILON)
+        if len(moved):
+            db.execute(update(models.Topic), [
+                {"id": ids[i], "popularity_score": float(new[i])} for i in moved
+            ])
+            changed += len(moved)
+        db.commit()
+
+    elapsed = time.perf_counter() - started
+    print(f"📈 Popularity rescored: {changed} of {total} topics changed ({elapsed:.2f}s)")
+    return {"topics": total, "changed": changed, "seconds": round(elapsed, 3)}
+
+
+def rebuild(db: Session, topic_ids: list = None) -> int:
+    """
+    Recompute every topic's window and newest arrival (or just `topic_ids`')
+    from its articles. Does not commit.
+    """
+    now_hour = hour_of(datetime.utcnow())
+    windows, last = {}, {}
+    rows = db.query(
+        models.NewsItem.topic_id, models.NewsItem.published_at, models.NewsItem.created_at
+    ).filter(models.NewsItem.topic_id != None)
+    if topic_ids is not None:
+        rows = rows.filter(models.NewsItem.topic_id.in_(topic_ids))
+    rows = rows.order_by(models.NewsItem.published_at)
+
+    for topic_id, published_at, created_at in rows:
+        if topic_id not in windows:
+            windows[topic_id] = np.zeros(WINDOW_HOURS, dtype=np.uint16)
+            last[topic_id] = NO_ARRIVAL
+        last[topic_id] = add_arrival(windows[topic_id], last[topic_id],
+                                     arrival_hour(published_at, created_at, now_hour))
+
+    if topic_ids is None:
+        topic_ids = [topic_id for (topic_id,) in db.query(models.Topic.id)]
+    empty = np.zeros(WINDOW_HOURS, dtype=np.uint16).tobytes()
+    if topic_ids:
+        db.execute(update(models.Topic), [
+            {
+                "id": topic_id,
+                "arrival_counts": windows[topic_id].tobytes() if topic_id in windows else empty,
+                "last_arrival_hour": last.get(topic_id),
+            }
+            for topic_id in topic_ids
+        ])
+    return len(topic_ids)
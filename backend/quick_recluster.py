@@ -4,8 +4,10 @@ Quick re-cluster without cleanup (articles already cleaned)
 Run in Render Shell: python3 quick_recluster.py
 """
 
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+import migrate
+import topic_stats
 import clustering
 
 def main():
@@ -13,6 +15,9 @@ def main():
     print("🧠 QUICK RE-CLUSTERING")
     print("=" * 60)
     
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Show config
@@ -33,6 +38,7 @@ def main():
         db.query(models.NewsItem).update({"topic_id": None})
         db.commit()
         
+        topic_stats.clear(db)
         deleted = db.query(models.Topic).delete()
         db.commit()
         print(f"   ✓ Deleted {deleted} topics")
@@ -76,7 +82,7 @@ def main():
         ).limit(15).all()
         
         for i, topic in enumerate(top, 1):
-            count = db.query(models.NewsItem).filter_by(topic_id=topic.id).count()
+            count = topic.article_count or 0
             title = topic.title[:52] + "..." if len(topic.title) > 52 else topic.title
             print(f"   {i:2}. [{count}] {title}")
         
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Reclassify article relevance after the filter rules change
+- Classifies every article with no verdict or one from an older
+  relevance.FILTER_VERSION, in bulk (news_items.relevant, relevance_score,
+  filter_version)
+- The app also does this itself at startup when needed
+  (or POST /articles/reclassify)
+Run in Render Shell: python3 reclassify_articles.py
+"""
+
+import argparse
+
+from database import SessionLocal, engine
+import models
+import migrate
+import relevance
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+
+    print("=" * 60)
+    print(f"🏷️  RECLASSIFY ARTICLES (filter v{relevance.FILTER_VERSION})")
+    print("=" * 60)
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        stats = relevance.reclassify(db)
+        rejected = db.query(models.NewsItem).filter(models.NewsItem.relevant == False).count()
+        print(f"✓ {stats['classified']} classified, {stats['relevant']} relevant; "
+              f"{rejected} rejected in total")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
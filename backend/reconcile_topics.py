@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the topic counters from the article table
+- Recounts articles and distinct sources per topic (topics.article_count,
+  topics.distinct_source_count) and the topic_sources table in bulk
+- Needed after deleting articles or editing links by hand; the app runs it
+  itself at startup when counters are missing (or POST /topics/reconcile)
+Run in Render Shell: python3 reconcile_topics.py
+"""
+
+import argparse
+
+from database import SessionLocal, engine
+import models
+import migrate
+import topic_stats
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+
+    print("=" * 60)
+    print("🧾 RECONCILE TOPIC COUNTERS")
+    print("=" * 60)
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        stats = topic_stats.reconcile(db)
+        print(f"✓ {stats['corrected']} of {stats['topics']} topics corrected, "
+              f"{stats['topic_sources']} topic/source pairs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from matcher import KeywordMatcher
+import models
+
+
+# ============================================================
+# ARTICLE RELEVANCE (classified once, stored)
+# ============================================================
+# The fetcher drops entries that are not AI-related at all
+# (fetcher.is_ai_related). What it stores is classified here, at ingest:
+# AI news with no Reddit/meta/hiring noise is `relevant`. The verdict, a
+# 0-1 score and FILTER_VERSION are kept on news_items, so clustering only
+# selects pending relevant rows instead of re-filtering every unclustered
+# article on every run.
+#
+# Changing the rules below? Bump FILTER_VERSION: rows classified under
+# another version (or never) are reclassified in bulk by reclassify(),
+# which run_clustering and app startup call when needs_reclassify().
+
+FILTER_VERSION = 1
+RECLASSIFY_CHUNK = 2000
+
+# Strong AI-only detection
+AI_KEYWORDS = {
+    "ai", "artificial intelligence",
+    "machine learning", "ml",
+    "deep learning", "neural", "neural network",
+    "robotics", "computer vision",
+    "nlp", "transformer", "rag",
+    "llm", "large language model",
+    "chatgpt", "gpt", "openai",
+    "anthropic", "meta ai", "google ai",
+}
+
+# Patterns to block Reddit/meta/hiring/non-news posts
+NON_NEWS_PATTERNS = [
+    "[d] self-promotion",
+    "self-promotion thread",
+    "who's hiring",
+    "who wants to be hired",
+    "monthly thread",
+    "meta thread",
+    "discussion thread",
+    "automoderator",
+    "reddit",
+]
+
+# Distinct AI keywords for a score of 1.0
+FULL_SCORE_KEYWORDS = 3
+
+
+# -------------------------------
+# FILTER HELPERS
+# -------------------------------
+
+AI_KEYWORD_MATCHER = KeywordMatcher(sorted(AI_KEYWORDS), whole_word=True)
+NON_NEWS_MATCHER = KeywordMatcher(NON_NEWS_PATTERNS)
+
+
+def contains_ai_keyword(text: str) -> bool:
+    """Matches AI keywords by full words only to prevent false positives."""
+    return AI_KEYWORD_MATCHER.matches(text)
+
+
+def is_meta_or_non_ai_thread(text: str) -> bool:
+    """Block Reddit/meta threads completely."""
+    return NON_NEWS_MATCHER.matches(text)
+
+
+def classify(title: str, summary: str) -> dict:
+    """The relevance columns of one article: verdict, score, filter version."""
+    text = f"{title}. {summary}".strip().lower()
+    if is_meta_or_non_ai_thread(text):
+        score = 0.0
+    else:
+        score = round(min(len(AI_KEYWORD_MATCHER.find_all(text)) / FULL_SCORE_KEYWORDS, 1.0), 2)
+    return {"relevant": score > 0, "relevance_score": score, "filter_version": FILTER_VERSION}
+
+
+# -------------------------------
+# DATABASE
+# -------------------------------
+
+def stale_filter():
+    """Rows never classified, or classified under another FILTER_VERSION."""
+    return or_(models.NewsItem.filter_version == None, models.NewsItem.filter_version != FILTER_VERSION)
+
+
+def needs_reclassify(db: Session) -> bool:
+    return db.query(models.NewsItem.id).filter(stale_filter()).first() is not None
+
+
+def reclassify(db: Session) -> dict:
+    """Classify every stale row, RECLASSIFY_CHUNK per bulk update and commit."""
+    total = relevant = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            models.NewsItem.id, models.NewsItem.title, models.NewsItem.summary
+        ).filter(stale_filter(), models.NewsItem.id > last_id).order_by(
+            models.NewsItem.id
+        ).limit(RECLASSIFY_CHUNK).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        verdicts = [{"id": article_id, **classify(title, summary or "")} for article_id, title, summary in rows]
+        db.execute(update(models.NewsItem), verdicts)
+        db.commit()
+        total += len(verdicts)
+        relevant += sum(v["relevant"] for v in verdicts)
+
+    print(f"🏷️  Relevance (filter v{FILTER_VERSION}): {total} articles classified, {relevant} relevant")
+    return {"filter_version": FILTER_VERSION, "classified": total, "relevant": relevant}
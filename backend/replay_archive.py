@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Offline replay of the ingest + clustering pipeline from the feed archive
+- Reads each active source's latest archived body (no network at all)
+- Runs the normal parse → filter → store steps, then clustering
+- --reset wipes articles and topics first, e.g. to re-ingest after a
+  filter change
+Run in Render Shell: python3 replay_archive.py --reset
+"""
+
+import argparse
+import time
+
+from database import SessionLocal, engine
+from feed_archive import archive
+import models
+import migrate
+import topic_stats
+import fetcher
+import clustering
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reset", action="store_true", help="delete all articles and topics first")
+    parser.add_argument("--no-cluster", action="store_true", help="only replay ingest")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📼 OFFLINE REPLAY FROM FEED ARCHIVE")
+    print("=" * 60)
+
+    stats = archive.stats()
+    print(f"\n📦 Archive: {stats['snapshots']} snapshots of {stats['sources']} sources "
+          f"({stats['stored_mb']} MB stored, {stats['raw_mb']} MB raw)")
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        if args.reset:
+            print(f"\n🗑️  Resetting articles and topics...")
+            db.query(models.NewsItem).update({"topic_id": None})
+            topic_stats.clear(db)
+            db.query(models.Topic).delete()
+            deleted = db.query(models.NewsItem).delete()
+            db.commit()
+            print(f"   ✓ Deleted {deleted} articles")
+
+        started = time.perf_counter()
+        new_items = fetcher.fetch_and_store_news(db, replay=True)
+        ingest_time = time.perf_counter() - started
+
+        cluster_time = 0.0
+        if not args.no_cluster:
+            started = time.perf_counter()
+            clustering.run_clustering(db)
+            cluster_time = time.perf_counter() - started
+
+        print(f"\n" + "=" * 60)
+        print(f"📊 RESULTS:")
+        print(f"=" * 60)
+        print(f"   Articles stored:   {new_items}")
+        print(f"   Topics:            {db.query(models.Topic).count()}")
+        print(f"   Ingest time:       {ingest_time:.2f}s")
+        print(f"   Clustering time:   {cluster_time:.2f}s")
+        print()
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
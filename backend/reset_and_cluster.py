@@ -4,8 +4,10 @@ Standalone script to reset and re-cluster articles with debugging
 Run this directly in Render shell: python3 reset_and_cluster.py
 """
 
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+import migrate
+import topic_stats
 import clustering
 import sys
 
@@ -19,6 +21,9 @@ def main():
     print(f"   Threshold: {clustering.SIMILARITY_THRESHOLD}")
     print(f"   Model: {clustering.EMBED_MODEL}")
     
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Get initial counts
@@ -34,6 +39,7 @@ def main():
         db.commit()
         print(f"   ✓ Cleared all topic assignments")
         
+        topic_stats.clear(db)
         deleted = db.query(models.Topic).delete()
         db.commit()
         print(f"   ✓ Deleted {deleted} topics")
@@ -85,9 +91,7 @@ def main():
         print(f"\n📋 Sample Topics with Article Counts:")
         sample_topics = db.query(models.Topic).limit(10).all()
         for i, topic in enumerate(sample_topics, 1):
-            article_count = db.query(models.NewsItem).filter(
-                models.NewsItem.topic_id == topic.id
-            ).count()
+            article_count = topic.article_count or 0
             title_short = topic.title[:50] + "..." if len(topic.title) > 50 else topic.title
             print(f"   {i}. [{article_count} articles] {title_short}")
         
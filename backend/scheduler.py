@@ -0,0 +1,124 @@
+from datetime import datetime
+import os
+import threading
+
+from database import SessionLocal
+import models
+import crud
+import fetcher
+import clustering
+import polling
+import popularity
+import topic_maintenance
+
+
+# ============================================================
+# BACKGROUND POLL SCHEDULER
+# ============================================================
+# Wakes up every TICK_SECONDS, polls only the sources that are due
+# (see polling.py for how each source's interval is chosen), then
+# clusters whatever new articles came in. Every popularity.RESCORE_SECONDS
+# it also rescores all topics so idle ones decay, and every
+# topic_maintenance.MAINTENANCE_SECONDS merges/splits the changed topics.
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", "60"))
+
+# Fetch + cluster runs (scheduler ticks and manual refreshes) never overlap
+pipeline_lock = threading.Lock()
+
+
+class PollScheduler:
+    def __init__(self, tick_seconds: int = TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.last_tick_at = None
+        self.last_tick_sources = 0
+        self.last_tick_new_items = 0
+        self.last_error = None
+        self.last_rescore_at = None
+        self.last_maintenance_at = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="poll-scheduler", daemon=True)
+        self._thread.start()
+        print(f"⏰ Poll scheduler started (tick every {self.tick_seconds}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            self.tick()
+
+    def tick(self):
+        """Poll due sources, then any topic upkeep that is due. Skipped if a manual refresh is running."""
+        if not pipeline_lock.acquire(blocking=False):
+            return
+
+        db = SessionLocal()
+        try:
+            self.last_tick_at = datetime.utcnow()
+            due = crud.get_due_sources(db, self.last_tick_at)
+            self.last_tick_sources = len(due)
+            self.last_tick_new_items = 0
+
+            if due:
+                print(f"\n⏰ Scheduler: {len(due)} sources due")
+                new_items = fetcher.fetch_and_store_news(db, sources=due)
+                self.last_tick_new_items = new_items
+
+                if new_items:
+                    clustering.run_clustering(db)
+
+            if (self.last_maintenance_at is None
+                    or (self.last_tick_at - self.last_maintenance_at).total_seconds()
+                    >= topic_maintenance.MAINTENANCE_SECONDS):
+                topic_maintenance.maintain(db)
+                self.last_maintenance_at = self.last_tick_at
+
+            if (self.last_rescore_at is None
+                    or (self.last_tick_at - self.last_rescore_at).total_seconds() >= popularity.RESCORE_SECONDS):
+                popularity.rescore(db, self.last_tick_at)
+                self.last_rescore_at = self.last_tick_at
+            self.last_error = None
+
+        except Exception as e:
+            db.rollback()
+            self.last_error = str(e)
+            print(f"❌ Scheduler tick failed: {e}")
+        finally:
+            db.close()
+            pipeline_lock.release()
+
+    def status(self, db) -> dict:
+        now = datetime.utcnow()
+        sources = db.query(models.Source).order_by(models.Source.next_poll_at).all()
+        circuits = [polling.circuit_state(s, now) for s in sources]
+        return {
+            "running": self.running,
+            "tick_seconds": self.tick_seconds,
+            "last_tick_at": self.last_tick_at,
+            "last_tick_sources": self.last_tick_sources,
+            "last_tick_new_items": self.last_tick_new_items,
+            "last_error": self.last_error,
+            "last_rescore_at": self.last_rescore_at,
+            "last_maintenance_at": self.last_maintenance_at,
+            "open_circuits": circuits.count("open"),
+            "sources": [polling.describe(s, now) for s in sources],
+        }
+
+
+poll_scheduler = PollScheduler()
@@ -10,7 +10,9 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database import SessionLocal
+from database import SessionLocal, engine
+import models
+import migrate
 import seed
 import fetcher
 
@@ -19,6 +21,9 @@ def main():
     print("🌱 SEEDING NEW AI/ML/GENAI SOURCES")
     print("=" * 60)
     
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Seed new sources
@@ -4,11 +4,15 @@ Quick database statistics viewer
 Run in Render Shell: python3 show_stats.py
 """
 
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+import migrate
 from datetime import datetime, timedelta
 
 def main():
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
     db = SessionLocal()
     try:
         # Basic counts
@@ -83,9 +87,7 @@ def main():
             ).limit(5).all()
             
             for i, topic in enumerate(topics, 1):
-                article_count = db.query(models.NewsItem).filter_by(
-                    topic_id=topic.id
-                ).count()
+                article_count = topic.article_count or 0
                 title_short = topic.title[:45] + "..." if len(topic.title) > 45 else topic.title
                 print(f"   {i}. [{article_count} articles] {title_short}")
         
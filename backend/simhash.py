@@ -0,0 +1,123 @@
+import hashlib
+import re
+
+import numpy as np
+
+
+# ============================================================
+# SIMHASH NEAR-DUPLICATE DETECTION
+# ============================================================
+# Syndicated copies of a story (vendor blog + aggregator repost, Google
+# Cloud AI vs Google AI Blog) arrive with different URLs, so the unique
+# `url` check misses them. A 64-bit SimHash over the normalized
+# title + summary puts near-identical texts within a few bits of each
+# other.
+#
+# Lookup splits the hash into BANDS 8-bit bands: two hashes within
+# MAX_DISTANCE <= BANDS - 1 bits must agree exactly on at least one band,
+# so only items sharing a band bucket are compared (pigeonhole).
+#
+# Features are character 3-grams of the normalized text: far more of them
+# than words, so a short prefix/suffix ("Reposted: ...", "(via X)") moves
+# the hash only 3-5 bits, while different stories on the same subject
+# stay 15+ bits apart.
+#
+# Templated headlines ("AI digest #41: ..." / "#42: ...") can still land
+# within MAX_DISTANCE, so a SimHash hit is only a candidate: the fetcher
+# confirms it with the Jaccard similarity of the two shingle sets
+# (MIN_JACCARD) before dropping anything.
+
+HASH_BITS = 64
+BANDS = 8
+BAND_BITS = HASH_BITS // BANDS
+MAX_DISTANCE = 6
+SHINGLE_SIZE = 3
+MIN_FEATURES = 40  # shorter texts are too easy to collide; never flagged
+MIN_JACCARD = 0.8  # shingle overlap that confirms a SimHash candidate
+
+_BIT_SHIFTS = np.arange(HASH_BITS, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    text = (text or "").lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return text.strip()
+
+
+def features(text: str) -> list:
+    """Character shingles of the normalized text."""
+    text = normalize_text(text)
+    return [text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash (unsigned) of a text; 0 for texts too short to compare."""
+    feats = features(text)
+    if len(feats) < MIN_FEATURES:
+        return 0
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big") for f in feats],
+        dtype=np.uint64,
+    )
+    # (n_features, 64) matrix of bits → per-bit vote (+1 / -1)
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    votes = (2 * bits - 1).sum(axis=0)
+
+    value = 0
+    for i in np.nonzero(votes > 0)[0]:
+        value |= 1 << int(i)
+    return value
+
+
+def jaccard(a: str, b: str) -> float:
+    """Jaccard similarity of the shingle sets of two texts."""
+    a, b = set(features(a)), set(features(b))
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit → signed, for a BIGINT column."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class SimHashIndex:
+    """In-memory banded index of SimHashes → labels (e.g. article URLs)."""
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = [dict() for _ in range(BANDS)]
+        self.size = 0
+
+    @staticmethod
+    def _band_keys(value: int):
+        mask = (1 << BAND_BITS) - 1
+        return [(value >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+    def add(self, value: int, label):
+        if not value:
+            return
+        for band, key in zip(self._bands, self._band_keys(value)):
+            band.setdefault(key, []).append((value, label))
+        self.size += 1
+
+    def matches(self, value: int) -> list:
+        """Every stored (label, distance) within max_distance, closest first."""
+        if not value:
+            return []
+
+        found = {}
+        for band, key in zip(self._bands, self._band_keys(value)):
+            for other, label in band.get(key, ()):
+                distance = hamming(value, other)
+                if distance <= self.max_distance:
+                    found[label] = distance
+        return sorted(found.items(), key=lambda match: match[1])
@@ -0,0 +1,436 @@
+from datetime import datetime
+import os
+
+import numpy as np
+
+
+# ============================================================
+# TOPIC SEARCH INDEXES
+# ============================================================
+# Clustering matches every article against the existing topics. Two
+# interchangeable backends (TOPIC_INDEX_BACKEND) share one interface:
+#
+#   add(id, vector)  update(id, vector)  delete(id)  delete_many(ids)
+#   vector(id)  search(vector) → (id, cosine)   search_batch(vectors)
+#   save(path)  /  load_index(path)
+#
+# exact  one L2-normalized float32 row per topic; a search is one
+#        matrix–vector product plus argmax over all rows.
+# ivf    inverted file: topics are bucketed under k-means centroids and a
+#        search only scans the `nprobe` buckets closest to the query. Below
+#        IVF_TRAIN_MIN topics it has no centroids and searches exactly.
+#        It re-trains once the index has grown IVF_RETRAIN_FACTOR x since
+#        the last training.
+#
+# Topic ids must be integers (they are persisted as an int64 array).
+# `synced_at` (saved with the index) is the caller's note of when the rows
+# last matched the topics table; see clustering.load_topic_index.
+
+TOPIC_INDEX_BACKEND = os.getenv("TOPIC_INDEX_BACKEND", "ivf")
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+IVF_TRAIN_MIN = int(os.getenv("IVF_TRAIN_MIN", "5000"))
+IVF_RETRAIN_FACTOR = 4
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+
+def normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else np.zeros_like(vector)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+# ------------------------------------------------------------
+# EXACT
+# ------------------------------------------------------------
+
+class ExactTopicIndex:
+    """
+    Brute-force cosine search over a growable matrix, rows oldest → newest.
+
+    `window` limits searches to the newest N rows (the old MAX_RECENT_TOPICS
+    behaviour). Ties go to the newest topic.
+    """
+
+    backend = "exact"
+
+    def __init__(self, dims: int = None, window: int = None, capacity: int = 64):
+        self.dims = dims
+        self.window = window
+        self.synced_at = None
+        self.ids = []
+        self._rows = {}  # topic id → row
+        self._matrix = None if dims is None else np.zeros((capacity, dims), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, topic_id):
+        return topic_id in self._rows
+
+    def _grow(self, needed: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((max(64, needed), self.dims), dtype=np.float32)
+        elif needed > len(self._matrix):
+            grown = np.zeros((max(needed, 2 * len(self._matrix)), self.dims), dtype=np.float32)
+            grown[:len(self.ids)] = self._matrix[:len(self.ids)]
+            self._matrix = grown
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Normalized rows, oldest first (a view)."""
+        if self._matrix is None:
+            return np.zeros((0, self.dims or 0), dtype=np.float32)
+        return self._matrix[:len(self.ids)]
+
+    # ---------- writes ----------
+
+    def add(self, topic_id, vector):
+        """Append a topic as the newest row. A missing vector gets a zero row
+        (it still occupies a window slot but never matches)."""
+        if vector is not None and self.dims is None:
+            self.dims = len(vector)
+        if self.dims is None:
+            raise ValueError("First topic added to an empty index needs a vector")
+        if topic_id in self._rows:
+            raise KeyError(f"Topic {topic_id} already indexed")
+
+        self._grow(len(self.ids) + 1)
+        row = len(self.ids)
+        self._matrix[row] = 0 if vector is None else normalize(vector)
+        self.ids.append(topic_id)
+        self._rows[topic_id] = row
+
+    def add_many(self, topic_ids, vectors):
+        """Bulk append (oldest first); vectors is an (n, dims) array."""
+        if not len(topic_ids):
+            return
+        vectors = normalize_rows(vectors)
+        if self.dims is None:
+            self.dims = vectors.shape[1]
+        start = len(self.ids)
+        self._grow(start + len(topic_ids))
+        self._matrix[start:start + len(topic_ids)] = vectors
+        for offset, topic_id in enumerate(topic_ids):
+            self._rows[topic_id] = start + offset
+        self.ids.extend(topic_ids)
+
+    def update(self, topic_id, vector):
+        """Replace a topic's vector in place (order unchanged)."""
+        self._matrix[self._rows[topic_id]] = 0 if vector is None else normalize(vector)
+
+    def rename(self, old_id, new_id):
+        """Give a row a new topic id (e.g. provisional → database id)."""
+        row = self._rows.pop(old_id)
+        self.ids[row] = new_id
+        self._rows[new_id] = row
+
+    def delete(self, topic_id):
+        """Remove a topic, keeping the remaining rows in order (shifts the
+        rows after it; use delete_many for more than a few)."""
+        row = self._rows.pop(topic_id)
+        n = len(self.ids)
+        self._matrix[row:n - 1] = self._matrix[row + 1:n]
+        self._matrix[n - 1] = 0
+        del self.ids[row]
+        for moved in self.ids[row:]:
+            self._rows[moved] -= 1
+
+    def delete_many(self, topic_ids):
+        """Remove several topics with one compaction pass over the matrix."""
+        gone = {self._rows.pop(topic_id) for topic_id in topic_ids}
+        if not gone:
+            return
+        n = len(self.ids)
+        keep = np.array([row for row in range(n) if row not in gone], dtype=np.int64)
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._matrix[len(keep):n] = 0
+        self.ids = [self.ids[row] for row in keep]
+        self._rows = {topic_id: row for row, topic_id in enumerate(self.ids)}
+
+    # ---------- reads ----------
+
+    def vector(self, topic_id) -> np.ndarray:
+        """A topic's normalized row (a copy)."""
+        return self._matrix[self._rows[topic_id]].copy()
+
+    def _window_bounds(self):
+        n = len(self.ids)
+        start = 0 if self.window is None else max(0, n - self.window)
+        return start, n
+
+    def similarities(self, vector) -> np.ndarray:
+        """Cosine similarity of one vector to every topic in the window (oldest first)."""
+        start, end = self._window_bounds()
+        if end == start:
+            return np.zeros(0, dtype=np.float32)
+        return self._matrix[start:end] @ normalize(vector)
+
+    def _search_normalized(self, query):
+        start, end = self._window_bounds()
+        if end == start:
+            return None, 0.0
+        sims = self._matrix[start:end] @ query
+        # argmax on the reversed row order → newest topic wins ties
+        best = len(sims) - 1 - int(np.argmax(sims[::-1]))
+        return self.ids[start + best], float(sims[best])
+
+    def search(self, vector):
+        """(best topic id, best similarity); (None, 0.0) if empty."""
+        return self._search_normalized(normalize(vector))
+
+    def search_batch(self, vectors) -> list:
+        """search() for many vectors with one matrix–matrix product."""
+        start, end = self._window_bounds()
+        if end == start:
+            return [(None, 0.0)] * len(vectors)
+
+        sims = normalize_rows(vectors) @ self._matrix[start:end].T
+        best = sims.shape[1] - 1 - np.argmax(sims[:, ::-1], axis=1)
+        return [
+            (self.ids[start + int(b)], float(sims[i, b]))
+            for i, b in enumerate(best)
+        ]
+
+    # ---------- persistence ----------
+
+    def save(self, path: str):
+        _save(path, backend=self.backend, dims=self.dims or 0, synced_at=self.synced_at,
+              ids=np.asarray(self.ids, dtype=np.int64), vectors=self.vectors)
+
+    @classmethod
+    def from_arrays(cls, data) -> "ExactTopicIndex":
+        index = cls(dims=int(data["dims"]) or None)
+        index.add_many([int(i) for i in data["ids"]], data["vectors"])
+        return index
+
+
+# ------------------------------------------------------------
+# IVF (approximate)
+# ------------------------------------------------------------
+
+def spherical_kmeans(vectors: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """k unit-norm centroids for unit-norm rows (cosine k-means)."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), k * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=k) == 0
+        # Re-seed empty clusters from random sample rows
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFTopicIndex:
+    """Approximate cosine search: k-means buckets, scan the nprobe nearest."""
+
+    backend = "ivf"
+
+    def __init__(self, dims: int = None, nprobe: int = IVF_NPROBE, train_min: int = IVF_TRAIN_MIN):
+        self.dims = dims
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.synced_at = None
+        self.centroids = None
+        self.trained_size = 0
+        self.lists = [ExactTopicIndex(dims)]  # one list = exact until trained
+        self._list_of = {}  # topic id → list number
+
+    def __len__(self):
+        return len(self._list_of)
+
+    def __contains__(self, topic_id):
+        return topic_id in self._list_of
+
+    @property
+    def ids(self):
+        return [topic_id for bucket in self.lists for topic_id in bucket.ids]
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    # ---------- training ----------
+
+    def train(self, nlist: int = None):
+        """(Re)build centroids from the current vectors and re-bucket everything."""
+        ids = self.ids
+        vectors = np.concatenate([bucket.vectors for bucket in self.lists]) if ids else None
+        if not ids:
+            return
+        nlist = nlist or max(1, int(np.sqrt(len(ids))))
+        self.centroids = spherical_kmeans(vectors, min(nlist, len(ids)))
+        self.trained_size = len(ids)
+
+        self.lists = [ExactTopicIndex(self.dims) for _ in range(len(self.centroids))]
+        self._list_of = {}
+        self._bucket(ids, vectors)
+
+    def _bucket(self, ids, vectors):
+        assign = self._assign(vectors)
+        for list_no in np.unique(assign):
+            members = np.nonzero(assign == list_no)[0]
+            self.lists[list_no].add_many([ids[m] for m in members], vectors[members])
+            for m in members:
+                self._list_of[ids[m]] = int(list_no)
+
+    def _maybe_train(self):
+        n = len(self)
+        if n >= self.train_min and (
+            self.centroids is None or n >= IVF_RETRAIN_FACTOR * self.trained_size
+        ):
+            self.train()
+
+    # ---------- writes ----------
+
+    def add(self, topic_id, vector):
+        if vector is not None and self.dims is None:
+            self.dims = len(vector)
+            self.lists = [ExactTopicIndex(self.dims) for _ in self.lists]
+        if topic_id in self._list_of:
+            raise KeyError(f"Topic {topic_id} already indexed")
+
+        vec = np.zeros(self.dims, dtype=np.float32) if vector is None else normalize(vector)
+        list_no = int(self._assign(vec[None, :])[0])
+        self.lists[list_no].add(topic_id, vec)
+        self._list_of[topic_id] = list_no
+        self._maybe_train()
+
+    def add_many(self, topic_ids, vectors):
+        if not len(topic_ids):
+            return
+        vectors = normalize_rows(vectors)
+        if self.dims is None:
+            self.dims = vectors.shape[1]
+            self.lists = [ExactTopicIndex(self.dims) for _ in self.lists]
+        self._bucket(list(topic_ids), vectors)
+        self._maybe_train()
+
+    def update(self, topic_id, vector):
+        """Overwrite a topic's vector in place; it only moves to another
+        bucket when its nearest centroid changed."""
+        vec = np.zeros(self.dims, dtype=np.float32) if vector is None else normalize(vector)
+        old = self._list_of[topic_id]
+        list_no = int(self._assign(vec[None, :])[0])
+        if list_no == old:
+            self.lists[old].update(topic_id, vec)
+            return
+        self.lists[old].delete(topic_id)
+        self.lists[list_no].add(topic_id, vec)
+        self._list_of[topic_id] = list_no
+
+    def rename(self, old_id, new_id):
+        list_no = self._list_of.pop(old_id)
+        self.lists[list_no].rename(old_id, new_id)
+        self._list_of[new_id] = list_no
+
+    def delete(self, topic_id):
+        self.lists[self._list_of.pop(topic_id)].delete(topic_id)
+
+    def delete_many(self, topic_ids):
+        by_list = {}
+        for topic_id in topic_ids:
+            by_list.setdefault(self._list_of.pop(topic_id), []).append(topic_id)
+        for list_no, ids in by_list.items():
+            self.lists[list_no].delete_many(ids)
+
+    # ---------- reads ----------
+
+    def vector(self, topic_id) -> np.ndarray:
+        return self.lists[self._list_of[topic_id]].vector(topic_id)
+
+    def _probe(self, query) -> list:
+        if self.centroids is None:
+            return [0]
+        scores = self.centroids @ query
+        nprobe = min(self.nprobe, len(scores))
+        return np.argpartition(-scores, nprobe - 1)[:nprobe]
+
+    def search(self, vector):
+        query = normalize(vector)
+        best_id, best_sim = None, 0.0
+        for list_no in self._probe(query):
+            topic_id, sim = self.lists[list_no]._search_normalized(query)
+            if topic_id is not None and (best_id is None or sim > best_sim):
+                best_id, best_sim = topic_id, sim
+        return best_id, best_sim
+
+    def search_batch(self, vectors) -> list:
+        return [self.search(v) for v in np.asarray(vectors, dtype=np.float32)]
+
+    # ---------- persistence ----------
+
+    def save(self, path: str):
+        ids = np.asarray(self.ids, dtype=np.int64)
+        vectors = (np.concatenate([bucket.vectors for bucket in self.lists])
+                   if len(ids) else np.zeros((0, self.dims or 0), dtype=np.float32))
+        lists = np.concatenate([[n] * len(bucket) for n, bucket in enumerate(self.lists)]).astype(np.int64) \
+            if len(ids) else np.zeros(0, dtype=np.int64)
+        _save(path, backend=self.backend, dims=self.dims or 0, synced_at=self.synced_at,
+              ids=ids, vectors=vectors, lists=lists,
+              centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dims or 0)),
+              trained_size=self.trained_size, nprobe=self.nprobe)
+
+    @classmethod
+    def from_arrays(cls, data) -> "IVFTopicIndex":
+        index = cls(dims=int(data["dims"]) or None, nprobe=int(data["nprobe"]))
+        if len(data["centroids"]):
+            index.centroids = data["centroids"].astype(np.float32)
+            index.trained_size = int(data["trained_size"])
+            index.lists = [ExactTopicIndex(index.dims) for _ in range(len(index.centroids))]
+
+        ids, vectors, lists = data["ids"], data["vectors"], data["lists"]
+        for list_no in np.unique(lists):
+            members = np.nonzero(lists == list_no)[0]
+            index.lists[list_no].add_many([int(ids[m]) for m in members], vectors[members])
+            for m in members:
+                index._list_of[int(ids[m])] = int(list_no)
+        return index
+
+
+# ------------------------------------------------------------
+# FACTORY / PERSISTENCE
+# ------------------------------------------------------------
+
+BACKENDS = {"exact": ExactTopicIndex, "ivf": IVFTopicIndex}
+
+
+def make_index(backend: str = None, dims: int = None, **kwargs):
+    backend = backend or TOPIC_INDEX_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown topic index backend: {backend}")
+    return BACKENDS[backend](dims=dims, **kwargs)
+
+
+def _save(path: str, synced_at: datetime = None, **arrays):
+    """Atomic np.savez (write to a temp file, then rename)."""
+    arrays["synced_at"] = synced_at.isoformat() if synced_at else ""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_index(path: str):
+    """Index saved with .save(); None if the file is missing or unreadable."""
+    try:
+        with np.load(path) as data:
+            index = BACKENDS[str(data["backend"])].from_arrays(data)
+            synced_at = str(data["synced_at"]) if "synced_at" in data.files else ""
+            index.synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+            return index
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        return None
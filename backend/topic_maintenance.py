@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Incremental topic maintenance: merge duplicate topics, split loose ones
+- Only topics changed since the last pass are examined (new, or gained
+  articles: topics.maintenance_pending), TOPIC_MAINTENANCE_MAX_TOPICS per run
+- Merge: centroid similarity of every changed topic against every topic,
+  computed block by block; topics at least TOPIC_MERGE_THRESHOLD similar are folded
+  into the one with most articles, articles moved with bulk updates
+- Split: changed topics whose members spread out (mean pairwise similarity
+  below TOPIC_SPLIT_COHESION) are reclustered in memory
+  (batch_recluster.cluster_matrix); the largest part keeps the topic
+- Counters, popularity and the topic index are updated for the topics
+  touched only; the scheduler runs this every TOPIC_MAINTENANCE_SECONDS
+  (or POST /topics/maintain)
+Run in Render Shell: python3 topic_maintenance.py
+"""
+
+import argparse
+from datetime import datetime
+import os
+import time
+
+import numpy as np
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+
+import models
+import topic_stats
+import popularity
+import clustering
+import batch_recluster
+import topic_index
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Centroid similarity at which two topics are the same story; stricter
+# than the article → topic threshold, since centroids are smoother
+MERGE_THRESHOLD = float(os.getenv("TOPIC_MERGE_THRESHOLD", "0")) or min(clustering.SIMILARITY_THRESHOLD + 0.1, 0.95)
+# Mean pairwise similarity of a topic's members below which it is
+# reclustered (it may still come out whole)
+SPLIT_COHESION = float(os.getenv("TOPIC_SPLIT_COHESION", "0")) or clustering.SIMILARITY_THRESHOLD
+SPLIT_MIN_ARTICLES = int(os.getenv("TOPIC_SPLIT_MIN_ARTICLES", "4"))
+MAINTENANCE_MAX_TOPICS = int(os.getenv("TOPIC_MAINTENANCE_MAX_TOPICS", "5000"))
+MAINTENANCE_SECONDS = int(os.getenv("TOPIC_MAINTENANCE_SECONDS", "3600"))
+BLOCK_TOPICS = 2048  # topics per similarity block
+IN_CHUNK = 1000      # ids per IN (...) clause
+
+
+def chunks(ids: list, size: int = IN_CHUNK):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def pending_filter():
+    return or_(models.Topic.maintenance_pending == True, models.Topic.maintenance_pending == None)
+
+
+def load_topics(db: Session, topic_ids, dims: int = None) -> dict:
+    """{topic id: (unit centroid, centroid_count, article_count)}; topics without
+    a vector (or of another size than `dims`) are left out."""
+    topics = {}
+    for chunk in chunks(list(topic_ids)):
+        rows = db.query(
+            models.Topic.id, models.Topic.embedding, models.Topic.embedding_json,
+            models.Topic.centroid_count, models.Topic.article_count,
+        ).filter(models.Topic.id.in_(chunk))
+        for row in rows:
+            vector = clustering.topic_vector(row)
+            if vector is not None and (dims is None or len(vector) == dims):
+                topics[row.id] = (topic_index.normalize(vector), row.centroid_count or 1, row.article_count or 0)
+    return topics
+
+
+# ============================================================
+# MERGE
+# ============================================================
+
+def similar_pairs(db: Session, ids: np.ndarray, C: np.ndarray):
+    """(changed topic id, other topic id) pairs with centroid similarity >=
+    MERGE_THRESHOLD: the changed topics against every topic, BLOCK_TOPICS
+    stored topics at a time."""
+    found_a, found_b = [], []
+    last_id = 0
+    while True:
+        rows = db.query(
+            models.Topic.id, models.Topic.embedding, models.Topic.embedding_json
+        ).filter(models.Topic.id > last_id).order_by(models.Topic.id).limit(BLOCK_TOPICS).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        block_ids, vectors = [], []
+        for row in rows:
+            vector = clustering.topic_vector(row)
+            if vector is not None and len(vector) == C.shape[1]:
+                block_ids.append(row.id)
+                vectors.append(vector)
+        if not block_ids:
+            continue
+
+        sims = C @ topic_index.normalize_rows(np.stack(vectors)).T
+        r, c = np.nonzero(sims >= MERGE_THRESHOLD)
+        a, b = ids[r], np.asarray(block_ids)[c]
+        found_a.append(a[a != b])
+        found_b.append(b[a != b])
+
+    if not found_a:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(found_a), np.concatenate(found_b)
+
+
+def merge_groups(a: np.ndarray, b: np.ndarray, topics: dict) -> dict:
+    """
+    {survivor id: [merged ids]}. Similar pairs are grouped by connected
+    components; the topic with most articles (then the oldest) survives,
+    and members chained in but far from the group centroid stay apart.
+    """
+    nodes = np.unique(np.concatenate([a, b]))
+    labels = batch_recluster.connected_components(
+        len(nodes), np.searchsorted(nodes, a), np.searchsorted(nodes, b)
+    )
+    groups = {}
+    for node, label in zip(nodes.tolist(), labels.tolist()):
+        if node in topics:
+            groups.setdefault(label, []).append(node)
+
+    merges = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        centroid = topic_index.normalize(sum(topics[t][0] * topics[t][1] for t in members))
+        members = [t for t in members if float(topics[t][0] @ centroid) >= clustering.SIMILARITY_THRESHOLD]
+        if len(members) < 2:
+            continue
+        survivor = max(members, key=lambda t: (topics[t][2], -t))
+        merges[survivor] = [t for t in members if t != survivor]
+    return merges
+
+
+def move_articles(db: Session, moves: dict) -> int:
+    """Relink every article of the topics in `moves` ({old id: new id}) in bulk."""
+    rows = []
+    for chunk in chunks(list(moves)):
+        rows += [
+            {"id": article_id, "topic_id": moves[topic_id]}
+            for article_id, topic_id in db.query(models.NewsItem.id, models.NewsItem.topic_id).filter(
+                models.NewsItem.topic_id.in_(chunk)
+            )
+        ]
+    if rows:
+        db.execute(update(models.NewsItem), rows)
+    return len(rows)
+
+
+def apply_merges(db: Session, merges: dict, topics: dict) -> tuple:
+    """Fold merged topics into their survivors. Returns (articles moved, new centroids)."""
+    moves = {loser: survivor for survivor, losers in merges.items() for loser in losers}
+    moved = move_articles(db, moves)
+
+    centroids = {}
+    rows = []
+    for survivor, losers in merges.items():
+        members = [survivor] + losers
+        count = sum(topics[t][1] for t in members)
+        centroids[survivor] = topic_index.normalize(sum(topics[t][0] * topics[t][1] for t in members))
+        topics[survivor] = (centroids[survivor], count, sum(topics[t][2] for t in members))
+        rows.append({"id": survivor, "embedding": clustering.serialize_embedding(centroids[survivor]),
+                     "centroid_count": count, "centroid_updated_at": datetime.utcnow()})
+    for loser in moves:
+        topics.pop(loser, None)
+
+    losers = list(moves)
+    for chunk in chunks(losers):
+        db.query(models.TopicSource).filter(
+            models.TopicSource.topic_id.in_(chunk)
+        ).delete(synchronize_session=False)
+        db.query(models.Topic).filter(models.Topic.id.in_(chunk)).delete(synchronize_session=False)
+    if rows:
+        db.execute(update(models.Topic), rows)
+    return moved, centroids
+
+
+# ============================================================
+# SPLIT
+# ============================================================
+
+def load_members(db: Session, topic_ids: list, dims: int) -> dict:
+    """{topic id: [(article id, title, summary, unit vector)]}; articles without a vector are left out."""
+    members = {}
+    for chunk in chunks(topic_ids):
+        rows = db.query(
+            models.NewsItem.id, models.NewsItem.topic_id, models.NewsItem.title,
+            models.NewsItem.summary, models.NewsItem.embedding,
+        ).filter(models.NewsItem.topic_id.in_(chunk), models.NewsItem.embedding != None).order_by(models.NewsItem.id)
+        for article_id, topic_id, title, summary, blob in rows:
+            vector = clustering.compress_embedding(clustering.deserialize_embedding(blob))
+            if vector is not None and len(vector) == dims:
+                members.setdefault(topic_id, []).append((article_id, title, summary, topic_index.normalize(vector)))
+    return members
+
+
+def cohesion(X: np.ndarray) -> float:
+    """Mean pairwise similarity of unit rows, from the norm of their sum: O(n), not O(n²)."""
+    n = len(X)
+    total = X.sum(axis=0)
+    return float((total @ total - n) / (n * (n - 1)))
+
+
+def plan_splits(members: dict) -> dict:
+    """{topic id: part labels of its members} for the topics too spread out."""
+    splits = {}
+    for topic_id, rows in members.items():
+        if len(rows) < SPLIT_MIN_ARTICLES:
+            continue
+        X = np.stack([vector for _, _, _, vector in rows])
+        if cohesion(X) >= SPLIT_COHESION:
+            continue
+        labels = batch_recluster.cluster_matrix(X)
+        if labels.max() > 0:
+            # Part 0 = the largest part, which keeps the topic
+            order = np.argsort(-np.bincount(labels), kind="stable")
+            splits[topic_id] = np.argsort(order)[labels]
+    return splits
+
+
+def apply_splits(db: Session, splits: dict, members: dict) -> tuple:
+    """Move every part but the largest into a new topic. Returns (new ids, articles moved, new centroids)."""
+    now = datetime.utcnow()
+    new_rows, new_members = [], []
+    centroids = {}
+    kept_rows = []
+    for topic_id, labels in splits.items():
+        rows = members[topic_id]
+        X = np.stack([vector for _, _, _, vector in rows])
+        cents = batch_recluster.centroids_of(X, labels)
+        centroids[topic_id] = cents[0]
+        kept_rows.append({"id": topic_id, "embedding": clustering.serialize_embedding(cents[0]),
+                          "centroid_count": int((labels == 0).sum()), "centroid_updated_at": now})
+        for part in range(1, len(cents)):
+            idx = np.flatnonzero(labels == part)
+            _, title, summary, _ = rows[idx[0]]
+            new_rows.append({
+                "title": clustering.generate_topic_title(title, summary),
+                "summary": summary,
+                "embedding": clustering.serialize_embedding(cents[part]),
+                "centroid_count": len(idx),
+                "centroid_updated_at": now,
+                "article_count": 0,
+                "distinct_source_count": 0,
+                "maintenance_pending": False,
+                "created_at": now,
+            })
+            new_members.append((cents[part], [rows[i][0] for i in idx]))
+
+    if kept_rows:
+        db.execute(update(models.Topic), kept_rows)
+    if not new_rows:
+        return [], 0, centroids
+
+    new_ids = db.execute(
+        insert(models.Topic).returning(models.Topic.id, sort_by_parameter_order=True), new_rows
+    ).scalars().all()
+    links = []
+    for topic_id, (centroid, article_ids) in zip(new_ids, new_members):
+        centroids[topic_id] = centroid
+        links += [{"id": article_id, "topic_id": topic_id} for article_id in article_ids]
+    db.execute(update(models.NewsItem), links)
+    return list(new_ids), len(links), centroids
+
+
+# ============================================================
+# MAINTENANCE PASS
+# ============================================================
+
+def maintain(db: Session, progress=None) -> dict:
+    """Merge and split the topics changed since the last pass. Returns counts and timing."""
+    progress = progress or (lambda **counters: None)
+    started = time.perf_counter()
+
+    changed = [topic_id for (topic_id,) in db.query(models.Topic.id).filter(
+        pending_filter()
+    ).order_by(models.Topic.id).limit(MAINTENANCE_MAX_TOPICS)]
+    stats = {"examined": len(changed), "merged_topics": 0, "split_topics": 0,
+             "new_topics": 0, "articles_moved": 0}
+    if not changed:
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    topics = load_topics(db, changed)
+    dims = next((len(v) for v, _, _ in topics.values()), None)
+    topics = {t: state for t, state in topics.items() if len(state[0]) == dims}
+    centroids = {}
+    removed, created = set(), []
+
+    # -------------------------------
+    # MERGE near-duplicate topics
+    # -------------------------------
+    if topics:
+        progress(stage="merging", topics_examined=len(topics))
+        ids = np.fromiter(topics, dtype=np.int64)
+        a, b = similar_pairs(db, ids, np.stack([topics[t][0] for t in ids]))
+        if len(a):
+            # The other side of a pair may be an unchanged topic
+            topics.update(load_topics(db, set(b.tolist()) - set(topics), dims))
+            merges = merge_groups(a, b, topics)
+            moved, centroids = apply_merges(db, merges, topics)
+            removed = {loser for losers in merges.values() for loser in losers}
+            stats["merged_topics"] = len(removed)
+            stats["articles_moved"] += moved
+
+    # -------------------------------
+    # SPLIT topics whose members drifted apart
+    # -------------------------------
+    candidates = [t for t in set(changed) | set(centroids)
+                  if t in topics and t not in removed and topics[t][2] >= SPLIT_MIN_ARTICLES]
+    if candidates:
+        progress(stage="splitting", topics_examined=len(candidates))
+        members = load_members(db, sorted(candidates), dims)
+        splits = plan_splits(members)
+        created, moved, split_centroids = apply_splits(db, splits, members)
+        centroids.update(split_centroids)
+        stats["split_topics"] = len(splits)
+        stats["new_topics"] = len(created)
+        stats["articles_moved"] += moved
+
+    # -------------------------------
+    # Counters and popularity of the topics touched; mark all as maintained
+    # -------------------------------
+    touched = sorted(set(centroids) | set(created))
+    progress(stage="writing", topics_touched=len(touched))
+    for chunk in chunks(touched):
+        topic_stats.recount(db, chunk)
+        popularity.rebuild(db, chunk)
+    for chunk in chunks([t for t in changed if t not in removed]):
+        db.query(models.Topic).filter(models.Topic.id.in_(chunk)).update(
+            {"maintenance_pending": False}, synchronize_session=False
+        )
+    db.commit()
+    if touched:
+        popularity.rescore(db, topic_ids=touched)
+
+    # Keep the persisted search index in step: load_topic_index drops merged
+    # topics, adds new ones and refreshes the centroids written above
+    if clustering.TOPIC_INDEX_PATH and dims and touched:
+        clustering.load_topic_index(db, dims).save(clustering.TOPIC_INDEX_PATH)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"🧹 Topic maintenance: {stats['examined']} examined, {stats['merged_topics']} merged, "
+          f"{stats['split_topics']} split into {stats['new_topics']} new, "
+          f"{stats['articles_moved']} articles moved ({stats['seconds']:.2f}s)")
+    return stats
+
+
+def main():
+    from database import SessionLocal, engine
+    import migrate
+
+    argparse.ArgumentParser(description=__doc__).parse_args()
+
+    print("=" * 60)
+    print("🧹 TOPIC MAINTENANCE (merge / split)")
+    print("=" * 60)
+    print(f"   Merge threshold: {MERGE_THRESHOLD}")
+    print(f"   Split: mean member similarity < {SPLIT_COHESION}")
+
+    models.Base.metadata.create_all(bind=engine)
+    migrate.upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        maintain(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
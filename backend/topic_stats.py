@@ -0,0 +1,148 @@
+from collections import Counter
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+import models
+import popularity
+
+
+# ============================================================
+# TOPIC AGGREGATES
+# ============================================================
+# topics.article_count / distinct_source_count and the topic_sources table
+# (articles per topic and source) are updated as articles join topics, at a
+# cost independent of topic size, so popularity and stats never load a
+# topic's articles. Whatever bypasses record_links (deleted articles, manual
+# SQL) is repaired by reconcile(), which also rebuilds the popularity
+# windows: at startup when counters are missing, POST /topics/reconcile,
+# or reconcile_topics.py.
+
+
+def record_links(db: Session, links: list) -> dict:
+    """
+    Count newly linked articles, given as (topic id, source id) pairs, in
+    topic_sources. Returns {topic id: (article_count, distinct_source_count)}
+    for the caller to store on the topics (with whatever else it updates).
+    Does not commit.
+    """
+    added = Counter(links)
+    topic_ids = {topic_id for topic_id, _ in added}
+    if not topic_ids:
+        return {}
+
+    # Small per topic: one row per source that ever covered it
+    existing = {
+        (topic_id, source_id): n
+        for topic_id, source_id, n in db.query(
+            models.TopicSource.topic_id, models.TopicSource.source_id, models.TopicSource.article_count
+        ).filter(models.TopicSource.topic_id.in_(topic_ids))
+    }
+    totals = {
+        topic_id: [articles or 0, sources or 0]
+        for topic_id, articles, sources in db.query(
+            models.Topic.id, models.Topic.article_count, models.Topic.distinct_source_count
+        ).filter(models.Topic.id.in_(topic_ids))
+    }
+
+    new_pairs, grown_pairs = [], []
+    for (topic_id, source_id), n in added.items():
+        totals[topic_id][0] += n
+        if source_id is None:
+            continue
+        if (topic_id, source_id) in existing:
+            grown_pairs.append({"topic_id": topic_id, "source_id": source_id,
+                                "article_count": existing[(topic_id, source_id)] + n})
+        else:
+            new_pairs.append({"topic_id": topic_id, "source_id": source_id, "article_count": n})
+            totals[topic_id][1] += 1
+
+    if new_pairs:
+        db.execute(insert(models.TopicSource), new_pairs)
+    if grown_pairs:
+        db.execute(update(models.TopicSource), grown_pairs)
+    return {topic_id: tuple(counts) for topic_id, counts in totals.items()}
+
+
+def clear(db: Session):
+    """Drop every topic_sources row; call before deleting all topics."""
+    db.query(models.TopicSource).delete(synchronize_session=False)
+
+
+def needs_reconcile(db: Session) -> bool:
+    return db.query(models.Topic.id).filter(models.Topic.article_count == None).first() is not None
+
+
+def recount(db: Session, topic_ids: list):
+    """
+    Rebuild topic_sources and the counters of some topics from news_items,
+    e.g. after articles moved between them in bulk. Does not commit.
+    """
+    topic_ids = list(topic_ids)
+    if not topic_ids:
+        return
+    pairs = db.query(
+        models.NewsItem.topic_id, models.NewsItem.source_id, func.count(models.NewsItem.id)
+    ).filter(models.NewsItem.topic_id.in_(topic_ids)).group_by(
+        models.NewsItem.topic_id, models.NewsItem.source_id
+    ).all()
+
+    totals = {topic_id: [0, 0] for topic_id in topic_ids}
+    rows = []
+    for topic_id, source_id, n in pairs:
+        totals[topic_id][0] += n
+        if source_id is not None:
+            totals[topic_id][1] += 1
+            rows.append({"topic_id": topic_id, "source_id": source_id, "article_count": n})
+
+    db.query(models.TopicSource).filter(
+        models.TopicSource.topic_id.in_(topic_ids)
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(models.TopicSource), rows)
+    db.execute(update(models.Topic), [
+        {"id": topic_id, "article_count": articles, "distinct_source_count": sources}
+        for topic_id, (articles, sources) in totals.items()
+    ])
+
+
+def reconcile(db: Session) -> dict:
+    """Rebuild topic_sources and every topic's counters from news_items, in bulk."""
+    before = {
+        topic_id: (articles, sources)
+        for topic_id, articles, sources in db.query(
+            models.Topic.id, models.Topic.article_count, models.Topic.distinct_source_count
+        )
+    }
+
+    pairs = db.query(
+        models.NewsItem.topic_id, models.NewsItem.source_id, func.count(models.NewsItem.id)
+    ).filter(models.NewsItem.topic_id != None).group_by(
+        models.NewsItem.topic_id, models.NewsItem.source_id
+    ).all()
+
+    totals = {topic_id: [0, 0] for topic_id in before}
+    rows = []
+    for topic_id, source_id, n in pairs:
+        if topic_id not in totals:
+            continue  # dangling link to a deleted topic
+        totals[topic_id][0] += n
+        if source_id is not None:
+            totals[topic_id][1] += 1
+            rows.append({"topic_id": topic_id, "source_id": source_id, "article_count": n})
+
+    clear(db)
+    if rows:
+        db.execute(insert(models.TopicSource), rows)
+    corrected = [topic_id for topic_id, counts in totals.items() if tuple(counts) != before[topic_id]]
+    if corrected:
+        db.execute(update(models.Topic), [
+            {"id": topic_id, "article_count": totals[topic_id][0], "distinct_source_count": totals[topic_id][1]}
+            for topic_id in corrected
+        ])
+    popularity.rebuild(db)
+    db.commit()
+
+    print(f"🧾 Topic counters reconciled: {len(corrected)} of {len(before)} topics corrected")
+    popularity.rescore(db)
+    return {"topics": len(before), "corrected": len(corrected), "topic_sources": len(rows)}
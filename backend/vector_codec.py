@@ -0,0 +1,77 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+
+# ============================================================
+# BINARY EMBEDDING ENCODING
+# ============================================================
+# Embeddings are stored as raw little-endian bytes behind an 8-byte header
+# instead of JSON text (~60 KB → 12 KB for a 3072-dim float32 vector):
+#
+#   byte 0     dtype code (1 = float32, 2 = float16, 3 = int8)
+#   bytes 1-3  reserved
+#   bytes 4-7  float32 scale (int8 only; 1.0 otherwise)
+#   bytes 8-   vector
+#
+# The header keeps the payload 8-byte aligned, so float32/float16 decode
+# is a zero-copy np.frombuffer view. int8 stores round(v / scale) with
+# scale = max|v| / 127 and is dequantized on decode.
+
+EMBED_STORAGE_DTYPE = os.getenv("EMBED_STORAGE_DTYPE", "float32")
+
+HEADER = struct.Struct("<B3xf")
+DTYPES = {"float32": 1, "float16": 2, "int8": 3}
+_CODES = {code: name for name, code in DTYPES.items()}
+
+
+def encode(vector, dtype: str = None) -> bytes:
+    """Vector (list / ndarray) → header + bytes. None stays None."""
+    if vector is None:
+        return None
+    dtype = dtype or EMBED_STORAGE_DTYPE
+    values = np.asarray(vector, dtype=np.float32)
+
+    if dtype == "int8":
+        peak = float(np.abs(values).max()) if values.size else 0.0
+        scale = peak / 127 if peak > 0 else 1.0
+        payload = np.round(values / scale).astype("<i1")
+    elif dtype == "float16":
+        scale, payload = 1.0, values.astype("<f2")
+    elif dtype == "float32":
+        scale, payload = 1.0, values.astype("<f4")
+    else:
+        raise ValueError(f"Unknown embedding storage dtype: {dtype}")
+
+    return HEADER.pack(DTYPES[dtype], scale) + payload.tobytes()
+
+
+def decode(blob) -> np.ndarray:
+    """
+    Stored embedding → 1-D ndarray (read-only view for float32/float16).
+    Accepts legacy JSON text too, so rows not yet migrated still load.
+    """
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return np.asarray(json.loads(blob), dtype=np.float32)
+
+    code, scale = HEADER.unpack_from(blob)
+    dtype = _CODES.get(code)
+    if dtype == "float32":
+        return np.frombuffer(blob, dtype="<f4", offset=HEADER.size)
+    if dtype == "float16":
+        return np.frombuffer(blob, dtype="<f2", offset=HEADER.size)
+    if dtype == "int8":
+        return np.frombuffer(blob, dtype="<i1", offset=HEADER.size).astype(np.float32) * scale
+    raise ValueError(f"Unknown embedding dtype code: {code}")
+
+
+def storage_dtype(blob) -> str:
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return "json"
+    return _CODES.get(HEADER.unpack_from(blob)[0])